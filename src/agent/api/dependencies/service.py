@@ -1,6 +1,6 @@
 import hashlib
 import time
-from typing import Dict, Optional
+from typing import AsyncIterator, Dict, Optional
 
 import redis.asyncio as redis
 from fastapi import Depends
@@ -195,9 +195,10 @@ async def get_rag_retriever(
     return QdrantRag(vector_store=vector_store)
 
 
-def get_document_loader() -> BaseDocumentLoader:
-    """Get document loader instance (lightweight, no need to cache)."""
-    return S3DocumentLoader()
+async def get_document_loader() -> AsyncIterator[BaseDocumentLoader]:
+    """Get document loader sharing one S3 client for the whole request."""
+    async with S3DocumentLoader() as loader:
+        yield loader
 
 
 async def get_tools(
@@ -1,5 +1,6 @@
 import time
-from typing import Any, Dict, List, Optional
+from contextlib import aclosing, nullcontext
+from typing import Any, AsyncIterator, Dict, List, Optional
 
 from ...domain.entities.document import DocumentChunk
 from ...shared.exceptions.domain_exceptions import DocumentProcessingError
@@ -11,14 +12,16 @@ logger = Logger.get_logger(__name__)
 class DocumentProcessingService:
     """Service for processing documents from S3 to vector store."""
 
-    def __init__(self, document_loader, vector_store):
+    def __init__(self, document_loader, vector_store, batch_size: int = 256):
         """
         Args:
             document_loader: Implementation of BaseDocumentLoader
             vector_store: Implementation of BaseVectorStore
+            batch_size: Number of chunks embedded and indexed per vector store call
         """
         self.document_loader = document_loader
         self.vector_store = vector_store
+        self.batch_size = batch_size
 
     async def process_documents(
         self, s3_keys: Optional[List[str]] = None
@@ -28,30 +31,40 @@ class DocumentProcessingService:
 
         try:
             if not s3_keys:
-                all_chunks = await self._process_all_documents()
+                batches = self.document_loader.iter_chunk_batches(
+                    self.batch_size
+                )
+                # Nạp toàn bộ corpus: hoãn build HNSW tới khi upload xong
+                ingest = self.vector_store.bulk_ingest()
             else:
-                all_chunks = await self._process_specific_documents(s3_keys)
-
-            if not all_chunks:
+                batches = self._iter_specific_documents(s3_keys)
+                ingest = nullcontext()
+
+            # Index từng batch ngay khi load xong, không giữ toàn bộ corpus
+            sources = set()
+            total_chunks = 0
+            # aclosing: lỗi khi index sẽ dừng luôn việc load các tài liệu còn lại
+            async with ingest, aclosing(batches):
+                async for batch in batches:
+                    success = await self.vector_store.add_documents(batch)
+                    if not success:
+                        raise DocumentProcessingError(
+                            "Failed to add documents to vector store"
+                        )
+                    sources.update(chunk.metadata.source for chunk in batch)
+                    total_chunks += len(batch)
+
+            if not total_chunks:
                 logger.warning("No document chunks were processed")
                 return self._create_result(0, 0, [], time.time() - start_time)
 
-            # Add to vector store
-            success = await self.vector_store.add_documents(all_chunks)
-            if not success:
-                raise DocumentProcessingError(
-                    "Failed to add documents to vector store"
-                )
-
-            processed_docs = len(
-                set(chunk.metadata.source for chunk in all_chunks)
-            )
+            processed_docs = len(sources)
             logger.info(
-                f"Successfully processed {processed_docs} documents with {len(all_chunks)} chunks"
+                f"Successfully processed {processed_docs} documents with {total_chunks} chunks"
             )
 
             return self._create_result(
-                processed_docs, len(all_chunks), [], time.time() - start_time
+                processed_docs, total_chunks, [], time.time() - start_time
             )
 
         except Exception as e:
@@ -60,27 +73,20 @@ class DocumentProcessingService:
                 f"Document processing failed: {str(e)}"
             )
 
-    async def _process_all_documents(self) -> List[DocumentChunk]:
-        """Process all available documents."""
-        return await self.document_loader.load_all_documents()
-
-    async def _process_specific_documents(
+    async def _iter_specific_documents(
         self, s3_keys: List[str]
-    ) -> List[DocumentChunk]:
-        """Process specific documents by S3 keys."""
-        all_chunks = []
-
+    ) -> AsyncIterator[List[DocumentChunk]]:
+        """Yield the chunks of specific documents by S3 keys, one document at a time."""
         for s3_key in s3_keys:
             try:
                 chunks = await self.document_loader.load_and_chunk_document(
                     s3_key
                 )
-                all_chunks.extend(chunks)
             except Exception as e:
                 logger.error(f"Failed to process document {s3_key}: {str(e)}")
                 continue
-
-        return all_chunks
+            for i in range(0, len(chunks), self.batch_size):
+                yield chunks[i : i + self.batch_size]
 
     def _create_result(
         self,
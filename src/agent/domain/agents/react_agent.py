@@ -5,6 +5,7 @@ from abc import abstractmethod
 from datetime import datetime
 from typing import Any, Dict, List, Optional, Tuple
 
+import orjson
 from langchain_core.messages import (
     AIMessage,
     BaseMessage,
@@ -13,6 +14,10 @@ from langchain_core.messages import (
 )
 from langchain_core.runnables import Runnable
 
+from ...shared.exceptions.domain_exceptions import (
+    ChatProviderError,
+    RetriableChatError,
+)
 from ...shared.logging.logger import Logger
 from ..entities.context import AgentState
 from ..interfaces.chat_interface import BaseChat
@@ -31,10 +36,8 @@ class ReActAgent(Runnable):
         pass
 
     @abstractmethod
-    def parse_tool_usage(
-        self, message: str
-    ) -> Tuple[Optional[str], Optional[str]]:
-        """Parse tool name and input from agent message."""
+    def parse_tool_usage(self, message: str) -> List[Tuple[str, str]]:
+        """Parse (tool name, tool input) pairs from agent message."""
         pass
 
     @abstractmethod
@@ -57,6 +60,11 @@ class StockReActAgent(ReActAgent):
         self.system_prompt = self._build_system_prompt(
             realtime=datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         )
+        # Prefix cố định (system prompt) được tạo một lần và dùng lại mỗi bước,
+        # giúp provider tái sử dụng prompt/KV cache cho phần prefix
+        self.cacheable_prefix: List[BaseMessage] = [
+            SystemMessage(content=self.system_prompt)
+        ]
         logger.info(
             f"StockReActAgent initialized with tools: {list(tools.keys())}"
         )
@@ -445,6 +453,7 @@ class StockReActAgent(ReActAgent):
 
       ### INSTRUCTIONS
       - Luôn trả về **ACTION** dưới dạng JSON như trên.
+      - Nếu cần nhiều công cụ độc lập với nhau (ví dụ: giá cổ phiếu và tin tức), có thể trả về nhiều khối **ACTION** JSON trong cùng một bước; các công cụ sẽ được chạy song song.
       - Đảm bảo input công cụ đúng định dạng và đáp ứng các ràng buộc.
       - Nếu truy vấn là lời chào hoặc câu hỏi trò chuyện, trả về **FINAL ANSWER** trực tiếp, ví dụ: "Xin chào! Tôi là Milano Agent, sẵn sàng hỗ trợ bạn."
       - Nếu không cần công cụ, trả về **FINAL ANSWER** trực tiếp.
@@ -460,12 +469,24 @@ class StockReActAgent(ReActAgent):
         try:
             conversation = self._prepare_conversation_with_history(state)
             logger.info("Calling LLM for reasoning (ReAct step)...")
-            response = await self.chat_provider.chat(messages=conversation)
+            response = await self.chat_provider.chat(
+                messages=conversation, cacheable_prefix=self.cacheable_prefix
+            )
             response_content = response["response"]
             logger.info(f"LLM Response: '{response_content}...'")
 
             return {"response": response_content}
 
+        except RetriableChatError as e:
+            # Lỗi tạm thời: trả về lỗi để vòng ReAct thử lại ở bước sau
+            logger.warning(f"Transient LLM error during reasoning: {str(e)}")
+
+            return {"response": f"Error: {str(e)}"}
+
+        except ChatProviderError:
+            # Lỗi không thể phục hồi: dừng workflow thay vì lặp lại vô ích
+            raise
+
         except Exception as e:
             logger.error(
                 f"Agent reasoning error during LLM call: {str(e)}",
@@ -474,28 +495,44 @@ class StockReActAgent(ReActAgent):
 
             return {"response": f"Error: {str(e)}"}
 
-    def parse_tool_usage(
-        self, message: str
-    ) -> Tuple[Optional[str], Optional[str]]:
-        try:
-            json_block_pattern = r"```json\n(.*?)\n```"
-            match = re.search(json_block_pattern, message, re.DOTALL)
-            if not match:
-                logger.debug("No JSON block found in message")
-                if "FINAL ANSWER" in message:
-                    logger.debug(
-                        "Message contains FINAL ANSWER, skipping tool parsing"
-                    )
-                    return None, None
+    def parse_tool_usage(self, message: str) -> List[Tuple[str, str]]:
+        json_block_pattern = r"```json\n(.*?)\n```"
+        json_blocks = re.findall(json_block_pattern, message, re.DOTALL)
+        if not json_blocks:
+            logger.debug("No JSON block found in message")
+            if "FINAL ANSWER" in message:
+                logger.debug(
+                    "Message contains FINAL ANSWER, skipping tool parsing"
+                )
+                return []
+            logger.error(f"No valid JSON block found in message: {message}...")
+
+            return []
+
+        tool_calls = []
+        for json_str in json_blocks:
+            try:
+                action_data = orjson.loads(json_str)
+            except orjson.JSONDecodeError as e:
                 logger.error(
-                    f"No valid JSON block found in message: {message}..."
+                    f"Invalid JSON format in extracted block: {json_str}... Error: {str(e)}"
                 )
+                continue
 
-                return None, None
+            # Một khối có thể chứa một action hoặc danh sách action
+            actions = (
+                action_data if isinstance(action_data, list) else [action_data]
+            )
+            for action in actions:
+                tool_call = self._parse_action(action)
+                if tool_call:
+                    tool_calls.append(tool_call)
 
-            json_str = match.group(1)
-            action_data = json.loads(json_str)
+        return tool_calls
 
+    def _parse_action(self, action_data: Any) -> Optional[Tuple[str, str]]:
+        """Validate a single parsed action and return (tool name, tool input)."""
+        try:
             if (
                 not isinstance(action_data, dict)
                 or "action" not in action_data
@@ -505,7 +542,7 @@ class StockReActAgent(ReActAgent):
                     "Parsed JSON does not contain required 'action' or 'input' keys"
                 )
 
-                return None, None
+                return None
 
             tool_name = action_data["action"]
 
@@ -515,28 +552,22 @@ class StockReActAgent(ReActAgent):
             if not isinstance(tool_name, str) or not tool_name:
                 logger.error(f"Invalid tool_name type or value: {tool_name}")
 
-                return None, None
+                return None
 
             if tool_name not in self.tools:
                 logger.error(f"Invalid tool name: {tool_name}")
 
-                return None, None
+                return None
 
-            tool_input = json.dumps(action_data["input"], ensure_ascii=False)
+            # orjson luôn xuất UTF-8 (tương đương ensure_ascii=False)
+            tool_input = orjson.dumps(action_data["input"]).decode()
 
             return tool_name, tool_input
 
-        except json.JSONDecodeError as e:
-            logger.error(
-                f"Invalid JSON format in extracted block: {json_str}... Error: {str(e)}"
-            )
-
-            return None, None
-
         except Exception as e:
             logger.error(f"Error parsing tool usage: {str(e)}", exc_info=True)
 
-            return None, None
+            return None
 
     def format_tool_result(
         self, tool_name: str, tool_result: Dict[str, Any]
@@ -600,9 +631,12 @@ class StockReActAgent(ReActAgent):
     def _prepare_conversation_with_history(
         self, state: AgentState
     ) -> List[BaseMessage]:
-        """Prepares conversation history as List[BaseMessage] for LLM prompt."""
+        """Prepares conversation history as List[BaseMessage] for LLM prompt.
+
+        The system prompt is not included; it is sent separately as ``cacheable_prefix``.
+        """
 
-        conversation_history = [SystemMessage(content=self.system_prompt)]
+        conversation_history = []
         for msg in state.messages:
             if msg.type == "human":
                 conversation_history.append(HumanMessage(content=msg.content))
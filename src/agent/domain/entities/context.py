@@ -1,7 +1,7 @@
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, NamedTuple, Optional, Union
 
 from langchain_core.messages import BaseMessage
-from pydantic import BaseModel, ConfigDict, Field
+from pydantic import BaseModel, ConfigDict, Field, model_validator
 
 
 class QueryContext(BaseModel):
@@ -18,6 +18,17 @@ class QueryContext(BaseModel):
     model_config = ConfigDict(arbitrary_types_allowed=True)
 
 
+class FastToolResult(NamedTuple):
+    """Lightweight tool result for the internal hot path (no validation).
+
+    Convert to ToolResult with ToolResult.from_fast at API/LLM boundaries.
+    """
+
+    status: str
+    data: Any
+    metadata: Dict[str, Any]
+
+
 class ToolResult(BaseModel):
     """Result from tool execution"""
 
@@ -31,6 +42,11 @@ class ToolResult(BaseModel):
 
     model_config = ConfigDict(arbitrary_types_allowed=True)
 
+    @classmethod
+    def from_fast(cls, fast: FastToolResult) -> "ToolResult":
+        """Create a validated ToolResult from a FastToolResult."""
+        return cls(status=fast.status, data=fast.data, metadata=fast.metadata)
+
 
 class AgentState(BaseModel):
     """State object for tracking ReAct agent workflow with JSON action format."""
@@ -58,7 +74,7 @@ class AgentState(BaseModel):
     reflection_notes: List[str] = Field(
         default_factory=list, description="Notes from reflection steps"
     )
-    tool_output: Optional[ToolResult] = Field(
+    tool_output: Optional[Union[FastToolResult, ToolResult]] = Field(
         default=None, description="Result of the most recent tool execution"
     )
     tool_error: Optional[Dict[str, Any]] = Field(
@@ -82,12 +98,43 @@ class AgentState(BaseModel):
     max_steps: int = Field(
         default=10, description="Maximum allowed steps in the workflow"
     )
+    max_message_window: int = Field(
+        default=16,
+        description="Maximum messages kept (the original query is always kept)",
+    )
+    max_action_history: int = Field(
+        default=8, description="Maximum entries kept in action_history"
+    )
 
     model_config = ConfigDict(arbitrary_types_allowed=True)
 
+    @model_validator(mode="after")
+    def _enforce_windows(self) -> "AgentState":
+        """Keep the working set bounded so per-hop serialization stays O(window)."""
+        return self.trim_to_window()
+
+    def trim_to_window(self) -> "AgentState":
+        """Truncate messages and action_history to their caps in place."""
+        window = self.max_message_window
+        if window > 0 and len(self.messages) > window:
+            # Giữ messages[0] (câu hỏi gốc) + các message gần nhất
+            self.messages = [self.messages[0]] + self.messages[
+                len(self.messages) - (window - 1) :
+            ]
+        if len(self.action_history) > self.max_action_history:
+            self.action_history = self.action_history[
+                len(self.action_history) - self.max_action_history :
+            ]
+        return self
+
     def to_dict(self) -> Dict[str, Any]:
         """Convert AgentState to dictionary for serialization."""
-        return self.model_dump()
+        data = self.model_dump()
+        if isinstance(self.tool_output, FastToolResult):
+            data["tool_output"] = ToolResult.from_fast(
+                self.tool_output
+            ).model_dump()
+        return data
 
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> "AgentState":
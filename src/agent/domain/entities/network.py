@@ -0,0 +1,20 @@
+from pydantic import BaseModel, Field
+
+
+class NetworkConfig(BaseModel):
+    """Network settings shared by providers that talk to remote services"""
+
+    timeout_ms: int = Field(
+        default=2500, description="Per-request timeout in milliseconds"
+    )
+    retries: int = Field(default=0, description="Retries on failed requests")
+    pool_max: int = Field(
+        default=32, description="Maximum pooled connections per client"
+    )
+    keepalive: bool = Field(
+        default=True, description="Keep idle connections alive for reuse"
+    )
+
+    @property
+    def timeout_seconds(self) -> float:
+        return self.timeout_ms / 1000
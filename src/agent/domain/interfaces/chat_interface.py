@@ -1,19 +1,31 @@
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List
+from typing import Any, AsyncIterator, Dict, List, Optional
 
 from langchain_core.messages import BaseMessage
 
+from ..entities.network import NetworkConfig
+
 
 class BaseChat(ABC):
     """Abstract interface for chat operations with LLMs in infrastructure layer."""
 
+    def __init__(self, config: Optional[NetworkConfig] = None):
+        self.network_config = config or NetworkConfig()
+
     @abstractmethod
-    async def chat(self, messages: List[BaseMessage]) -> Dict[str, Any]:
+    async def chat(
+        self,
+        messages: List[BaseMessage],
+        *,
+        cacheable_prefix: Optional[List[BaseMessage]] = None,
+    ) -> Dict[str, Any]:
         """
         Send a prompt to the LLM and return the response.
 
         Args:
-            prompt: The input prompt to send to the LLM.
+            messages: The variable part of the conversation (per-turn input, observations).
+            cacheable_prefix: Byte-stable leading messages (system prompt, few-shot)
+                that providers may serve from their prompt/KV prefix cache.
 
         Returns:
             Dict containing:
@@ -22,3 +34,42 @@ class BaseChat(ABC):
                 - usage: Token usage statistics
         """
         pass
+
+    async def astream(
+        self,
+        messages: List[BaseMessage],
+        *,
+        cacheable_prefix: Optional[List[BaseMessage]] = None,
+    ) -> AsyncIterator[str]:
+        """
+        Stream the LLM response as text chunks as soon as they are generated.
+
+        Implementations with native streaming should override this; the
+        default yields the complete ``chat`` response as a single chunk.
+
+        Args:
+            messages: The variable part of the conversation.
+            cacheable_prefix: Byte-stable leading messages, see ``chat``.
+
+        Yields:
+            Text chunks of the generated response.
+        """
+        response = await self.chat(messages, cacheable_prefix=cacheable_prefix)
+        yield response.get("response", "")
+
+    async def aclose(self) -> None:
+        """
+        Release network resources held by the provider.
+
+        The default does nothing; providers owning HTTP clients override it.
+        """
+
+    @staticmethod
+    def _with_prefix(
+        messages: List[BaseMessage],
+        cacheable_prefix: Optional[List[BaseMessage]],
+    ) -> List[BaseMessage]:
+        """Place the cacheable prefix in front of the variable messages."""
+        if not cacheable_prefix:
+            return messages
+        return [*cacheable_prefix, *messages]
@@ -1,12 +1,29 @@
+import asyncio
 from abc import ABC, abstractmethod
-from typing import List
+from typing import AsyncIterator, List
 
 from ...domain.entities.document import DocumentChunk
+from ...shared.logging.logger import Logger
+
+logger = Logger.get_logger(__name__)
 
 
 class BaseDocumentLoader(ABC):
     """Base class for document loaders"""
 
+    # Số tài liệu được load/chunk đồng thời trong load_all_documents
+    concurrency: int = 8
+
+    @abstractmethod
+    async def list_sources(self) -> List[str]:
+        """
+        List identifiers of all available documents.
+
+        Returns:
+            List of document identifiers (e.g., S3 keys, file paths).
+        """
+        pass
+
     @abstractmethod
     async def load_and_chunk_document(
         self, source: str
@@ -22,12 +39,74 @@ class BaseDocumentLoader(ABC):
         """
         pass
 
-    @abstractmethod
+    async def iter_chunk_batches(
+        self, batch_size: int = 256
+    ) -> AsyncIterator[List[DocumentChunk]]:
+        """
+        Load and chunk all available documents, yielding chunks in batches.
+
+        Sources are fetched by ``concurrency`` workers that hand finished
+        documents to the consumer through a bounded queue, so the consumer can
+        embed/index while later documents are still loading and a slow
+        consumer pauses loading instead of buffering the corpus. Documents
+        that fail to load are logged and skipped.
+
+        Args:
+            batch_size: Number of chunks per yielded batch (the last may be smaller).
+
+        Yields:
+            Lists of DocumentChunk objects, in document completion order.
+        """
+        sources = await self.list_sources()
+        if not sources:
+            return
+
+        pending = iter(sources)
+        loaded: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency)
+
+        async def worker() -> None:
+            # Các worker lấy chung một iterator nên mỗi tài liệu chỉ load một lần
+            for source in pending:
+                try:
+                    chunks = await self.load_and_chunk_document(source)
+                except Exception as e:
+                    logger.error(f"Failed to load document {source}: {e}")
+                    chunks = None
+                await loaded.put(chunks)
+
+        workers = [
+            asyncio.create_task(worker())
+            for _ in range(min(self.concurrency, len(sources)))
+        ]
+        try:
+            batch: List[DocumentChunk] = []
+            for _ in range(len(sources)):
+                chunks = await loaded.get()
+                if not chunks:
+                    continue
+                batch.extend(chunks)
+                while len(batch) >= batch_size:
+                    yield batch[:batch_size]
+                    batch = batch[batch_size:]
+            if batch:
+                yield batch
+        finally:
+            # Consumer dừng sớm: hủy các worker chưa load xong
+            for task in workers:
+                task.cancel()
+
     async def load_all_documents(self) -> List[DocumentChunk]:
         """
-        Load and chunk all available documents.
+        Load and chunk all available documents concurrently.
+
+        Prefer ``iter_chunk_batches`` for large corpora; this collects every
+        chunk in memory.
 
         Returns:
             List of DocumentChunk objects from all documents.
         """
-        pass
+        return [
+            chunk
+            async for batch in self.iter_chunk_batches()
+            for chunk in batch
+        ]
@@ -1,20 +1,166 @@
-import time
+import asyncio
+import re
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
+
+from ..entities.network import NetworkConfig
+
+# Token dạng mã chứng khoán / chỉ số viết hoa (VCB, P/E, ROE, ...)
+_KEYWORD_TOKEN = re.compile(r"^[A-Z0-9][A-Z0-9/.\-]*$")
 
 
 class BaseRag(ABC):
     """Abstract interface for RAG retrieval operations in domain layer."""
 
+    # Hằng số k của reciprocal-rank fusion
+    rrf_k: int = 60
+    # Số token tối đa để một truy vấn được xem là truy vấn từ khóa
+    keyword_query_max_tokens: int = 4
+
+    def __init__(self, config: Optional[NetworkConfig] = None):
+        self.network_config = config or NetworkConfig()
+
     @abstractmethod
-    async def retrieve(self, query: str) -> List[Dict[str, Any]]:
+    async def retrieve(
+        self,
+        query: str,
+        top_k: Optional[int] = None,
+        min_score: Optional[float] = None,
+    ) -> List[Dict[str, Any]]:
         """
         Retrieve similar documents from the knowledge base.
 
         Args:
             query: The query string to search for.
+            top_k: Number of documents to return (provider default if None).
+            min_score: Minimum similarity score, filtered by the backend.
 
         Returns:
             List of dictionaries containing document content and metadata.
         """
         pass
+
+    async def retrieve_many(
+        self, queries: List[str], top_k: Optional[int] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Retrieve similar documents for several queries at once.
+
+        Args:
+            queries: The query strings to search for.
+            top_k: Number of documents per query (provider default if None).
+
+        Returns:
+            One list of result dictionaries per query, in input order.
+        """
+        return list(
+            await asyncio.gather(
+                *(self.retrieve(q, top_k=top_k) for q in queries)
+            )
+        )
+
+    async def retrieve_sparse(
+        self, query: str, top_k: int
+    ) -> List[Dict[str, Any]]:
+        """
+        Retrieve documents from a sparse (BM25) keyword index.
+
+        Args:
+            query: The query string to search for.
+            top_k: Maximum number of documents to return.
+
+        Returns:
+            List of dictionaries containing document content, metadata and a
+            BM25 score normalised to [0, 1], or an empty list when no sparse
+            index is available.
+        """
+        return []
+
+    def route(self, query: str, alpha: float) -> float:
+        """
+        Pick the dense weight for a query.
+
+        Short queries made only of uppercase tickers/ratios (e.g. "VCB P/E")
+        are routed to the sparse index alone so no embedding is computed.
+
+        Args:
+            query: The query string.
+            alpha: Requested dense weight in [0, 1].
+
+        Returns:
+            Effective dense weight; 0.0 skips the dense path entirely.
+        """
+        tokens = query.split()
+        if 0 < len(tokens) <= self.keyword_query_max_tokens and all(
+            _KEYWORD_TOKEN.match(token) for token in tokens
+        ):
+            return 0.0
+        return alpha
+
+    async def retrieve_hybrid(
+        self,
+        query: str,
+        top_k: int = 5,
+        alpha: float = 0.5,
+        bm25_topk: int = 100,
+        dense_topk: int = 100,
+        min_score: float = 0.0,
+    ) -> List[Dict[str, Any]]:
+        """
+        Retrieve documents using dense + BM25 search fused with reciprocal-rank fusion.
+
+        Args:
+            query: The query string to search for.
+            top_k: Number of fused documents to return.
+            alpha: Dense weight in [0, 1]; 1.0 is dense-only, 0.0 is BM25-only.
+            bm25_topk: Number of sparse candidates considered for fusion.
+            dense_topk: Number of dense candidates considered for fusion.
+            min_score: Minimum dense similarity score.
+
+        Returns:
+            List of dictionaries containing document content, metadata and
+            ``rrf_score``, ordered by fused rank.
+        """
+        alpha = self.route(query, alpha)
+
+        if alpha <= 0.0:
+            sparse_results = await self.retrieve_sparse(query, bm25_topk)
+            if sparse_results:
+                return sparse_results[:top_k]
+            # Không có chỉ mục BM25 -> quay về tìm kiếm dense
+            alpha = 1.0
+
+        if alpha >= 1.0:
+            return await self.retrieve(query, top_k=top_k, min_score=min_score)
+
+        dense_results, sparse_results = await asyncio.gather(
+            self.retrieve(query, top_k=dense_topk, min_score=min_score),
+            self.retrieve_sparse(query, bm25_topk),
+        )
+        return self._fuse_rrf(dense_results, sparse_results, alpha)[:top_k]
+
+    def _fuse_rrf(
+        self,
+        dense_results: List[Dict[str, Any]],
+        sparse_results: List[Dict[str, Any]],
+        alpha: float,
+    ) -> List[Dict[str, Any]]:
+        """Fuse two ranked lists with weighted reciprocal-rank fusion."""
+
+        fused: Dict[Any, Dict[str, Any]] = {}
+        for weight, results in (
+            (alpha, dense_results),
+            (1.0 - alpha, sparse_results),
+        ):
+            for rank, result in enumerate(results, 1):
+                key = result.get("metadata", {}).get(
+                    "chunk_index"
+                ) or result.get("content", "")
+                entry = fused.get(key)
+                if entry is None:
+                    entry = fused[key] = {**result, "rrf_score": 0.0}
+                entry["rrf_score"] += weight / (self.rrf_k + rank)
+
+        return sorted(
+            fused.values(), key=lambda r: r["rrf_score"], reverse=True
+        )
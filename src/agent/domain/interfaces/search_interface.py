@@ -1,10 +1,15 @@
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
+
+from ..entities.network import NetworkConfig
 
 
 class BaseWebSearch(ABC):
     """Abstract interface for web search operations in domain layer."""
 
+    def __init__(self, config: Optional[NetworkConfig] = None):
+        self.network_config = config or NetworkConfig()
+
     @abstractmethod
     async def search(self, query: str) -> List[Dict[str, Any]]:
         """
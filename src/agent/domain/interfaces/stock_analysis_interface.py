@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List
+from typing import Any, Dict, Sequence
 
 
 class BaseStockAnalysis(ABC):
@@ -7,7 +7,7 @@ class BaseStockAnalysis(ABC):
 
     @abstractmethod
     async def get_fundamental_ratios(
-        self, symbols: List[str]
+        self, symbols: Sequence[str]
     ) -> Dict[str, Any]:
         """
         Get fundamental ratios for given symbols.
@@ -41,7 +41,9 @@ class BaseStockAnalysis(ABC):
         pass
 
     @abstractmethod
-    async def get_peers_comparison(self, symbols: List[str]) -> Dict[str, Any]:
+    async def get_peers_comparison(
+        self, symbols: Sequence[str]
+    ) -> Dict[str, Any]:
         """
         Get peer comparison and ranking for a list of symbols.
 
@@ -55,3 +57,7 @@ class BaseStockAnalysis(ABC):
                 - ticker: Dict with indicators (Vốn hóa, P/E, etc.) as values
         """
         pass
+
+    def close(self) -> None:
+        """Release provider resources (thread pools, clients); no-op by default."""
+        pass
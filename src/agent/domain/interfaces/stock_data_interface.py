@@ -1,12 +1,14 @@
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List
+from typing import Any, Dict, Optional, Sequence
 
 
 class BaseStockData(ABC):
     """Abstract interface for stock data retrieval operations in domain layer."""
 
     @abstractmethod
-    async def get_realtime_data(self, symbols: List[str]) -> Dict[str, Any]:
+    async def get_realtime_data(
+        self, symbols: Sequence[str]
+    ) -> Dict[str, Any]:
         """
         Get realtime stock data for given symbols.
 
@@ -20,7 +22,7 @@ class BaseStockData(ABC):
 
     @abstractmethod
     async def get_historical_data(
-        self, symbols: List[str], start_date: str, end_date: str
+        self, symbols: Sequence[str], start_date: str, end_date: str
     ) -> Dict[str, Any]:
         """
         Get historical stock data for given symbols.
@@ -34,3 +36,41 @@ class BaseStockData(ABC):
             Dict containing historical data for all symbols.
         """
         pass
+
+    @abstractmethod
+    async def get_realtime_single(
+        self, symbol: str, timestamp: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Get realtime stock data for a single symbol.
+
+        Args:
+            symbol: Stock symbol.
+            timestamp: Request time to report (defaults to now); lets a
+                multi-symbol request share one timestamp.
+
+        Returns:
+            Dict containing realtime data for the symbol.
+        """
+        pass
+
+    @abstractmethod
+    async def get_historical_single(
+        self, symbol: str, start_date: str, end_date: str
+    ) -> Any:
+        """
+        Get historical stock data for a single symbol.
+
+        Args:
+            symbol: Stock symbol.
+            start_date: Start date in YYYY-MM-DD format.
+            end_date: End date in YYYY-MM-DD format.
+
+        Returns:
+            List of daily records, or an empty dict when no data is available.
+        """
+        pass
+
+    def close(self) -> None:
+        """Release provider resources (thread pools, clients); no-op by default."""
+        pass
@@ -1,6 +1,8 @@
 # src/stock_assistant/infrastructure/vector_stores/base.py
+import asyncio
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional
 
 from ...domain.entities.document import DocumentChunk
 
@@ -35,14 +37,93 @@ class BaseVectorStore(ABC):
         pass
 
     @abstractmethod
-    async def similarity_search(self, query: str) -> List[Dict[str, Any]]:
+    async def similarity_search(
+        self,
+        query: str,
+        k: Optional[int] = None,
+        score_threshold: Optional[float] = None,
+    ) -> List[Dict[str, Any]]:
         """
         Perform similarity search.
 
         Args:
             query: The query string to search for.
+            k: Number of nearest neighbours to return (store default if None).
+            score_threshold: Minimum similarity score, applied by the store.
 
         Returns:
             List of dictionaries containing document content and metadata.
         """
         pass
+
+    async def similarity_search_many(
+        self, queries: List[str], k: Optional[int] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Perform similarity search for several queries at once.
+
+        Implementations should override this to embed and search all
+        queries in batched calls; the default runs them concurrently.
+
+        Args:
+            queries: The query strings to search for.
+            k: Number of nearest neighbours per query (store default if None).
+
+        Returns:
+            One list of result dictionaries per query, in input order.
+        """
+        return list(
+            await asyncio.gather(
+                *(self.similarity_search(q, k=k) for q in queries)
+            )
+        )
+
+    @asynccontextmanager
+    async def bulk_ingest(self) -> AsyncIterator[None]:
+        """
+        Context for large ingests; stores may defer indexing until exit.
+
+        The default does nothing.
+        """
+        yield
+
+    async def bulk_add_documents(
+        self,
+        documents: List[DocumentChunk],
+        chunk_size: int = 256,
+        concurrency: int = 8,
+    ) -> bool:
+        """
+        Add many documents in parallel chunks inside a bulk_ingest context.
+
+        Args:
+            documents: List of DocumentChunk objects to add.
+            chunk_size: Number of documents per add_documents call.
+            concurrency: Maximum number of add_documents calls in flight.
+
+        Returns:
+            True if every chunk was added, False otherwise.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def add_chunk(chunk: List[DocumentChunk]) -> bool:
+            async with semaphore:
+                return await self.add_documents(chunk)
+
+        async with self.bulk_ingest():
+            results = await asyncio.gather(
+                *(
+                    add_chunk(documents[i : i + chunk_size])
+                    for i in range(0, len(documents), chunk_size)
+                )
+            )
+        return all(results)
+
+    async def scroll_documents(self) -> List[Dict[str, Any]]:
+        """
+        Return every stored document (used to build sparse keyword indexes).
+
+        Returns:
+            List of dictionaries containing document content and metadata.
+        """
+        return []
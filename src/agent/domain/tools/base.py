@@ -1,11 +1,12 @@
+import json
 import time
 from abc import ABC, abstractmethod
-from typing import Any, Dict, Optional, Type
+from typing import Any, ClassVar, Dict, Optional, Type
 
 from langchain.tools import StructuredTool
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, TypeAdapter
 
-from ..entities.context import ToolResult
+from ..entities.context import FastToolResult
 
 
 class ToolState(BaseModel):
@@ -29,12 +30,57 @@ class CustomBaseTool(StructuredTool, ABC):
     return_direct: bool = False
     state: Optional[ToolState] = None  # State for LangGraph integration
 
-    async def _arun(self, *args, **kwargs) -> ToolResult:
-        """Main execution logic, wrapping results in ToolResult and updating state."""
+    # Validator/JSON schema của args_schema, build một lần cho mỗi lớp tool
+    _args_adapter: ClassVar[Optional[TypeAdapter]] = None
+    _args_json_schema: ClassVar[Optional[Dict[str, Any]]] = None
+
+    @classmethod
+    def __pydantic_init_subclass__(cls, **kwargs: Any) -> None:
+        """Compile the args_schema validator once per tool class."""
+        super().__pydantic_init_subclass__(**kwargs)
+        field = cls.model_fields.get("args_schema")
+        args_schema = field.default if field else None
+        if isinstance(args_schema, type) and issubclass(
+            args_schema, BaseModel
+        ):
+            cls._args_adapter = TypeAdapter(args_schema)
+            cls._args_json_schema = cls._args_adapter.json_schema()
+
+    @classmethod
+    def get_args_json_schema(cls) -> str:
+        """Return the cached JSON schema of args_schema (for LLM function calling)."""
+        return json.dumps(cls._args_json_schema or {}, ensure_ascii=False)
+
+    @property
+    def args(self) -> Dict[str, Any]:
+        """Tool arguments, served from the cached JSON schema."""
+        if self._args_json_schema is not None:
+            return self._args_json_schema.get("properties", {})
+        return super().args
+
+    async def _arun(self, *args, **kwargs) -> FastToolResult:
+        """Main execution logic, wrapping results in FastToolResult and updating state."""
+
+        return await self._run_tool(kwargs, validate=True)
+
+    async def _arun_validated(self, tool_input: BaseModel) -> FastToolResult:
+        """Run with an args_schema instance that is already validated."""
+
+        # dict(model) đọc thẳng thuộc tính, không validate lại
+        return await self._run_tool(dict(tool_input), validate=False)
+
+    async def _run_tool(
+        self, kwargs: Dict[str, Any], validate: bool
+    ) -> FastToolResult:
+        """Optionally validate, run _execute_impl and wrap the result."""
 
         start_time = time.time()
 
         try:
+            if validate and self._args_adapter is not None:
+                # Validate qua core schema đã compile sẵn
+                kwargs = dict(self._args_adapter.validate_python(kwargs))
+
             result_data = await self._execute_impl(
                 **kwargs
             )  # Expected to return dict
@@ -50,7 +96,7 @@ class CustomBaseTool(StructuredTool, ABC):
                 },  # Example: Add Vietnam market context
             )
 
-            return ToolResult(
+            return FastToolResult(
                 status="success",
                 data=result_data,
                 metadata=self.state.model_dump(),  # Serialize state for LangGraph
@@ -68,7 +114,7 @@ class CustomBaseTool(StructuredTool, ABC):
                 error=str(e),
             )
 
-            return ToolResult(
+            return FastToolResult(
                 status="error", data={}, metadata=self.state.model_dump()
             )
 
@@ -76,7 +122,7 @@ class CustomBaseTool(StructuredTool, ABC):
     async def _execute_impl(self, **kwargs) -> Any:
         """
         Abstract method to be implemented by child classes.
-        Must return a dictionary which will be wrapped in ToolResult.
+        Must return a dictionary which will be wrapped in FastToolResult.
         """
 
         pass
@@ -1,4 +1,5 @@
-from typing import Any, Dict, List, Type
+from contextlib import aclosing
+from typing import Any, ClassVar, Dict, Iterable, List, Type
 
 from langchain_core.messages import BaseMessage
 from pydantic import BaseModel, Field, PrivateAttr
@@ -10,6 +11,29 @@ from .base import CustomBaseTool
 
 logger = Logger.get_logger(__name__)
 
+FILTERED_RESPONSE = "Kết quả đã được lọc do chứa nội dung không phù hợp."
+
+
+class _StreamingContentFilter:
+    """Incremental matcher for sensitive terms over a streamed response.
+
+    The last ``len(longest term) - 1`` characters are carried between chunks,
+    so terms split across chunk boundaries are still detected.
+    """
+
+    def __init__(self, terms: Iterable[str]):
+        self._terms = tuple(term.lower() for term in terms)
+        self._overlap = max((len(term) for term in self._terms), default=1) - 1
+        self._tail = ""
+
+    def feed(self, chunk: str) -> bool:
+        """Consume a chunk; return True once a sensitive term has been seen."""
+        window = self._tail + chunk.lower()
+        if any(term in window for term in self._terms):
+            return True
+        self._tail = window[len(window) - self._overlap :]
+        return False
+
 
 class ChatToolInput(BaseModel):
     """Input schema for ChatTool, compatible with LangChain's BaseMessage."""
@@ -38,6 +62,12 @@ class ChatTool(CustomBaseTool):
     _chat_provider: PrivateAttr = PrivateAttr()
     _query_enhancer: PrivateAttr = PrivateAttr()
 
+    SENSITIVE_TERMS: ClassVar[List[str]] = [
+        "inappropriate",
+        "offensive",
+        "harmful",
+    ]
+
     def __init__(self, chat_provider: BaseChat):
         super().__init__()
         self._chat_provider = chat_provider
@@ -54,32 +84,23 @@ class ChatTool(CustomBaseTool):
             logger.info(
                 f"Using chat provider with messages: {enhanced_messages}"
             )
-            chat_response = await self._chat_provider.chat(
-                messages=enhanced_messages
-            )
-            sanitized_response = self._apply_content_filter(
-                chat_response.get("response", "")
-            )
-
-            return ChatToolOutput(response=sanitized_response).model_dump()
+            # Lọc nội dung ngay trên stream, dừng sớm khi phát hiện từ nhạy cảm
+            content_filter = _StreamingContentFilter(self.SENSITIVE_TERMS)
+            response_parts = []
+            async with aclosing(
+                self._chat_provider.astream(messages=enhanced_messages)
+            ) as stream:
+                async for chunk in stream:
+                    if content_filter.feed(chunk):
+                        return {"response": FILTERED_RESPONSE}
+                    response_parts.append(chunk)
+
+            return {"response": "".join(response_parts)}
 
         except Exception as e:
             logger.error(f"Chat execution failed: {str(e)}")
 
-            return ChatToolOutput(
-                response=""
-            ).model_dump()  # Consistent return type
-
-    def _apply_content_filter(self, text: str) -> str:
-        """Apply basic content filtering to ensure safe and appropriate content."""
-
-        sensitive_terms = ["inappropriate", "offensive", "harmful"]
-
-        for term in sensitive_terms:
-            if term.lower() in text.lower():
-                return "Kết quả đã được lọc do chứa nội dung không phù hợp."
-
-        return text
+            return {"response": ""}  # Consistent return type
 
     def to_formatted_context(self, output: Dict[str, Any]) -> str:
         """Format chat results for LLM context."""
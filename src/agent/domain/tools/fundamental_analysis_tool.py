@@ -1,4 +1,5 @@
-from typing import Any, ClassVar, Dict, List, Type, Union
+import functools
+from typing import Any, ClassVar, Dict, List, Tuple, Type, Union
 
 from langchain_core.prompts import ChatPromptTemplate
 from pydantic import BaseModel, Field, PrivateAttr
@@ -10,6 +11,12 @@ from .base import CustomBaseTool
 logger = Logger.get_logger(__name__)
 
 
+@functools.lru_cache(maxsize=1024)
+def _normalize_key(symbols: str) -> Tuple[str, ...]:
+    """Split a comma-separated symbol string into uppercase tickers (memoized)."""
+    return tuple(s.strip().upper() for s in symbols.split(",") if s.strip())
+
+
 class FundamentalAnalysisToolInput(BaseModel):
     """Input schema for FundamentalAnalysisTool."""
 
@@ -60,7 +67,6 @@ class FundamentalAnalysisTool(CustomBaseTool):
     ) -> Dict[str, Any]:
         """Execute fundamental analysis."""
         try:
-            self._validate_parameters(symbols)
             normalized_symbols = self._normalize_symbols(symbols)
 
             # Fetch fundamental data
@@ -68,29 +74,25 @@ class FundamentalAnalysisTool(CustomBaseTool):
                 normalized_symbols
             )
 
-            return FundamentalAnalysisToolOutput(
-                data=fundamental_data
-            ).model_dump()
+            return {"data": fundamental_data}
 
         except Exception as e:
             logger.error(f"Fundamental analysis failed: {str(e)}")
-            return FundamentalAnalysisToolOutput(data={}).model_dump()
-
-    def _validate_parameters(self, symbols: Union[str, List[str]]) -> None:
-        """Validate input parameters."""
-
-        if isinstance(symbols, str):
-            symbols = [symbols]
-        if not isinstance(symbols, list) or not symbols:
-            raise ValueError("symbols must be a non-empty list or string")
+            return {"data": {}}
 
     def _normalize_symbols(self, symbols: Union[str, List[str]]) -> List[str]:
-        """Normalize symbols to a list of uppercase strings."""
+        """Validate and normalize symbols to a list of uppercase strings."""
 
         if isinstance(symbols, str):
-            symbols = [s.strip().upper() for s in symbols.split(",")]
+            normalized = list(_normalize_key(symbols))
+        elif isinstance(symbols, list):
+            normalized = [s.strip().upper() for s in symbols]
+        else:
+            normalized = []
 
-        return [s.strip().upper() for s in symbols]
+        if not normalized:
+            raise ValueError("symbols must be a non-empty list or string")
+        return normalized
 
     def to_formatted_context(self, output: Dict[str, Any]) -> str:
         """Format analysis results for LLM context."""
@@ -98,8 +100,9 @@ class FundamentalAnalysisTool(CustomBaseTool):
         prompt_template = ChatPromptTemplate.from_template(
             "Fundamental analysis for Vietnamese stocks:\n{data}"
         )
-        analysis_table = output.get("data", {}).get("analysis_table", {})
-        insights = output.get("data", {}).get("insights", [])
+        output_data = output.get("data") or {}
+        analysis_table = output_data.get("analysis_table", {})
+        insights = output_data.get("insights", [])
 
         formatted_data = []
         for symbol, data in analysis_table.items():
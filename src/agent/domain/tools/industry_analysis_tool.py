@@ -50,11 +50,11 @@ class IndustryAnalysisTool(CustomBaseTool):
                 normalized_symbol
             )
 
-            return IndustryAnalysisToolOutput(data=industry_data).model_dump()
+            return {"data": industry_data}
 
         except Exception as e:
             logger.error(f"Industry analysis failed: {str(e)}")
-            return IndustryAnalysisToolOutput(data={}).model_dump()
+            return {"data": {}}
 
     def _validate_parameters(self, symbol: str) -> None:
         """Validate input parameters."""
@@ -66,13 +66,10 @@ class IndustryAnalysisTool(CustomBaseTool):
         prompt_template = ChatPromptTemplate.from_template(
             "Industry analysis for Vietnamese stock {symbol}:\n{data}"
         )
-        analysis_table = output.get("data", {}).get("analysis_table", {})
-        insights = output.get("data", {}).get("insights", [])
-        symbol = (
-            output.get("data", {})
-            .get("analysis_table", {})
-            .get("symbol", "N/A")
-        )
+        output_data = output.get("data") or {}
+        analysis_table = output_data.get("analysis_table", {})
+        insights = output_data.get("insights", [])
+        symbol = analysis_table.get("symbol", "N/A")
 
         formatted_data = []
         for symbol, data in analysis_table.items():
@@ -1,4 +1,5 @@
-from typing import Any, Dict, List, Type, Union
+import re
+from typing import Any, Dict, List, Tuple, Type, Union
 
 from langchain_core.prompts import ChatPromptTemplate
 from pydantic import BaseModel, Field, PrivateAttr
@@ -9,6 +10,14 @@ from .base import CustomBaseTool
 
 logger = Logger.get_logger(__name__)
 
+# Tách chuỗi mã chứng khoán theo dấu phẩy và khoảng trắng
+_SPLIT_RE = re.compile(r"[,\s]+")
+
+# Template cố định, dựng một lần khi import module
+_PEERS_PROMPT = ChatPromptTemplate.from_template(
+    "Peers comparison for Vietnamese stocks:\n{data}"
+)
+
 
 class PeersComparisonToolInput(BaseModel):
     """Input schema for PeersComparisonTool."""
@@ -20,7 +29,7 @@ class PeersComparisonToolInput(BaseModel):
 
 
 class PeersComparisonToolOutput(BaseModel):
-    """Output schema for PeersComparisonTool."""
+    """Output schema for PeersComparisonTool, with the comparison data."""
 
     data: Dict[str, Any] = Field(
         description="Comparison table, rankings, and peers data"
@@ -49,7 +58,6 @@ class PeersComparisonTool(CustomBaseTool):
         """Execute peers comparison analysis."""
         try:
             # Validate and normalize inputs
-            self._validate_parameters(symbols)
             normalized_symbols = self._normalize_symbols(symbols)
 
             # Get both fundamental and peers data
@@ -57,51 +65,53 @@ class PeersComparisonTool(CustomBaseTool):
                 normalized_symbols
             )
 
-            return PeersComparisonToolOutput(data=peers_data).model_dump()
+            return {"data": peers_data}
 
         except Exception as e:
             logger.error(f"Peers comparison failed: {str(e)}")
-            return PeersComparisonToolOutput(data={}).model_dump()
+            return {"data": {}}
 
-    def _validate_parameters(self, symbols: Union[str, List[str]]) -> None:
-        """Validate input parameters."""
+    def _normalize_symbols(
+        self, symbols: Union[str, List[str]]
+    ) -> Tuple[str, ...]:
+        """Validate and normalize symbols to a sorted, deduplicated tuple."""
         if isinstance(symbols, str):
-            symbols = [s.strip() for s in symbols.split(",")]
-        if not isinstance(symbols, list) or len(symbols) < 2:
+            parts = [s for s in _SPLIT_RE.split(symbols.upper()) if s]
+        elif isinstance(symbols, list):
+            parts = [s.strip().upper() for s in symbols]
+        else:
+            parts = []
+        # Tuple đã sắp xếp -> khóa cache ổn định cho provider
+        parts = tuple(sorted(dict.fromkeys(parts)))
+        if len(parts) < 2:
             raise ValueError(
                 f"peers_comparison requires at least two symbols: {symbols}"
             )
-
-    def _normalize_symbols(self, symbols: Union[str, List[str]]) -> List[str]:
-        """Normalize symbols to a list of uppercase strings."""
-        if isinstance(symbols, str):
-            symbols = [s.strip().upper() for s in symbols.split(",")]
-        return [s.strip().upper() for s in symbols]
+        return parts
 
     def to_formatted_context(self, output: Dict[str, Any]) -> str:
         """Format peers comparison results for LLM context."""
-        prompt_template = ChatPromptTemplate.from_template(
-            "Peers comparison for Vietnamese stocks:\n{data}"
-        )
-        comparison_table = output.get("data", {}).get("comparison_table", {})
-        insights = output.get("data", {}).get("insights", [])
-
-        formatted_data = []
-        for symbol, data in comparison_table.items():
-            quarter = data.get("quarter", "N/A")
-            formatted_data.append(f"Stock: {symbol}, Quarter: {quarter}")
-            metrics = data.get("metrics", {})
-            for metric, value in metrics.items():
-                if value != "N/A" and value is not None:
-                    formatted_data.append(
-                        f"  {metric.upper()}: {float(value):.2f}"
-                    )
-
-        formatted_data.extend(["Insights:"] + insights)
-        return prompt_template.format(
-            data=(
-                "\n".join(formatted_data)
-                if formatted_data
-                else "No data available"
-            )
-        )
+        output_data = output.get("data") or {}
+        comparison_table = output_data.get("comparison_table", {})
+        insights = output_data.get("insights", [])
+
+        # Tên chỉ số lặp lại giữa các mã, chỉ upper() một lần
+        metric_labels: Dict[str, str] = {}
+
+        def format_lines():
+            for symbol, data in comparison_table.items():
+                quarter = data.get("quarter", "N/A")
+                yield f"Stock: {symbol}, Quarter: {quarter}"
+                for metric, value in data.get("metrics", {}).items():
+                    if value is None or value == "N/A":
+                        continue
+                    if not isinstance(value, (int, float)):
+                        value = float(value)
+                    label = metric_labels.get(metric)
+                    if label is None:
+                        label = metric_labels[metric] = metric.upper()
+                    yield f"  {label}: {value:.2f}"
+            yield "Insights:"
+            yield from insights
+
+        return _PEERS_PROMPT.format(data="\n".join(format_lines()))
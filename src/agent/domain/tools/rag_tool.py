@@ -1,26 +1,40 @@
-from typing import Any, Dict, List, Type
+from typing import Any, ClassVar, Dict, List, Optional, Type
 
+import numpy as np
 from langchain_core.documents import Document
 from langchain_core.retrievers import BaseRetriever
 from pydantic import BaseModel, Field, PrivateAttr
 
 from ...infra.providers.rag_provider import BaseRag
+from ...infra.utils.single_flight import SingleFlight
 from ...shared.logging.logger import Logger
 from .base import CustomBaseTool, ToolState
 
 logger = Logger.get_logger(__name__)
 
 
+def _to_document(result: Dict[str, Any]) -> Document:
+    """Build a LangChain Document from a retrieval result."""
+    # Sao chép metadata một lần: kết quả có thể được chia sẻ qua cache
+    metadata = dict(result.get("metadata") or ())
+    metadata["score"] = result.get("score", 0)
+    return Document(page_content=result.get("content", ""), metadata=metadata)
+
+
 class RAGToolInput(BaseModel):
     """Input schema for RAGTool."""
 
     query: str = Field(
         ..., description="The query to search the knowledge base for."
     )
+    top_k: int = Field(5, description="Number of documents to retrieve.")
+    min_score: float = Field(
+        0.0, description="Minimum similarity score of retrieved documents."
+    )
 
 
 class RAGToolOutput(BaseModel):
-    """Output schema for RAGTool."""
+    """Output schema for RAGTool, with context, sources and scores."""
 
     knowledge_context: str = Field(
         description="Formatted context from retrieved documents"
@@ -43,22 +57,38 @@ class RAGTool(CustomBaseTool):
     args_schema: Type[BaseModel] = RAGToolInput
 
     _rag_retriever: PrivateAttr = PrivateAttr()
+    _cached_retriever: PrivateAttr = PrivateAttr(default=None)
+
+    # Gộp các truy vấn giống nhau đang chạy đồng thời thành một lần retrieve
+    _inflight: ClassVar[SingleFlight] = SingleFlight()
 
     def __init__(self, rag_retriever: BaseRag):
         super().__init__()
         self._rag_retriever = rag_retriever
 
-    async def _execute_impl(self, query: str) -> Dict[str, Any]:
+    async def _execute_impl(
+        self, query: str, top_k: int = 5, min_score: float = 0.0
+    ) -> Dict[str, Any]:
         """Execute RAG search using the injected retriever."""
 
         try:
-            # Retrieve similar documents
-            search_results = await self._rag_retriever.retrieve(query=query)
+            search_results = await self._inflight.do(
+                f"{query.strip().lower()}|{top_k}|{min_score}",
+                # Retrieve similar documents (dense + BM25, keyword queries skip embeddings)
+                lambda: self._rag_retriever.retrieve_hybrid(
+                    query=query, top_k=top_k, min_score=min_score
+                ),
+            )
 
             # Format results
             knowledge_context = self._format_knowledge_context(search_results)
             sources = self._extract_sources(search_results)
-            scores = [result.get("score", 0) for result in search_results]
+            score_array = np.fromiter(
+                (r.get("score", 0) for r in search_results),
+                dtype=np.float64,
+                count=len(search_results),
+            )
+            scores = score_array.tolist()
 
             # Update tool state for LangGraph
             self.state = ToolState(
@@ -67,21 +97,28 @@ class RAGTool(CustomBaseTool):
                 context={
                     "market": "VN",
                     "num_results": len(search_results),
-                    "avg_score": sum(scores) / len(scores) if scores else 0.0,
+                    "avg_score": (
+                        float(score_array.mean()) if score_array.size else 0.0
+                    ),
                 },
             )
 
-            return RAGToolOutput(
-                knowledge_context=knowledge_context,
-                sources=sources,
-                scores=scores,
-            ).model_dump()
+            return {
+                "knowledge_context": knowledge_context,
+                "sources": sources,
+                "scores": scores,
+            }
 
         except Exception as e:
             logger.error(f"RAG search failed: {str(e)}")
-            return RAGToolOutput(
-                knowledge_context="", sources=[], scores=[]
-            ).model_dump()
+            return {"knowledge_context": "", "sources": [], "scores": []}
+
+    async def search_batch(
+        self, queries: List[str], top_k: Optional[int] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """Retrieve documents for several sub-queries in one batched call."""
+
+        return await self._rag_retriever.retrieve_many(queries, top_k=top_k)
 
     def _format_knowledge_context(self, results: List[Dict[str, Any]]) -> str:
         """Format search results into knowledge context for LLM."""
@@ -89,48 +126,38 @@ class RAGTool(CustomBaseTool):
         if not results:
             return "Không tìm thấy thông tin liên quan trong cơ sở dữ liệu nội bộ."
 
-        context_parts = []
-        for i, result in enumerate(results, 1):
-            content = result.get("content", "")
-            source = result.get("metadata", {}).get("title", "Unknown")
-            context_parts.append(f"Nguồn {i}: {source}\n{content}\n")
-        return "\n---\n".join(context_parts)
+        return "\n---\n".join(
+            f"Nguồn {i}: {(r.get('metadata') or {}).get('title', 'Unknown')}\n"
+            f"{r.get('content', '')}\n"
+            for i, r in enumerate(results, 1)
+        )
 
     def _extract_sources(
         self, results: List[Dict[str, Any]]
     ) -> List[Dict[str, Any]]:
         """Extract source information from results."""
 
-        return [result.get("metadata", {}) for result in results]
+        return [r.get("metadata") or {} for r in results]
 
     def to_langchain_retriever(self) -> BaseRetriever:
         """Convert RAGTool to a LangChain BaseRetriever for integration with LLM chains."""
 
+        if self._cached_retriever is not None:
+            return self._cached_retriever
+
         class RAGToolRetriever(BaseRetriever):
             tool: "RAGTool" = self
 
             async def _aget_relevant_documents(
                 self, query: str
             ) -> List[Document]:
+                fields = self.tool.args_schema.model_fields
                 results = await self.tool._rag_retriever.retrieve(
                     query=query,
-                    max_results=self.tool.args_schema.max_results.default,
+                    top_k=fields["top_k"].default,
+                    min_score=fields["min_score"].default,
                 )
-                filtered_results = [
-                    r
-                    for r in results
-                    if r.get("score", 0)
-                    >= self.tool.args_schema.min_score.default
-                ]
-                return [
-                    Document(
-                        page_content=r.get("content", ""),
-                        metadata={
-                            **r.get("metadata", {}),
-                            "score": r.get("score", 0),
-                        },
-                    )
-                    for r in filtered_results
-                ]
-
-        return RAGToolRetriever()
+                return list(map(_to_document, results))
+
+        self._cached_retriever = RAGToolRetriever()
+        return self._cached_retriever
@@ -1,5 +1,6 @@
-from datetime import datetime
-from typing import Any, Dict, List, Optional, Type, Union
+import re
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple, Type, Union
 
 from pydantic import BaseModel, Field, PrivateAttr
 
@@ -9,6 +10,9 @@ from .base import CustomBaseTool
 
 logger = Logger.get_logger(__name__)
 
+# Tách chuỗi mã chứng khoán theo dấu phẩy và khoảng trắng
+_SPLIT_RE = re.compile(r"[,\s]+")
+
 
 class StockPriceToolInput(BaseModel):
     """Input schema for StockPriceTool."""
@@ -31,7 +35,7 @@ class StockPriceToolInput(BaseModel):
 
 
 class StockPriceToolOutput(BaseModel):
-    """Output schema for StockPriceTool."""
+    """Output schema for StockPriceTool, wrapping the price data."""
 
     results: Dict[str, Any] = Field(description="Stock price data")
 
@@ -68,13 +72,13 @@ class StockPriceTool(CustomBaseTool):
                 data_type, normalized_symbols, start_date, end_date
             )
 
-            # Route to appropriate data retrieval method
+            # Provider lấy các mã song song (có giới hạn) và dùng chung
+            # một mốc thời gian cho dữ liệu realtime
+            provider = self._stock_data_provider
             if data_type == "realtime":
-                raw_data = await self._stock_data_provider.get_realtime_data(
-                    normalized_symbols
-                )
+                raw_data = await provider.get_realtime_data(normalized_symbols)
             elif data_type == "historical":
-                raw_data = await self._stock_data_provider.get_historical_data(
+                raw_data = await provider.get_historical_data(
                     normalized_symbols, start_date, end_date
                 )
             else:
@@ -83,24 +87,28 @@ class StockPriceTool(CustomBaseTool):
             # Extract results
             tool_results = raw_data
 
-            return StockPriceToolOutput(results=tool_results).model_dump()
+            return {"results": tool_results}
 
         except Exception as e:
             logger.error(f"Stock price retrieval failed: {str(e)}")
-            return StockPriceToolOutput(results={}).model_dump()
+            return {"results": {}}
 
-    def _normalize_symbols(self, symbols: Union[str, List[str]]) -> List[str]:
-        """Normalize symbols to a list of uppercase strings."""
+    def _normalize_symbols(
+        self, symbols: Union[str, List[str]]
+    ) -> Tuple[str, ...]:
+        """Normalize symbols to a sorted, deduplicated tuple of uppercase strings."""
 
         if isinstance(symbols, str):
-            symbols = [s.strip().upper() for s in symbols.split(",")]
-
-        return [s.strip().upper() for s in symbols]
+            parts = [s for s in _SPLIT_RE.split(symbols.upper()) if s]
+        else:
+            parts = [s.strip().upper() for s in symbols]
+        # Tuple đã sắp xếp -> khóa cache ổn định cho provider
+        return tuple(sorted(dict.fromkeys(parts)))
 
     def _validate_parameters(
         self,
         data_type: str,
-        symbols: List[str],
+        symbols: Tuple[str, ...],
         start_date: Optional[str],
         end_date: Optional[str],
     ) -> None:
@@ -116,7 +124,7 @@ class StockPriceTool(CustomBaseTool):
                     "start_date and end_date are required for historical data"
                 )
             try:
-                datetime.strptime(start_date, "%Y-%m-%d")
-                datetime.strptime(end_date, "%Y-%m-%d")
+                date.fromisoformat(start_date)
+                date.fromisoformat(end_date)
             except ValueError:
                 raise ValueError("Dates must be in YYYY-MM-DD format")
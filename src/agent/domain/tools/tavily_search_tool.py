@@ -1,17 +1,27 @@
+import functools
 import re
-from typing import Any, Dict, List, Type
+from typing import Any, ClassVar, Dict, List, Tuple, Type
 
 from langchain_core.documents import Document
 from langchain_core.retrievers import BaseRetriever
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
 
 from ...infra.providers.tavily_search_provider import BaseWebSearch
 from ...infra.utils.query_enhancer import QueryEnhancer
+from ...infra.utils.single_flight import SingleFlight
 from ...shared.logging.logger import Logger
 from .base import CustomBaseTool
 
 logger = Logger.get_logger(__name__)
 
+_query_enhancer = QueryEnhancer()
+
+
+@functools.lru_cache(maxsize=1024)
+def _enhance_query(query: str) -> str:
+    """Enhance a query, memoized since the enhancer is deterministic."""
+    return _query_enhancer.enhance_query(query)
+
 
 class TavilySearchToolInput(BaseModel):
     """Input schema for TavilySearchTool."""
@@ -20,7 +30,7 @@ class TavilySearchToolInput(BaseModel):
 
 
 class TavilySearchToolOutput(BaseModel):
-    """Output schema for TavilySearchTool."""
+    """Output schema for TavilySearchTool, with results and their sources."""
 
     search_results: List[Dict[str, Any]] = Field(
         description="Formatted search results"
@@ -37,76 +47,73 @@ class TavilySearchTool(CustomBaseTool):
     )
     args_schema: Type[BaseModel] = TavilySearchToolInput
 
+    # Gộp các tìm kiếm giống nhau đang chạy đồng thời thành một request
+    _inflight: ClassVar[SingleFlight] = SingleFlight()
+    _cached_retriever: PrivateAttr = PrivateAttr(default=None)
+
     def __init__(self, web_search_retriever: BaseWebSearch):
         super().__init__()
         self._web_search_retriever = web_search_retriever
-        self._query_enhancer = QueryEnhancer()
 
     async def _execute_impl(self, query: str) -> Dict[str, Any]:
         """Execute web search using the injected retriever."""
 
-        enhanced_query = self._query_enhancer.enhance_query(query)
+        enhanced_query = _enhance_query(query)
         try:
             # search_results: Liss[Dict[keys: url, title, content, raw_content, score], Any]
-            search_results = await self._web_search_retriever.search(
-                query=enhanced_query
+            search_results = await self._inflight.do(
+                enhanced_query.strip().lower(),
+                lambda: self._web_search_retriever.search(
+                    query=enhanced_query
+                ),
             )
 
-            formatted_results = self._format_search_results(search_results)
-            sources = self._extract_sources(search_results)
-            return TavilySearchToolOutput(
-                search_results=formatted_results,
-                sources=sources,
-            ).model_dump()
+            formatted_results, sources = self._split_results(search_results)
+            return {"search_results": formatted_results, "sources": sources}
 
         except Exception as e:
             logger.error(f"Tavily search failed: {str(e)}")
-            return TavilySearchToolOutput(
-                search_results=[], sources=[]
-            ).model_dump()
-
-    def _extract_sources(
-        self, results: List[Dict[str, Any]]
-    ) -> List[Dict[str, Any]]:
-        """Extract source information from results."""
-        return [
-            {"url": result.get("url", ""), "score": result.get("score", 0)}
-            for result in results
-        ]
+            return {"search_results": [], "sources": []}
 
-    def _format_search_results(
+    def _split_results(
         self, results: List[Dict[str, Any]]
-    ) -> List[Dict[str, Any]]:
-        """Format raw search results into domain-specific structure."""
-        return [
-            {
-                "title": result.get("title", ""),
-                "content": result.get("content", ""),
-            }
-            for result in results
-        ]
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """Format raw search results and extract their sources in one pass."""
+        formatted, sources = [], []
+        for result in results:
+            get = result.get
+            formatted.append(
+                {"title": get("title", ""), "content": get("content", "")}
+            )
+            sources.append({"url": get("url", ""), "score": get("score", 0)})
+        return formatted, sources
 
     def to_langchain_retriever(self) -> BaseRetriever:
         """Convert TavilySearchTool to a LangChain BaseRetriever."""
 
-        class TavilySearchRetriever(BaseRetriever):
-            tool: "TavilySearchTool" = self
-
-            async def _aget_relevant_documents(
-                self, query: str
-            ) -> List[Document]:
-                results = await self.tool._arun(query=query)
-                return [
-                    Document(
-                        page_content=r["content"],
-                        metadata={
-                            "title": r["title"],
-                            "url": r["url"],
-                            "score": r["score"],
-                            "published_date": r["published_date"],
-                        },
-                    )
-                    for r in results["search_results"]
-                ]
-
-        return TavilySearchRetriever()
+        if self._cached_retriever is None:
+            self._cached_retriever = TavilySearchRetriever(tool=self)
+        return self._cached_retriever
+
+
+class TavilySearchRetriever(BaseRetriever):
+    """LangChain retriever backed by a TavilySearchTool."""
+
+    tool: TavilySearchTool
+
+    def _get_relevant_documents(self, query: str) -> List[Document]:
+        raise NotImplementedError("TavilySearchRetriever chỉ hỗ trợ async")
+
+    async def _aget_relevant_documents(self, query: str) -> List[Document]:
+        result = await self.tool._arun(query=query)
+        data = result.data or {}
+        # url/score nằm ở sources, cùng thứ tự với search_results
+        return [
+            Document(
+                page_content=r["content"],
+                metadata={"title": r["title"], **source},
+            )
+            for r, source in zip(
+                data.get("search_results", []), data.get("sources", [])
+            )
+        ]
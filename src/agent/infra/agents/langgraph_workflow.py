@@ -1,16 +1,19 @@
-import json
+import asyncio
+import logging
 import re
 import time
+from hashlib import sha256
 from string import Template
-from typing import Any, Dict, Optional
+from typing import Any, Callable, ClassVar, Dict, List, Optional, Tuple
 
-from langchain_core.messages import AIMessage, HumanMessage
+import orjson
+from cachetools import TTLCache
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
 from langchain_core.runnables import RunnableLambda
-from langgraph.checkpoint.memory import MemorySaver
 from langgraph.graph import END, StateGraph
 
 from ...domain.agents.react_agent import StockReActAgent
-from ...domain.entities.context import AgentState, ToolResult
+from ...domain.entities.context import AgentState, FastToolResult
 from ...domain.tools.base import CustomBaseTool
 from ...domain.tools.chat_tool import ChatToolInput
 from ...domain.tools.fundamental_analysis_tool import (
@@ -25,6 +28,198 @@ from ...shared.logging.logger import Logger
 
 logger = Logger.get_logger(__name__)
 
+# Regex biên dịch sẵn một lần khi import module
+_FINAL_ANSWER_MARKER = "**FINAL ANSWER**:"
+_CODE_FENCE_RE = re.compile(r"^```.*?\n|\n```$", re.MULTILINE)
+
+# Tool trả lời trọn vẹn trong một bước, không cần LLM reflection
+_SINGLE_SHOT_TOOLS = frozenset({"stock_price", "chat_llm"})
+
+# Tool không có side effect, kết quả được cache theo (tool_name, tool_input)
+_CACHEABLE_TOOLS = frozenset(
+    {"stock_price", "rag_knowledge", "fundamental_analysis"}
+)
+# Giá realtime chỉ được cache rất ngắn (giây), tránh trả giá cũ
+_QUOTE_TOOLS = frozenset({"stock_price"})
+_QUOTE_CACHE_TTL = 15
+
+# Bảng quyết định reflection_decision -> cạnh tiếp theo của graph
+_DECISION = {"end": "end", "retry": "continue", "continue": "continue"}
+
+# Số observation / message gần nhất đưa vào prompt reflection/synthesis
+_MAX_OBS_IN_PROMPT = 4
+_MAX_MESSAGES_IN_PROMPT = 4
+
+# Tiền tố fence markdown có thể bao quanh JSON do LLM trả về
+_JSON_FENCE_PREFIXES = ("```json", "```JSON", "```")
+
+
+def _has_payload(data: Any) -> bool:
+    """
+    False for empty tool data. Tool nuốt lỗi (vd. RAGTool) vẫn trả
+    status="success" với các trường rỗng; kết quả này không được cache.
+    """
+    if isinstance(data, dict):
+        return any(data.values())
+    return bool(data)
+
+
+def _message_default(obj: Any) -> Any:
+    """Serialize LangChain messages for orjson without a pydantic dump."""
+    if isinstance(obj, BaseMessage):
+        return {"role": obj.type, "content": obj.content}
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def _prompt_observations(results: List[Dict[str, Any]]) -> str:
+    """Serialize the last tool observations without the raw LLM output."""
+    return orjson.dumps(
+        [
+            {
+                "tool_name": r.get("tool_name"),
+                "success": r.get("success"),
+                "observation": r.get("observation"),
+            }
+            for r in results[-_MAX_OBS_IN_PROMPT:]
+        ]
+    ).decode()
+
+
+def _prompt_messages(messages: List[BaseMessage]) -> str:
+    """Serialize the original query plus the most recent messages."""
+    if len(messages) <= _MAX_MESSAGES_IN_PROMPT + 1:
+        return orjson.dumps(messages, default=_message_default).decode()
+    older = len(messages) - _MAX_MESSAGES_IN_PROMPT - 1
+    # Gộp các message cũ thành một dòng tóm tắt thay vì gửi nguyên văn
+    summary = AIMessage(content=f"Earlier: {older} messages omitted")
+    return orjson.dumps(
+        [messages[0], summary, *messages[-_MAX_MESSAGES_IN_PROMPT:]],
+        default=_message_default,
+    ).decode()
+
+
+# Prompt tĩnh cho reflection/synthesis, biên dịch Template một lần
+_REFLECTION_TEMPLATE = Template(
+    """
+            Bạn là một trợ lý đánh giá dữ liệu thông minh.
+            Nhiệm vụ của bạn là phân tích câu hỏi người dùng và các kết quả trung gian từ các công cụ để quyết định liệu có đủ dữ liệu để trả lời câu hỏi, cần thử lại, hay cần tiếp tục thu thập thêm dữ liệu.
+
+            ### HƯỚNG DẪN
+            - Đánh giá câu hỏi gốc và các kết quả trung gian (`intermediate_results`).
+            - Xác định xem dữ liệu có đủ để trả lời đầy đủ câu hỏi hay không:
+              - Nếu câu hỏi yêu cầu thông tin cụ thể (ví dụ: giá cổ phiếu, chỉ số tài chính), kiểm tra xem tất cả dữ liệu cần thiết đã có chưa.
+              - Nếu có lỗi trong kết quả công cụ, đề xuất thử lại với cách tiếp cận khác.
+              - Nếu dữ liệu còn thiếu, đề xuất tiếp tục với các bước bổ sung.
+            - Trả về quyết định trong định dạng JSON với các trường:
+              - `decision`: "continue" (tiếp tục thu thập dữ liệu), "retry" (thử lại do lỗi), hoặc "end" (đủ dữ liệu để trả lời).
+              - `reason`: Lý do cho quyết định, giải thích rõ ràng.
+              - `updated_plan`: Kế hoạch cập nhật nếu cần thử lại hoặc tiếp tục (chuỗi rỗng nếu không cần).
+            - Đảm bảo quyết định rõ ràng và phù hợp với ngữ cảnh.
+
+            ### VÍ DỤ
+            1. **Truy vấn**: "Giá cổ phiếu FPT hiện tại là bao nhiêu?"
+               **Intermediate Results**: [
+                 {"tool_name": "stock_price", "success": true, "observation": "Stock price data: {\"price\": 115000, \"volume\": 1200000}"}
+               ]
+               **Output**:
+               ```json
+               {
+                 "decision": "end",
+                 "reason": "Dữ liệu giá cổ phiếu FPT đã được cung cấp đầy đủ từ công cụ stock_price.",
+                 "updated_plan": ""
+               }
+               ```
+
+            2. **Truy vấn**: "Phân tích cổ phiếu FPT"
+               **Intermediate Results**: [
+                 {"tool_name": "stock_price", "success": true, "observation": "Stock price data: {\"price\": 115000}"},
+                 {"tool_name": "rag_knowledge", "success": false, "observation": "Tool rag_knowledge failed: No relevant documents found"}
+               ]
+               **Output**:
+               ```json
+               {
+                 "decision": "retry",
+                 "reason": "Dữ liệu giá cổ phiếu đã có, nhưng công cụ rag_knowledge thất bại, cần thử lại để lấy chỉ số tài chính.",
+                 "updated_plan": "Retry rag_knowledge with a more specific query or use tavily_search for financial data."
+               }
+               ```
+
+            3. **Truy vấn**: "Phân tích cổ phiếu FPT"
+               **Intermediate Results**: [
+                 {"tool_name": "stock_price", "success": true, "observation": "Stock price data: {\"price\": 115000}"}
+               ]
+               **Output**:
+               ```json
+               {
+                 "decision": "continue",
+                 "reason": "Dữ liệu giá cổ phiếu đã có, nhưng cần thêm chỉ số tài chính và tin tức để phân tích đầy đủ.",
+                 "updated_plan": "Use rag_knowledge for financial metrics and tavily_search for recent news."
+               }
+               ```
+
+            ### DỮ LIỆU ĐẦU VÀO
+            - **Câu hỏi gốc**: $query
+            - **Kết quả trung gian**: $intermediate_results
+
+            ### ĐỊNH DẠNG ĐẦU RA
+            ```json
+            {
+              "decision": "continue|retry|end",
+              "reason": "Lý do chi tiết cho quyết định",
+              "updated_plan": "Kế hoạch cập nhật nếu cần tiếp tục hoặc thử lại"
+            }
+            ```
+            """
+)
+
+_SYNTHESIS_TEMPLATE = Template(
+    """
+            Bạn là một trợ lý thông minh. Nhiệm vụ của bạn là tổng hợp thông tin từ câu hỏi gốc, các kết quả trung gian từ công cụ, và lịch sử hội thoại để tạo ra một câu trả lời hoàn chỉnh, tự nhiên và dễ hiểu.
+
+            ### HƯỚNG DẪN
+            - Đọc câu hỏi gốc (`query`) và các kết quả trung gian (`intermediate_results`).
+            - Tổng hợp thông tin từ các kết quả trung gian để trả lời câu hỏi một cách chính xác và đầy đủ.
+            - Nếu dữ liệu không đủ hoặc không liên quan, đưa ra câu trả lời chung chung nhưng lịch sự, giải thích rằng thông tin hiện tại chưa đầy đủ.
+            - Câu trả lời phải:
+              - Tự nhiên, mạch lạc, và dễ hiểu.
+              - Trả lời trực tiếp câu hỏi của người dùng.
+              - Không sử dụng thuật ngữ kỹ thuật phức tạp trừ khi cần thiết.
+              - Viết bằng tiếng Việt, phù hợp với ngữ cảnh.
+
+            ### DỮ LIỆU ĐẦU VÀO
+            - **Câu hỏi gốc**: $query
+            - **Kết quả trung gian**: $intermediate_results
+            - **Lịch sử hội thoại**: $messages
+
+            ### ĐỊNH DẠNG ĐẦU RA
+            Một chuỗi văn bản chứa câu trả lời cuối cùng, không cần định dạng JSON.
+
+            ### VÍ DỤ
+            **Câu hỏi gốc**: "Cách thức hoạt động của thị trường chứng khoán là gì?"
+            **Kết quả trung gian**: [
+                {"tool_name": "rag_knowledge", "success": true, "observation": "Knowledge context: Thị trường chứng khoán là nơi các nhà đầu tư mua và bán cổ phiếu..."}
+            ]
+            **Lịch sử hội thoại**: [
+                {"role": "user", "content": "Cách thức hoạt động của thị trường chứng khoán là gì?"},
+                {"role": "assistant", "content": "Observation: Thị trường chứng khoán là nơi các nhà đầu tư mua và bán cổ phiếu..."}
+            ]
+            **Câu trả lời**:
+            Thị trường chứng khoán là nơi các nhà đầu tư mua và bán cổ phiếu của các công ty niêm yết. Hoạt động chính bao gồm phát hành cổ phiếu, giao dịch qua sàn chứng khoán, và định giá dựa trên cung cầu. Các nhà đầu tư có thể kiếm lợi nhuận từ chênh lệch giá hoặc cổ tức.
+
+            **Câu hỏi gốc**: "Giá cổ phiếu FPT hiện tại là bao nhiêu?"
+            **Kết quả trung gian**: [
+                {"tool_name": "stock_price", "success": true, "observation": "Stock price data: {\"price\": 115000, \"volume\": 1200000}"}
+            ]
+            **Câu trả lời**:
+            Giá cổ phiếu FPT hiện tại là 115.000 VND.
+
+            **Câu hỏi gốc**: "Cách thức hoạt động của thị trường chứng khoán là gì?"
+            **Kết quả trung gian**: []
+            **Câu trả lời**:
+            Tôi xin lỗi, hiện tại tôi không có đủ thông tin để trả lời chi tiết câu hỏi của bạn về cách thức hoạt động của thị trường chứng khoán. Tuy nhiên, thị trường chứng khoán nói chung là nơi các nhà đầu tư giao dịch cổ phiếu và các chứng khoán khác. Nếu bạn cần thêm thông tin chi tiết, vui lòng hỏi lại hoặc cung cấp thêm ngữ cảnh!
+            """
+)
+
 
 class ReActWorkflow:
     """Infrastructure layer for building and running LangGraph workflow with reasoning, action, reflection, and final output nodes."""
@@ -40,12 +235,40 @@ class ReActWorkflow:
         "tavily_search": TavilySearchToolInput,
     }
 
+    # Cache kết quả tool thành công, dùng chung giữa các bước và các phiên
+    _tool_cache: ClassVar[TTLCache] = TTLCache(maxsize=1024, ttl=300)
+    _quote_cache: ClassVar[TTLCache] = TTLCache(
+        maxsize=256, ttl=_QUOTE_CACHE_TTL
+    )
+
     def __init__(
-        self, agent: StockReActAgent, tools: Dict[str, CustomBaseTool]
+        self,
+        agent: StockReActAgent,
+        tools: Dict[str, CustomBaseTool],
+        *,
+        enable_checkpointing: bool = False,
     ):
         self.agent = agent
         self.tools = tools
-        self.checkpointer = MemorySaver()
+        # Bảng dispatch: tool_name -> (hàm validate input, hàm chạy tool)
+        self._dispatch: Dict[
+            str, Tuple[Callable[[str], Any], Callable[..., Any]]
+        ] = {}
+        for name, tool in tools.items():
+            input_model_class = self.TOOL_INPUT_MODELS.get(name)
+            if input_model_class is None:
+                logger.warning(f"No input model defined for tool: {name}")
+                continue
+            self._dispatch[name] = (
+                input_model_class.model_validate_json,
+                tool._arun_validated,
+            )
+        # Checkpointer chỉ tạo khi cần lưu state giữa các lần chạy
+        self.checkpointer = None
+        if enable_checkpointing:
+            from langgraph.checkpoint.memory import MemorySaver
+
+            self.checkpointer = MemorySaver()
         self.workflow = self._build_workflow()
         logger.info("ReActWorkflow initialized with 4-node architecture")
 
@@ -74,286 +297,226 @@ class ReActWorkflow:
     def _reasoning_node(self, agent_runnable: RunnableLambda):
         """Create reasoning node using agent as a Runnable."""
 
-        async def node(state: AgentState) -> AgentState:
-            node_start_time = time.time()
-            logger.info(
-                f"=== REASONING NODE START === Step: {state.current_step}"
+        async def node(state: AgentState) -> Dict[str, Any]:
+            if logger.isEnabledFor(logging.INFO):
+                logger.info(
+                    f"=== REASONING NODE START === Step: {state.current_step}"
+                )
+
+            llm_response = await agent_runnable.ainvoke(state)
+            llm_response_content = (
+                llm_response["response"]
+                if isinstance(llm_response, dict)
+                else llm_response
             )
 
-            try:
-                llm_response = await agent_runnable.ainvoke(state)
-                llm_response_content = (
-                    llm_response["response"]
-                    if isinstance(llm_response, dict)
-                    else llm_response
-                )
+            state.messages.append(AIMessage(content=llm_response_content))
 
-                updated_state = state.model_copy()
-                updated_state.plan = (
-                    updated_state.plan
-                    or "Generate plan to answer user query using available tools."
-                )
-                updated_state.sub_goals = updated_state.sub_goals or [
+            # Chỉ trả về các field thay đổi, LangGraph tự merge vào state
+            update: Dict[str, Any] = {
+                "plan": state.plan
+                or "Generate plan to answer user query using available tools.",
+                "sub_goals": state.sub_goals
+                or [
                     "Identify relevant tools",
                     "Execute tools",
                     "Synthesize results",
-                ]
-                updated_state.messages.append(
-                    AIMessage(content=llm_response_content)
-                )
-
-                # Check for simple conversational queries (e.g., greetings)
-                if "FINAL ANSWER" in llm_response_content:
-                    logger.info(
-                        "Detected FINAL ANSWER in reasoning output, setting state for early termination"
-                    )
-                    final_answer_match = re.search(
-                        r"\*\*FINAL ANSWER\*\*:\s*(.*?)(?=\n|$)",
-                        llm_response_content,
-                        re.DOTALL,
-                    )
-                    if final_answer_match:
-                        updated_state.final_answer = final_answer_match.group(
-                            1
-                        ).strip()
-                        updated_state.reflection_decision = "end"
+                ],
+                "messages": state.messages,
+            }
 
+            # Check for simple conversational queries (e.g., greetings)
+            _, marker, tail = llm_response_content.partition(
+                _FINAL_ANSWER_MARKER
+            )
+            if marker:
                 logger.info(
-                    f"Reasoning completed - Plan: {updated_state.plan}..., "
-                    f"Sub-goals: {updated_state.sub_goals}, "
-                    f"Final answer set: {bool(updated_state.final_answer)}"
+                    "Detected FINAL ANSWER in reasoning output, setting state for early termination"
                 )
-                return updated_state
-
-            except Exception as e:
-                logger.error(
-                    f"Error in reasoning node: {str(e)}", exc_info=True
+                update["final_answer"] = (
+                    tail.lstrip().split("\n", 1)[0].strip()
                 )
-                updated_state = state.model_copy()
-                updated_state.messages.append(
-                    AIMessage(content=f"Error in reasoning: {str(e)}")
+                update["reflection_decision"] = "end"
+
+            if logger.isEnabledFor(logging.INFO):
+                logger.info(
+                    f"Reasoning completed - Plan: {update['plan']}..., "
+                    f"Sub-goals: {update['sub_goals']}, "
+                    f"Final answer set: {bool(update.get('final_answer'))}"
                 )
-                updated_state.current_step += 1
-                updated_state.final_answer = f"Error: {str(e)}"
-                updated_state.reflection_decision = "end"
-                return updated_state
+            return update
 
         return node
 
-    async def _action_node(self, state: AgentState) -> AgentState:
-        node_start_time = time.time()
-        logger.info(f"=== ACTION NODE START === Step: {state.current_step}")
+    async def _action_node(self, state: AgentState) -> Dict[str, Any]:
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(
+                f"=== ACTION NODE START === Step: {state.current_step}"
+            )
 
-        try:
-            if state.final_answer:
-                logger.info("Final answer already set, skipping action node")
-                action_state = state.model_copy()
-                action_state.reflection_decision = "end"
-                return action_state
-
-            llm_response = state.messages[-1].content if state.messages else ""
-            tool_name, tool_input = self.agent.parse_tool_usage(llm_response)
-
-            if tool_name and tool_input:
-                # Đảm bảo tool_name là chuỗi
-                if isinstance(tool_name, (list, tuple)):
-                    tool_name = tool_name[0] if tool_name else None
-                if not isinstance(tool_name, str):
-                    raise ValueError(
-                        f"Invalid tool_name type: {type(tool_name)}, value: {tool_name}"
-                    )
+        if state.final_answer:
+            logger.info("Final answer already set, skipping action node")
+            return {"reflection_decision": "end"}
 
-                tool_result = await self._execute_tool_safely(
-                    tool_name, tool_input
-                )
+        llm_response = state.messages[-1].content if state.messages else ""
+        tool_calls = self.agent.parse_tool_usage(llm_response)
+
+        if tool_calls:
+            # Các tool độc lập trong cùng một bước được chạy song song
+            tool_results = await asyncio.gather(
+                *(
+                    self._execute_tool_safely(tool_name, tool_input)
+                    for tool_name, tool_input in tool_calls
+                ),
+                return_exceptions=True,
+            )
+
+            for (tool_name, tool_input), tool_result in zip(
+                tool_calls, tool_results
+            ):
+                if isinstance(tool_result, BaseException):
+                    tool_result = {
+                        "error": str(tool_result),
+                        "status": "error",
+                        "tool_name": tool_name,
+                        "input": tool_input,
+                    }
 
                 formatted_result = self.agent.format_tool_result(
                     tool_name, tool_result
                 )
 
-                updated_intermediate_results = state.intermediate_results + [
+                # state là bản sao riêng của node (pydantic validate tạo
+                # list mới), append tại chỗ thay vì nối list mỗi bước
+                state.intermediate_results.append(
                     {
                         "llm_output": llm_response,
                         "observation": formatted_result,
                         "tool_name": tool_name,
                         "success": tool_result.get("status") == "success",
+                        # Tool nuốt lỗi vẫn báo success với data rỗng
+                        "has_payload": _has_payload(tool_result.get("data")),
                     }
-                ]
-
-                updated_tools_used = state.tools_used + [tool_name]
-
-                action_state = state.model_copy()
-                action_state.messages.append(
-                    AIMessage(content=f"Observation: {formatted_result}")
                 )
-                action_state.current_step += 1
-                action_state.tools_used = updated_tools_used
-                action_state.intermediate_results = (
-                    updated_intermediate_results
+                state.tools_used.append(tool_name)
+                state.messages.append(
+                    AIMessage(content=f"Observation: {formatted_result}")
                 )
-                action_state.tool_output = ToolResult(**tool_result)
 
-                return action_state
+            return {
+                "messages": state.messages,
+                "current_step": state.current_step + 1,
+                "tools_used": state.tools_used,
+                "intermediate_results": state.intermediate_results,
+                "tool_output": FastToolResult(
+                    status=tool_result.get("status", "error"),
+                    data=tool_result.get("data"),
+                    metadata=tool_result.get("metadata", {}),
+                ),
+            }
 
-            else:
-                logger.warning(
-                    "No valid tool action found in reasoning output"
-                )
-                updated_state = state.model_copy()
-                updated_state.messages.append(
-                    AIMessage(content="No valid tool action found")
-                )
-                updated_state.current_step += 1
-                updated_state.reflection_decision = (
+        else:
+            logger.warning("No valid tool action found in reasoning output")
+            return {
+                "messages": [
+                    *state.messages,
+                    AIMessage(content="No valid tool action found"),
+                ],
+                "current_step": state.current_step + 1,
+                "reflection_decision": (
                     "end" if state.final_answer else "continue"
-                )
-                return updated_state
-
-        except Exception as e:
-            logger.error(f"Error in action node: {str(e)}", exc_info=True)
-            updated_state = state.model_copy()
-            updated_state.messages.append(
-                AIMessage(content=f"Error in action: {str(e)}")
-            )
-            updated_state.current_step += 1
-            updated_state.final_answer = f"Error: {str(e)}"
-            updated_state.reflection_decision = "end"
-            return updated_state
+                ),
+            }
 
-    async def _reflection_node(self, state: AgentState) -> AgentState:
+    async def _reflection_node(self, state: AgentState) -> Dict[str, Any]:
         """Reflection node: Evaluate tool results and adjust plan using LLM."""
-        node_start_time = time.time()
-        logger.info(
-            f"=== REFLECTION NODE START === Step: {state.current_step}"
-        )
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(
+                f"=== REFLECTION NODE START === Step: {state.current_step}"
+            )
+        synthesis_task = None
 
         try:
-            updated_state = state.model_copy()
-
             # Skip reflection if final answer is already set
             if state.final_answer:
                 logger.info(
                     "Final answer already set, proceeding to final output"
                 )
-                updated_state.reflection_decision = "end"
-                updated_state.reflection_notes.append(
-                    "Skipped reflection due to existing final answer"
-                )
-                return updated_state
-
-            # Prepare system prompt for LLM evaluation
-            reflection_prompt = """
-            Bạn là một trợ lý đánh giá dữ liệu thông minh.
-            Nhiệm vụ của bạn là phân tích câu hỏi người dùng và các kết quả trung gian từ các công cụ để quyết định liệu có đủ dữ liệu để trả lời câu hỏi, cần thử lại, hay cần tiếp tục thu thập thêm dữ liệu.
-
-            ### HƯỚNG DẪN
-            - Đánh giá câu hỏi gốc và các kết quả trung gian (`intermediate_results`).
-            - Xác định xem dữ liệu có đủ để trả lời đầy đủ câu hỏi hay không:
-              - Nếu câu hỏi yêu cầu thông tin cụ thể (ví dụ: giá cổ phiếu, chỉ số tài chính), kiểm tra xem tất cả dữ liệu cần thiết đã có chưa.
-              - Nếu có lỗi trong kết quả công cụ, đề xuất thử lại với cách tiếp cận khác.
-              - Nếu dữ liệu còn thiếu, đề xuất tiếp tục với các bước bổ sung.
-            - Trả về quyết định trong định dạng JSON với các trường:
-              - `decision`: "continue" (tiếp tục thu thập dữ liệu), "retry" (thử lại do lỗi), hoặc "end" (đủ dữ liệu để trả lời).
-              - `reason`: Lý do cho quyết định, giải thích rõ ràng.
-              - `updated_plan`: Kế hoạch cập nhật nếu cần thử lại hoặc tiếp tục (chuỗi rỗng nếu không cần).
-            - Đảm bảo quyết định rõ ràng và phù hợp với ngữ cảnh.
-
-            ### VÍ DỤ
-            1. **Truy vấn**: "Giá cổ phiếu FPT hiện tại là bao nhiêu?"
-               **Intermediate Results**: [
-                 {"tool_name": "stock_price", "success": true, "observation": "Stock price data: {\"price\": 115000, \"volume\": 1200000}"}
-               ]
-               **Output**:
-               ```json
-               {
-                 "decision": "end",
-                 "reason": "Dữ liệu giá cổ phiếu FPT đã được cung cấp đầy đủ từ công cụ stock_price.",
-                 "updated_plan": ""
-               }
-               ```
-
-            2. **Truy vấn**: "Phân tích cổ phiếu FPT"
-               **Intermediate Results**: [
-                 {"tool_name": "stock_price", "success": true, "observation": "Stock price data: {\"price\": 115000}"},
-                 {"tool_name": "rag_knowledge", "success": false, "observation": "Tool rag_knowledge failed: No relevant documents found"}
-               ]
-               **Output**:
-               ```json
-               {
-                 "decision": "retry",
-                 "reason": "Dữ liệu giá cổ phiếu đã có, nhưng công cụ rag_knowledge thất bại, cần thử lại để lấy chỉ số tài chính.",
-                 "updated_plan": "Retry rag_knowledge with a more specific query or use tavily_search for financial data."
-               }
-               ```
-
-            3. **Truy vấn**: "Phân tích cổ phiếu FPT"
-               **Intermediate Results**: [
-                 {"tool_name": "stock_price", "success": true, "observation": "Stock price data: {\"price\": 115000}"}
-               ]
-               **Output**:
-               ```json
-               {
-                 "decision": "continue",
-                 "reason": "Dữ liệu giá cổ phiếu đã có, nhưng cần thêm chỉ số tài chính và tin tức để phân tích đầy đủ.",
-                 "updated_plan": "Use rag_knowledge for financial metrics and tavily_search for recent news."
-               }
-               ```
-
-            ### DỮ LIỆU ĐẦU VÀO
-            - **Câu hỏi gốc**: $query
-            - **Kết quả trung gian**: $intermediate_results
+                return {
+                    "reflection_decision": "end",
+                    "reflection_notes": [
+                        *state.reflection_notes,
+                        "Skipped reflection due to existing final answer",
+                    ],
+                }
 
-            ### ĐỊNH DẠNG ĐẦU RA
-            ```json
-            {
-              "decision": "continue|retry|end",
-              "reason": "Lý do chi tiết cho quyết định",
-              "updated_plan": "Kế hoạch cập nhật nếu cần tiếp tục hoặc thử lại"
-            }
-            ```
-            """
+            # Một tool single-shot thành công và có dữ liệu ở bước đầu
+            # -> kết thúc luôn; kết quả rỗng vẫn qua reflection để thử lại
+            last_result = (
+                state.intermediate_results[-1]
+                if state.intermediate_results
+                else None
+            )
+            if (
+                last_result
+                and len(state.intermediate_results) == 1
+                and last_result.get("success")
+                and last_result.get("has_payload")
+                and last_result.get("tool_name") in _SINGLE_SHOT_TOOLS
+                and state.current_step <= 1
+            ):
+                logger.info(
+                    f"Single-shot tool {last_result['tool_name']} succeeded, "
+                    "skipping LLM reflection"
+                )
+                return {
+                    "reflection_decision": "end",
+                    "reflection_notes": [
+                        *state.reflection_notes,
+                        f"Skipped reflection: {last_result['tool_name']} "
+                        "returned a complete result",
+                    ],
+                }
 
             # Prepare query and intermediate results for LLM
             query = state.messages[0].content if state.messages else ""
-            intermediate_results_str = json.dumps(
-                state.intermediate_results, ensure_ascii=False
+            intermediate_results_str = _prompt_observations(
+                state.intermediate_results
             )
 
             # Format the prompt with query and results
-            formatted_prompt = reflection_prompt.replace(
-                "$query", query
-            ).replace("$intermediate_results", intermediate_results_str)
-
-            # Call LLM for evaluation
-            messages = [HumanMessage(content=formatted_prompt)]
-
-            llm_response = await self.agent.chat_provider.chat(
-                messages=messages
+            formatted_prompt = _REFLECTION_TEMPLATE.substitute(
+                query=query, intermediate_results=intermediate_results_str
             )
 
-            llm_response_content = (
-                llm_response["response"]
-                if isinstance(llm_response, dict)
-                else llm_response
-            )
+            # Tool cuối thành công -> nhiều khả năng "end": tổng hợp câu trả lời
+            # song song với reflection thay vì chờ node final_output
+            if last_result and last_result.get("success"):
+                synthesis_task = asyncio.create_task(
+                    self._generate_final_answer(state)
+                )
+
+            # Call LLM for evaluation
+            llm_response_content = await self._chat(formatted_prompt)
+            # Giải phóng prompt lớn trước khi chờ synthesis speculative
+            del formatted_prompt, intermediate_results_str
 
             # Clean the LLM response to remove markdown or extra characters
             llm_response_content = llm_response_content.strip()
 
             # Remove ```json and ``` markers if present
-            llm_response_content = re.sub(
-                r"^```json\s*|\s*```$",
-                "",
-                llm_response_content,
-                flags=re.MULTILINE,
-            )
-
-            # Remove extra whitespace and newlines
-            llm_response_content = " ".join(llm_response_content.split())
+            for prefix in _JSON_FENCE_PREFIXES:
+                if llm_response_content.startswith(prefix):
+                    llm_response_content = llm_response_content[
+                        len(prefix) :
+                    ].lstrip()
+                    break
+            if llm_response_content.endswith("```"):
+                llm_response_content = llm_response_content[:-3].rstrip()
 
             # Parse LLM response
             try:
-                evaluation = json.loads(llm_response_content)
+                evaluation = orjson.loads(llm_response_content)
                 if not all(
                     key in evaluation
                     for key in ["decision", "reason", "updated_plan"]
@@ -363,7 +526,7 @@ class ReActWorkflow:
                     raise ValueError(
                         f"Invalid decision: {evaluation['decision']}"
                     )
-            except (json.JSONDecodeError, ValueError) as e:
+            except ValueError as e:
                 logger.error(
                     f"Failed to parse LLM evaluation response: {str(e)}"
                 )
@@ -375,80 +538,85 @@ class ReActWorkflow:
 
             # Update state based on LLM evaluation
             reflection_note = f"LLM Evaluation: {evaluation['reason']}"
-            updated_state.reflection_notes.append(reflection_note)
-            updated_state.reflection_decision = evaluation["decision"]
+            update: Dict[str, Any] = {
+                "reflection_notes": [*state.reflection_notes, reflection_note],
+                "reflection_decision": evaluation["decision"],
+            }
 
             if evaluation["decision"] == "retry":
-                updated_state.plan = (
+                update["plan"] = (
                     evaluation["updated_plan"]
                     or f"Retry with alternative approach: {state.plan}"
                 )
-                updated_state.sub_goals.append(
-                    f"Resolve issue based on LLM evaluation: {evaluation['reason']}"
-                )
+                update["sub_goals"] = [
+                    *state.sub_goals,
+                    f"Resolve issue based on LLM evaluation: {evaluation['reason']}",
+                ]
             elif evaluation["decision"] == "continue":
-                updated_state.plan = evaluation["updated_plan"] or state.plan
-                updated_state.sub_goals.append(
-                    "Continue collecting data based on LLM evaluation"
-                )
+                update["plan"] = evaluation["updated_plan"] or state.plan
+                update["sub_goals"] = [
+                    *state.sub_goals,
+                    "Continue collecting data based on LLM evaluation",
+                ]
 
-            logger.info(
-                f"Reflection decision: {updated_state.reflection_decision}, Note: {reflection_note}"
-            )
-            return updated_state
+            if synthesis_task is not None and (
+                evaluation["decision"] == "end"
+                or state.current_step >= state.max_steps
+            ):
+                # Workflow sẽ kết thúc: dùng câu trả lời đã tổng hợp song song
+                update["final_answer"] = await synthesis_task
+
+            if logger.isEnabledFor(logging.INFO):
+                logger.info(
+                    f"Reflection decision: {update['reflection_decision']}, Note: {reflection_note}"
+                )
+            return update
 
         except Exception as e:
             logger.error(f"Error in reflection node: {str(e)}", exc_info=True)
-            updated_state = state.model_copy()
-            updated_state.messages.append(
-                AIMessage(content=f"Error in reflection: {str(e)}")
-            )
-            updated_state.current_step += 1
-            updated_state.final_answer = f"Error: {str(e)}"
-            updated_state.reflection_decision = "end"
-            updated_state.reflection_notes.append(
-                f"Error during reflection: {str(e)}"
-            )
-            return updated_state
+            return {
+                "messages": [
+                    *state.messages,
+                    AIMessage(content=f"Error in reflection: {str(e)}"),
+                ],
+                "current_step": state.current_step + 1,
+                "final_answer": f"Error: {str(e)}",
+                "reflection_decision": "end",
+                "reflection_notes": [
+                    *state.reflection_notes,
+                    f"Error during reflection: {str(e)}",
+                ],
+            }
+
+        finally:
+            # Hủy tổng hợp speculative nếu workflow tiếp tục vòng lặp
+            if synthesis_task is not None and not synthesis_task.done():
+                synthesis_task.cancel()
 
     def _should_continue(self, state: AgentState) -> str:
         """Decision logic for workflow continuation."""
-        try:
+        decision = (
+            "end"
+            if state.final_answer or state.current_step >= state.max_steps
+            else _DECISION.get(state.reflection_decision, "continue")
+        )
+        if logger.isEnabledFor(logging.INFO):
             logger.info(
                 f"Workflow decision - Step: {state.current_step}/{state.max_steps}, "
                 f"Final answer: {'Yes' if state.final_answer else 'No'}, "
-                f"Reflection decision: {state.reflection_decision}"
+                f"Reflection decision: {state.reflection_decision} -> {decision}"
             )
-
-            if state.final_answer or state.current_step >= state.max_steps:
-                logger.info(
-                    "Workflow ending: Final answer or max steps reached"
-                )
-                return "end"
-
-            if state.reflection_decision == "retry":
-                logger.info("Workflow retrying due to reflection decision")
-                return "continue"
-
-            if state.reflection_decision == "end":
-                logger.info("Workflow ending due to reflection decision")
-                return "end"
-
-            logger.info("Workflow continuing...")
-            return "continue"
-
-        except Exception as e:
-            logger.error(f"Error in should_continue: {str(e)}", exc_info=True)
-            return "end"
+        return decision
 
     async def run(
         self, query: str, session_id: Optional[str] = None
     ) -> Dict[str, Any]:
         """Run the workflow for a given query with session support."""
-        start_time = time.time()
-        logger.info(
-            f"Starting workflow for query: '{query}...', session: {session_id or 'default'}"
-        )
+        start_ns = time.perf_counter_ns()
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(
+                f"Starting workflow for query: '{query}...', session: {session_id or 'default'}"
+            )
 
         try:
             initial_state = AgentState(
@@ -463,15 +631,16 @@ class ReActWorkflow:
                 reflection_decision="continue",
             )
 
-            result = await self.workflow.ainvoke(
-                initial_state,
-                config={
-                    "configurable": {"thread_id": session_id or "default"}
-                },
+            config = (
+                {"configurable": {"thread_id": session_id or "default"}}
+                if self.checkpointer is not None
+                else None
             )
-            final_state = AgentState(**result)
+            result = await self.workflow.ainvoke(initial_state, config=config)
+            # Các node đã trả về giá trị hợp lệ, bỏ qua validate lần nữa
+            final_state = AgentState.model_construct(**result)
 
-            workflow_time = time.time() - start_time
+            workflow_time = (time.perf_counter_ns() - start_ns) / 1e9
 
             final_result = {
                 "answer": final_state.final_answer
@@ -491,17 +660,18 @@ class ReActWorkflow:
                 },
             }
 
-            logger.info(
-                f"=== WORKFLOW END === "
-                f"Time: {workflow_time:.2f}s, "
-                f"Steps: {final_result['metadata']['steps']}, "
-                f"Tools used: {final_result['metadata']['tools_used']}, "
-                f"Intermediate results: {len(final_result['metadata']['intermediate_results'])}"
-            )
+            if logger.isEnabledFor(logging.INFO):
+                logger.info(
+                    f"=== WORKFLOW END === "
+                    f"Time: {workflow_time:.2f}s, "
+                    f"Steps: {final_result['metadata']['steps']}, "
+                    f"Tools used: {final_result['metadata']['tools_used']}, "
+                    f"Intermediate results: {len(final_result['metadata']['intermediate_results'])}"
+                )
             return final_result
 
         except Exception as e:
-            workflow_time = time.time() - start_time
+            workflow_time = (time.perf_counter_ns() - start_ns) / 1e9
             error_result = {
                 "answer": f"Xin lỗi, đã xảy ra lỗi hệ thống khi xử lý câu hỏi của bạn: {str(e)}",
                 "metadata": {
@@ -520,132 +690,63 @@ class ReActWorkflow:
             logger.error(f"Workflow failed: {str(e)}", exc_info=True)
             return error_result
 
-    async def _final_output_node(self, state: AgentState) -> AgentState:
+    async def _final_output_node(self, state: AgentState) -> Dict[str, Any]:
         """Final output node: Format and return final answer using LLM for synthesis."""
-        logger.info(
-            f"=== FINAL OUTPUT NODE START === Step: {state.current_step}"
-        )
-
-        try:
-            updated_state = state.model_copy()
-
-            if state.final_answer:
-                logger.info("Final answer already set, using it directly")
-                updated_state.messages.append(
-                    AIMessage(content=state.final_answer)
-                )
-                return updated_state
-
-            # Synthesize final answer using LLM
-            final_answer = await self._generate_final_answer(state)
-            updated_state.messages.append(AIMessage(content=final_answer))
-            updated_state.final_answer = final_answer
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(
+                f"=== FINAL OUTPUT NODE START === Step: {state.current_step}"
+            )
 
-            return updated_state
+        if state.final_answer:
+            logger.info("Final answer already set, using it directly")
+            return {
+                "messages": [
+                    *state.messages,
+                    AIMessage(content=state.final_answer),
+                ]
+            }
 
-        except Exception as e:
-            logger.error(
-                f"Error in final output node: {str(e)}", exc_info=True
-            )
-            updated_state = state.model_copy()
-            updated_state.messages.append(
-                AIMessage(content=f"Error in final output: {str(e)}")
-            )
-            updated_state.final_answer = f"Error: {str(e)}"
-            return updated_state
+        # Synthesize final answer using LLM
+        final_answer = await self._generate_final_answer(state)
+        return {
+            "messages": [*state.messages, AIMessage(content=final_answer)],
+            "final_answer": final_answer,
+        }
 
     async def _generate_final_answer(self, state: AgentState) -> str:
         """Generate final answer by synthesizing messages and intermediate results using LLM."""
         logger.info("Generating final answer using LLM synthesis")
 
         try:
-            # Prepare prompt for synthesizing final answer
-            synthesis_prompt = Template(
-                """
-            Bạn là một trợ lý thông minh. Nhiệm vụ của bạn là tổng hợp thông tin từ câu hỏi gốc, các kết quả trung gian từ công cụ, và lịch sử hội thoại để tạo ra một câu trả lời hoàn chỉnh, tự nhiên và dễ hiểu.
-
-            ### HƯỚNG DẪN
-            - Đọc câu hỏi gốc (`query`) và các kết quả trung gian (`intermediate_results`).
-            - Tổng hợp thông tin từ các kết quả trung gian để trả lời câu hỏi một cách chính xác và đầy đủ.
-            - Nếu dữ liệu không đủ hoặc không liên quan, đưa ra câu trả lời chung chung nhưng lịch sự, giải thích rằng thông tin hiện tại chưa đầy đủ.
-            - Câu trả lời phải:
-              - Tự nhiên, mạch lạc, và dễ hiểu.
-              - Trả lời trực tiếp câu hỏi của người dùng.
-              - Không sử dụng thuật ngữ kỹ thuật phức tạp trừ khi cần thiết.
-              - Viết bằng tiếng Việt, phù hợp với ngữ cảnh.
-
-            ### DỮ LIỆU ĐẦU VÀO
-            - **Câu hỏi gốc**: $query
-            - **Kết quả trung gian**: $intermediate_results
-            - **Lịch sử hội thoại**: $messages
-
-            ### ĐỊNH DẠNG ĐẦU RA
-            Một chuỗi văn bản chứa câu trả lời cuối cùng, không cần định dạng JSON.
-
-            ### VÍ DỤ
-            **Câu hỏi gốc**: "Cách thức hoạt động của thị trường chứng khoán là gì?"
-            **Kết quả trung gian**: [
-                {"tool_name": "rag_knowledge", "success": true, "observation": "Knowledge context: Thị trường chứng khoán là nơi các nhà đầu tư mua và bán cổ phiếu..."}
-            ]
-            **Lịch sử hội thoại**: [
-                {"role": "user", "content": "Cách thức hoạt động của thị trường chứng khoán là gì?"},
-                {"role": "assistant", "content": "Observation: Thị trường chứng khoán là nơi các nhà đầu tư mua và bán cổ phiếu..."}
-            ]
-            **Câu trả lời**:
-            Thị trường chứng khoán là nơi các nhà đầu tư mua và bán cổ phiếu của các công ty niêm yết. Hoạt động chính bao gồm phát hành cổ phiếu, giao dịch qua sàn chứng khoán, và định giá dựa trên cung cầu. Các nhà đầu tư có thể kiếm lợi nhuận từ chênh lệch giá hoặc cổ tức.
-
-            **Câu hỏi gốc**: "Giá cổ phiếu FPT hiện tại là bao nhiêu?"
-            **Kết quả trung gian**: [
-                {"tool_name": "stock_price", "success": true, "observation": "Stock price data: {\"price\": 115000, \"volume\": 1200000}"}
-            ]
-            **Câu trả lời**:
-            Giá cổ phiếu FPT hiện tại là 115.000 VND.
-
-            **Câu hỏi gốc**: "Cách thức hoạt động của thị trường chứng khoán là gì?"
-            **Kết quả trung gian**: []
-            **Câu trả lời**:
-            Tôi xin lỗi, hiện tại tôi không có đủ thông tin để trả lời chi tiết câu hỏi của bạn về cách thức hoạt động của thị trường chứng khoán. Tuy nhiên, thị trường chứng khoán nói chung là nơi các nhà đầu tư giao dịch cổ phiếu và các chứng khoán khác. Nếu bạn cần thêm thông tin chi tiết, vui lòng hỏi lại hoặc cung cấp thêm ngữ cảnh!
-            """
-            )
-
             query = state.messages[0].content if state.messages else ""
-            intermediate_results_str = json.dumps(
-                state.intermediate_results, ensure_ascii=False
-            )
-            messages_str = json.dumps(
-                [msg.dict() for msg in state.messages], ensure_ascii=False
+            intermediate_results_str = _prompt_observations(
+                state.intermediate_results
             )
+            messages_str = _prompt_messages(state.messages)
 
             if not query:
                 logger.warning("No query found, returning default answer")
                 return "Tôi không thể xử lý câu hỏi của bạn vì không có câu hỏi gốc. Vui lòng thử lại."
 
-            formatted_prompt = synthesis_prompt.substitute(
+            formatted_prompt = _SYNTHESIS_TEMPLATE.substitute(
                 query=query,
                 intermediate_results=intermediate_results_str,
                 messages=messages_str,
             )
 
-            logger.info(f"Synthesize prompt succeed.")
+            logger.info("Synthesize prompt succeed.")
             # logger.info(f"Synthesis prompt: {formatted_prompt}")
 
             # Call LLM to synthesize final answer
-            llm_response = await self.agent.chat_provider.chat(
-                messages=[HumanMessage(content=formatted_prompt)]
-            )
-            final_answer = (
-                llm_response["response"]
-                if isinstance(llm_response, dict)
-                else llm_response
-            )
+            final_answer = await self._chat(formatted_prompt)
+            del formatted_prompt, intermediate_results_str, messages_str
 
             # Clean the response to remove markdown or extra characters
             final_answer = final_answer.strip()
-            final_answer = re.sub(
-                r"^```.*?\n|\n```$", "", final_answer, flags=re.MULTILINE
-            )
+            final_answer = _CODE_FENCE_RE.sub("", final_answer)
 
-            logger.info(f"Synthesized final answer: {final_answer}")
+            if logger.isEnabledFor(logging.INFO):
+                logger.info(f"Synthesized final answer: {final_answer}")
 
             if not final_answer:
                 logger.warning("LLM returned empty response, using fallback")
@@ -657,6 +758,21 @@ class ReActWorkflow:
             logger.error(f"Error in generating final answer: {str(e)}")
             return "Tôi xin lỗi, đã xảy ra lỗi khi xử lý câu hỏi của bạn. Vui lòng thử lại sau."
 
+    async def _chat(self, formatted_prompt: str) -> str:
+        """
+        Send one prompt to the chat provider and return the response text.
+        Phản hồi được cache ở provider (LLMResponseCache, theo model và
+        tham số sinh), không cache thêm ở đây.
+        """
+        llm_response = await self.agent.chat_provider.chat(
+            messages=[HumanMessage(content=formatted_prompt)]
+        )
+        return (
+            llm_response["response"]
+            if isinstance(llm_response, dict)
+            else llm_response
+        )
+
     async def _execute_tool_safely(
         self, tool_name: str, tool_input: str
     ) -> Dict[str, Any]:
@@ -671,34 +787,47 @@ class ReActWorkflow:
                 "tool_name": str(tool_name),
                 "input": tool_input,
             }
+        cache_key = None
+        cache = (
+            self._quote_cache
+            if tool_name in _QUOTE_TOOLS
+            else self._tool_cache
+        )
+        if tool_name in _CACHEABLE_TOOLS:
+            cache_key = sha256(f"{tool_name}\0{tool_input}".encode()).digest()
+            cached = cache.get(cache_key)
+            if cached is not None:
+                logger.info(f"Tool cache hit for {tool_name}")
+                return cached
+
         try:
-            tool = self.tools[tool_name]
-            input_model_class = self.TOOL_INPUT_MODELS.get(tool_name)
-            if not input_model_class:
+            dispatch = self._dispatch.get(tool_name)
+            if dispatch is None:
                 raise ValueError(
                     f"No input model defined for tool: {tool_name}"
                 )
+            validate_input, run_tool = dispatch
 
-            input_data = json.loads(tool_input)
-            input_model = input_model_class(**input_data)
+            # Parse + validate JSON trực tiếp trong pydantic-core
+            input_model = validate_input(tool_input)
 
-            result = await tool._arun(**input_model.dict())
-            logger.info(
-                f"Tool {tool_name} executed successfully: status={result.status}"
-            )
-            return result.model_dump()
+            # Input đã validate, tool không validate lại
+            result = await run_tool(input_model)
+            if logger.isEnabledFor(logging.INFO):
+                logger.info(
+                    f"Tool {tool_name} executed successfully: status={result.status}"
+                )
+            result_dict = result._asdict()
+            # Chỉ cache kết quả thành công và có dữ liệu; lỗi hoặc kết quả
+            # rỗng (lỗi bị nuốt) luôn được thử lại
+            if (
+                cache_key is not None
+                and result.status == "success"
+                and _has_payload(result.data)
+            ):
+                cache[cache_key] = result_dict
+            return result_dict
 
-        except json.JSONDecodeError as e:
-            logger.error(
-                f"Invalid JSON input for tool {tool_name}: {str(e)}",
-                exc_info=True,
-            )
-            return {
-                "error": f"Invalid JSON input: {str(e)}",
-                "status": "error",
-                "tool_name": tool_name,
-                "input": tool_input,
-            }
         except ValueError as e:
             logger.error(
                 f"Input validation failed for tool {tool_name}: {str(e)}",
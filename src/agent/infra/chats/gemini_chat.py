@@ -1,12 +1,18 @@
-from typing import Any, Dict, List
+from typing import Any, AsyncIterator, Dict, List, Optional
 
 from langchain_core.exceptions import LangChainException
 from langchain_core.messages import BaseMessage
 from langchain_google_genai import ChatGoogleGenerativeAI
 
+from ...domain.entities.network import NetworkConfig
 from ...domain.interfaces.chat_interface import BaseChat
+from ...shared.exceptions.domain_exceptions import (
+    ChatProviderError,
+    RetriableChatError,
+)
 from ...shared.logging.logger import Logger
 from ...shared.settings.settings import settings
+from ..utils.llm_cache import LLMResponseCache
 
 logger = Logger.get_logger(__name__)
 
@@ -16,7 +22,20 @@ class GeminiChat(BaseChat):
     Infrastructure-specific implementation of ChatProvider using LangChain's ChatGoogleGenerativeAI.
     """
 
-    def __init__(self):
+    # Cache phản hồi dùng chung giữa các instance của provider
+    _response_cache = LLMResponseCache(
+        maxsize=getattr(settings.llm, "cache_size", 1000),
+        ttl_seconds=getattr(settings.llm, "cache_ttl", 3600),
+    )
+
+    def __init__(self, config: Optional[NetworkConfig] = None):
+        super().__init__(
+            config
+            or NetworkConfig(
+                timeout_ms=settings.llm.gemini_timeout * 1000,
+                retries=settings.llm.gemini_max_retries,
+            )
+        )
         # Initialize the LangChain chat client
         self.client = ChatGoogleGenerativeAI(
             api_key=settings.app.gemini_api_key,
@@ -25,37 +44,101 @@ class GeminiChat(BaseChat):
             max_output_tokens=settings.llm.gemini_max_tokens,
             top_p=settings.llm.gemini_top_p,
             top_k=settings.llm.gemini_top_k,
-            timeout=settings.llm.gemini_timeout,
-            max_retries=settings.llm.gemini_max_retries,
+            timeout=self.network_config.timeout_seconds,
+            max_retries=self.network_config.retries,
             verbose=settings.llm.verbose,
         )
         self.streaming = getattr(settings.llm, "gemini_streaming", False)
         self.callbacks = getattr(settings.llm, "gemini_callbacks", [])
+        # Config runnable dựng một lần, dùng lại cho mọi lời gọi
+        self._run_config = {"callbacks": self.callbacks}
+        self.cache_enabled = getattr(
+            settings.llm, "enable_response_cache", True
+        )
+        # Tham số ảnh hưởng tới output, là một phần của cache key
+        self._cache_params = {
+            "model": settings.llm.gemini_model,
+            "temperature": settings.llm.gemini_temperature,
+            "max_tokens": settings.llm.gemini_max_tokens,
+            "top_p": settings.llm.gemini_top_p,
+            "top_k": settings.llm.gemini_top_k,
+        }
 
-    async def chat(self, messages: List[BaseMessage]) -> Dict[str, Any]:
+    async def chat(
+        self,
+        messages: List[BaseMessage],
+        *,
+        cacheable_prefix: Optional[List[BaseMessage]] = None,
+    ) -> Dict[str, Any]:
         """
         Sends a list of BaseMessages to Gemini via LangChain.
         """
+        cache_key = None
+        if self.cache_enabled:
+            cache_key = self._response_cache.make_key(
+                self._cache_params,
+                self._with_prefix(messages, cacheable_prefix),
+            )
+            cached = self._response_cache.get(cache_key)
+            if cached is not None:
+                logger.info("Gemini chat served from response cache")
+                return cached
+
         try:
             if self.streaming:
-                response_text = ""
-                for chunk in self.client.stream(
-                    messages, config={"callbacks": self.callbacks}
-                ):
-                    response_text += chunk.content
-                response_content = response_text
+                response_content = "".join(
+                    [
+                        chunk
+                        async for chunk in self.astream(
+                            messages, cacheable_prefix=cacheable_prefix
+                        )
+                    ]
+                )
             else:
                 response = await self.client.ainvoke(
-                    messages, config={"callbacks": self.callbacks}
+                    self._with_prefix(messages, cacheable_prefix),
+                    config=self._run_config,
                 )
                 response_content = response.content
-            return {
+            result = {
                 "response": response_content,
             }
+            if cache_key is not None:
+                self._response_cache.put(cache_key, result)
+            return result
 
+        except TimeoutError as e:
+            logger.warning(f"Gemini chat timed out: {str(e)}")
+            raise RetriableChatError("Gemini", e) from e
         except LangChainException as e:
             logger.error(f"Gemini chat failed: {str(e)}")
-            raise
+            raise ChatProviderError("Gemini", e) from e
         except Exception as e:
             logger.error(f"Unexpected error in Gemini chat: {str(e)}")
+            raise ChatProviderError("Gemini", e) from e
+
+    async def astream(
+        self,
+        messages: List[BaseMessage],
+        *,
+        cacheable_prefix: Optional[List[BaseMessage]] = None,
+    ) -> AsyncIterator[str]:
+        """
+        Streams response text chunks from Gemini as they are generated.
+        """
+        try:
+            async for chunk in self.client.astream(
+                self._with_prefix(messages, cacheable_prefix),
+                config=self._run_config,
+            ):
+                if chunk.content:
+                    yield chunk.content
+
+        except LangChainException as e:
+            logger.error(f"Gemini chat streaming failed: {str(e)}")
+            raise
+        except Exception as e:
+            logger.error(
+                f"Unexpected error in Gemini chat streaming: {str(e)}"
+            )
             raise
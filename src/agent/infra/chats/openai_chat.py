@@ -1,30 +1,85 @@
-from typing import Any, Dict, List
+import importlib.util
+from typing import Any, AsyncIterator, Dict, List, Optional
 
+import httpx
+import openai
 from langchain_core.exceptions import LangChainException
 from langchain_core.messages import BaseMessage
 from langchain_openai import ChatOpenAI
 
+from ...domain.entities.network import NetworkConfig
 from ...domain.interfaces.chat_interface import BaseChat
+from ...shared.exceptions.domain_exceptions import (
+    ChatProviderError,
+    RetriableChatError,
+)
 from ...shared.logging.logger import Logger
 from ...shared.settings.settings import settings
+from ..utils.llm_cache import LLMResponseCache
 
 logger = Logger.get_logger(__name__)
 
+# HTTP/2 chỉ bật khi đã cài gói h2 (pip install httpx[http2])
+_HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+# Lỗi tạm thời phía OpenAI, có thể thử lại ở bước sau
+_RETRIABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.InternalServerError,
+)
+
 
 class OpenAIChat(BaseChat):
     """
     Infrastructure-specific implementation of ChatProvider using LangChain's ChatOpenAI.
     """
 
-    def __init__(self):
+    # Cache phản hồi dùng chung giữa các instance của provider
+    _response_cache = LLMResponseCache(
+        maxsize=getattr(settings.llm, "cache_size", 1000),
+        ttl_seconds=getattr(settings.llm, "cache_ttl", 3600),
+    )
+
+    def __init__(self, config: Optional[NetworkConfig] = None):
+        super().__init__(
+            config
+            or NetworkConfig(
+                timeout_ms=settings.llm.openai_timeout * 1000,
+                retries=settings.llm.openai_max_retries,
+            )
+        )
+        # Shared pooled HTTP client, reused across calls (no TLS handshake per request)
+        self._client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=self.network_config.pool_max,
+                max_keepalive_connections=(
+                    self.network_config.pool_max
+                    if self.network_config.keepalive
+                    else 0
+                ),
+            ),
+            http2=_HTTP2_AVAILABLE,
+            timeout=self.network_config.timeout_seconds,
+        )
+        # prompt_cache_key gom các request cùng system prompt vào một nhóm
+        # cache prefix phía OpenAI, tăng tỉ lệ hit prompt cache
+        cache_namespace = getattr(settings.llm, "openai_cache_namespace", None)
         # Initialize the LangChain chat client
         self.client = ChatOpenAI(
             api_key=settings.app.openai_api_key,
             model=settings.llm.openai_model,
             temperature=settings.llm.openai_temperature,
             max_tokens=settings.llm.openai_max_tokens,
-            timeout=settings.llm.openai_timeout,
-            max_retries=settings.llm.openai_max_retries,
+            timeout=self.network_config.timeout_seconds,
+            max_retries=self.network_config.retries,
+            http_async_client=self._client,
+            extra_body=(
+                {"prompt_cache_key": cache_namespace}
+                if cache_namespace
+                else None
+            ),
             verbose=settings.llm.verbose,
             model_kwargs={
                 "top_p": settings.llm.openai_top_p,
@@ -34,23 +89,62 @@ class OpenAIChat(BaseChat):
         )
         self.streaming = getattr(settings.llm, "openai_streaming", False)
         self.callbacks = getattr(settings.llm, "openai_callbacks", [])
+        # Config runnable dựng một lần, dùng lại cho mọi lời gọi
+        self._run_config = {"callbacks": self.callbacks}
+        self.cache_enabled = getattr(
+            settings.llm, "enable_response_cache", True
+        )
+        # Tham số ảnh hưởng tới output, là một phần của cache key
+        self._cache_params = {
+            "model": settings.llm.openai_model,
+            "temperature": settings.llm.openai_temperature,
+            "max_tokens": settings.llm.openai_max_tokens,
+            "top_p": settings.llm.openai_top_p,
+            "frequency_penalty": settings.llm.openai_frequency_penalty,
+            "presence_penalty": settings.llm.openai_presence_penalty,
+        }
+
+    async def aclose(self) -> None:
+        """
+        Closes the pooled HTTP client shared by all OpenAI requests.
+        """
+        await self._client.aclose()
 
-    async def chat(self, messages: List[BaseMessage]) -> Dict[str, Any]:
+    async def chat(
+        self,
+        messages: List[BaseMessage],
+        *,
+        cacheable_prefix: Optional[List[BaseMessage]] = None,
+    ) -> Dict[str, Any]:
         """
         Sends a list of BaseMessages to OpenAI via LangChain.
         """
+        cache_key = None
+        if self.cache_enabled:
+            cache_key = self._response_cache.make_key(
+                self._cache_params,
+                self._with_prefix(messages, cacheable_prefix),
+            )
+            cached = self._response_cache.get(cache_key)
+            if cached is not None:
+                logger.info("OpenAI chat served from response cache")
+                return cached
+
         try:
             if self.streaming:
-                response_text = ""
-                for chunk in self.client.stream(
-                    messages, config={"callbacks": self.callbacks}
-                ):
-                    response_text += chunk.content
-                response_content = response_text
+                response_content = "".join(
+                    [
+                        chunk
+                        async for chunk in self.astream(
+                            messages, cacheable_prefix=cacheable_prefix
+                        )
+                    ]
+                )
                 usage = {}
             else:
                 response = await self.client.ainvoke(
-                    messages, config={"callbacks": self.callbacks}
+                    self._with_prefix(messages, cacheable_prefix),
+                    config=self._run_config,
                 )
                 response_content = response.content
                 usage = response.response_metadata.get(
@@ -62,7 +156,7 @@ class OpenAIChat(BaseChat):
                     },
                 )
 
-            return {
+            result = {
                 "response": response_content,
                 "model": settings.llm.openai_model,
                 "usage": {
@@ -71,10 +165,42 @@ class OpenAIChat(BaseChat):
                     "total_tokens": usage.get("total_tokens", 0),
                 },
             }
+            if cache_key is not None:
+                self._response_cache.put(cache_key, result)
+            return result
 
+        except _RETRIABLE_ERRORS as e:
+            logger.warning(f"OpenAI chat failed transiently: {str(e)}")
+            raise RetriableChatError("OpenAI", e) from e
         except LangChainException as e:
             logger.error(f"OpenAI chat failed: {str(e)}")
-            return {}
+            raise ChatProviderError("OpenAI", e) from e
         except Exception as e:
             logger.error(f"Unexpected error in OpenAI chat: {str(e)}")
-            return {}
+            raise ChatProviderError("OpenAI", e) from e
+
+    async def astream(
+        self,
+        messages: List[BaseMessage],
+        *,
+        cacheable_prefix: Optional[List[BaseMessage]] = None,
+    ) -> AsyncIterator[str]:
+        """
+        Streams response text chunks from OpenAI as they are generated.
+        """
+        try:
+            async for chunk in self.client.astream(
+                self._with_prefix(messages, cacheable_prefix),
+                config=self._run_config,
+            ):
+                if chunk.content:
+                    yield chunk.content
+
+        except LangChainException as e:
+            logger.error(f"OpenAI chat streaming failed: {str(e)}")
+            raise
+        except Exception as e:
+            logger.error(
+                f"Unexpected error in OpenAI chat streaming: {str(e)}"
+            )
+            raise
@@ -1,17 +1,18 @@
 import asyncio
+import hashlib
+import re
+from contextlib import AsyncExitStack, asynccontextmanager
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
-import boto3
+import aioboto3
+from botocore.exceptions import ClientError
 from langchain.text_splitter import (
     RecursiveCharacterTextSplitter,
     TokenTextSplitter,
 )
 from langchain_aws import BedrockEmbeddings
-from langchain_community.document_loaders import (
-    S3DirectoryLoader,
-    S3FileLoader,
-)
+from langchain_community.document_loaders import S3FileLoader
 from langchain_experimental.text_splitter import SemanticChunker
 
 from ...domain.entities.document import DocumentChunk, DocumentMetadata
@@ -19,25 +20,83 @@ from ...domain.interfaces.document_loader_interface import BaseDocumentLoader
 from ...shared.exceptions.domain_exceptions import DocumentProcessingError
 from ...shared.logging.logger import Logger
 from ...shared.settings.settings import settings
+from ..utils.aws_clients import AIO_BOTO_CONFIG, get_bedrock_runtime_client
 
 logger = Logger.get_logger(__name__)
 
+# Số ký tự (code point) tối đa lưu cho mỗi chunk
+_CONTENT_MAX = 2047
+
+# Regex làm sạch văn bản gộp thành một lần quét: dòng trống, cụm space/tab,
+# ký tự lặp lại > 20 lần (thứ tự alternation giữ ưu tiên như trước)
+_RE_CLEAN = re.compile(r"\n\s*\n|[ \t]+|(.)\1{20,}")
+
+
+def _clean_replacement(match: re.Match) -> str:
+    """Pick the replacement for whichever cleaning alternative matched."""
+    if match.group(1) is not None:
+        return ""
+    text = match.group(0)
+    if text[0] == "\n":
+        return "\n\n"
+    # Bản nhiều pass: mỗi cụm space hoặc tab thành một space, rồi > 20 space
+    # liền nhau bị xóa như ký tự lặp -> đếm số cụm xen kẽ space/tab
+    runs = 1 + sum(a != b for a, b in zip(text, text[1:]))
+    return " " * runs if runs <= 20 else ""
+
 
 class S3DocumentLoader(BaseDocumentLoader):
-    """Load and process documents from S3 with advanced chunking strategies using LangChain."""
+    """
+    Load and process documents from S3 with advanced chunking strategies using LangChain.
+
+    Use as ``async with S3DocumentLoader() as loader`` to keep one S3 client
+    (and its connection pool) open for all operations; outside the context
+    each operation opens a short-lived client.
+    """
 
     def __init__(self):
         self.bucket_name = settings.s3.bucket_name
         self.documents_prefix = settings.s3.documents_prefix
         self.supported_extensions = {".pdf", ".docx", ".txt", ".doc"}
-        self.s3_client = boto3.client(
-            "s3",
+        # Session aioboto3: các lời gọi S3 chạy async, không chiếm threadpool
+        self.s3_session = aioboto3.Session(
             aws_access_key_id=settings.s3.aws_access_key_id,
             aws_secret_access_key=settings.s3.aws_secret_access_key,
             region_name=settings.s3.aws_region,
         )
+        self._s3_client: Optional[Any] = None
+        self._exit_stack: Optional[AsyncExitStack] = None
         self.timeout_seconds = getattr(settings.s3, "timeout_seconds", 10)
+        self.concurrency = getattr(settings.s3, "max_concurrency", 8)
         self.chunk_strategies = self._initialize_chunk_strategies()
+        # Tài liệu trùng nội dung (file copy trong bucket) đang chunk đồng thời
+        # chỉ chunk một lần; task bị xóa khi xong để không giữ chunk trong bộ nhớ
+        self._split_tasks: Dict[bytes, asyncio.Task] = {}
+
+    async def __aenter__(self) -> "S3DocumentLoader":
+        self._exit_stack = AsyncExitStack()
+        self._s3_client = await self._exit_stack.enter_async_context(
+            self.s3_session.client("s3", config=AIO_BOTO_CONFIG)
+        )
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        exit_stack, self._exit_stack = self._exit_stack, None
+        self._s3_client = None
+        if exit_stack is not None:
+            await exit_stack.aclose()
+
+    @asynccontextmanager
+    async def _client(self) -> AsyncIterator[Any]:
+        """Yield the shared S3 client, or a short-lived one outside the context."""
+
+        if self._s3_client is not None:
+            yield self._s3_client
+            return
+        async with self.s3_session.client(
+            "s3", config=AIO_BOTO_CONFIG
+        ) as s3_client:
+            yield s3_client
 
     def _initialize_chunk_strategies(self) -> Dict[str, Any]:
         """Initialize chunking strategies using LangChain."""
@@ -69,6 +128,11 @@ class S3DocumentLoader(BaseDocumentLoader):
                 aws_access_key_id=settings.s3.aws_access_key_id,
                 aws_secret_access_key=settings.s3.aws_secret_access_key,
                 model_kwargs={"input_type": "search_document"},
+                client=get_bedrock_runtime_client(
+                    settings.s3.aws_region,
+                    settings.s3.aws_access_key_id,
+                    settings.s3.aws_secret_access_key,
+                ),
             )
             strategies["semantic"] = SemanticChunker(
                 embeddings,
@@ -120,26 +184,56 @@ class S3DocumentLoader(BaseDocumentLoader):
             for doc in documents:
                 doc.page_content = self._clean_text(doc.page_content)
 
-            # Apply all chunking strategies
+            # Dùng lại kết quả chunking nếu đã gặp nội dung giống hệt
+            content_hash = hashlib.blake2b(
+                "\0".join(doc.page_content for doc in documents).encode(),
+                digest_size=16,
+            ).digest()
+            split_task = self._split_tasks.get(content_hash)
+            if split_task is None:
+                split_task = asyncio.create_task(
+                    self._split_documents(documents)
+                )
+                self._split_tasks[content_hash] = split_task
+                split_task.add_done_callback(
+                    lambda _: self._split_tasks.pop(content_hash, None)
+                )
+            else:
+                logger.info(
+                    f"Reusing chunks of identical content for {source}"
+                )
+            # shield: request đầu bị hủy không được hủy task dùng chung
+            strategy_results = await asyncio.shield(split_task)
+
+            # Metadata chỉ phụ thuộc vào source: tính một lần cho mọi chunk
+            title = self._extract_title_from_path(source)
+            document_type = self._extract_document_type_from_path(source)
+            base_tags = self._extract_tags_from_path(source)
+
             result = []
-            # --- Trong load_and_chunk_document ---
-            for strategy_name, strategy in self.chunk_strategies.items():
+            for strategy_name, chunks in strategy_results:
                 try:
-                    chunks = strategy.split_documents(documents)
+                    if isinstance(chunks, BaseException):
+                        raise chunks
                     for i, chunk in enumerate(chunks):
 
-                        # Tính toán start và end char
+                        # Chỉ cắt khi vượt giới hạn (đa số chunk ngắn hơn)
+                        content = chunk.page_content
+                        if len(content) > _CONTENT_MAX:
+                            content = content[:_CONTENT_MAX]
+
+                        # Tính toán start và end char theo nội dung đã lưu
                         start_char = chunk.metadata.get("start_index", 0)
-                        end_char = start_char + len(chunk.page_content)
+                        end_char = start_char + len(content)
 
                         metadata = DocumentMetadata(
                             source=source,
-                            title=self._extract_title_from_path(source),
-                            document_type=self._extract_document_type_from_path(
-                                source
-                            ),
-                            tags=self._extract_tags_from_path(source)
-                            + [f"chunk_strategy:{strategy_name}"],
+                            title=title,
+                            document_type=document_type,
+                            tags=[
+                                *base_tags,
+                                f"chunk_strategy:{strategy_name}",
+                            ],
                             language="vi",
                             chunk_index=f"{source}_{strategy_name}_{i}",
                             start_char=start_char,
@@ -148,7 +242,7 @@ class S3DocumentLoader(BaseDocumentLoader):
 
                         result.append(
                             DocumentChunk(
-                                content=chunk.page_content[:2047],
+                                content=content,
                                 metadata=metadata,
                             )
                         )
@@ -177,89 +271,33 @@ class S3DocumentLoader(BaseDocumentLoader):
                 f"Failed to load and chunk document: {str(e)}"
             )
 
-    async def load_all_documents(self) -> List[DocumentChunk]:
+    async def _split_documents(
+        self, documents: List[Any]
+    ) -> List[Tuple[str, Any]]:
         """
-        Load and chunk all supported documents from S3 using all chunking strategies.
+        Apply all chunking strategies concurrently.
 
-        Returns:
-            List of DocumentChunk objects from all documents and chunking strategies.
+        Recursive/token run in the threadpool while semantic overlaps its
+        Bedrock I/O; a failed strategy yields its exception instead of chunks.
         """
-        try:
-            loader = S3DirectoryLoader(
-                bucket=self.bucket_name,
-                prefix=self.documents_prefix,
-                aws_access_key_id=settings.s3.aws_access_key_id,
-                aws_secret_access_key=settings.s3.aws_secret_access_key,
-                region_name=settings.s3.aws_region,
-                file_filter=lambda x: self._is_supported_document(x),
-            )
-            documents = await asyncio.to_thread(loader.load)
-
-            if not documents:
-                logger.warning(
-                    f"No documents found in S3 bucket {self.bucket_name} with prefix {self.documents_prefix}"
-                )
-                return []
-
-            # Clean text
-            for doc in documents:
-                doc.page_content = self._clean_text(doc.page_content)
-
-            # Apply all chunking strategies
-            result = []
-            # --- Trong load_all_documents ---
-            for strategy_name, strategy in self.chunk_strategies.items():
-                try:
-                    chunks = strategy.split_documents(documents)
-                    for i, chunk in enumerate(chunks):
-
-                        start_char = chunk.metadata.get("start_index", 0)
-                        end_char = start_char + len(chunk.page_content)
-
-                        source = chunk.metadata.get("source", "")
-                        metadata = DocumentMetadata(
-                            source=source,
-                            title=self._extract_title_from_path(source),
-                            document_type=self._extract_document_type_from_path(
-                                source
-                            ),
-                            tags=self._extract_tags_from_path(source)
-                            + [f"chunk_strategy:{strategy_name}"],
-                            language="vi",
-                            chunk_index=f"{source}_{strategy_name}_{i}",
-                            start_char=start_char,
-                            end_char=end_char,
-                        )
-
-                        result.append(
-                            DocumentChunk(
-                                content=chunk.page_content[:2047],
-                                metadata=metadata,
-                            )
-                        )
-
-                    logger.info(
-                        f"Applied {strategy_name} chunking strategy to all documents, produced {len(chunks)} chunks"
-                    )
-                except Exception as e:
-                    logger.warning(
-                        f"Failed to apply {strategy_name} chunking strategy to documents: {str(e)}"
-                    )
-                    continue
-
-            if not result:
-                logger.warning(
-                    f"No chunks produced for any documents with any strategy"
-                )
-                return []
+        chunk_lists = await asyncio.gather(
+            *(
+                asyncio.to_thread(strategy.split_documents, documents)
+                for strategy in self.chunk_strategies.values()
+            ),
+            return_exceptions=True,
+        )
+        return list(zip(self.chunk_strategies, chunk_lists))
 
-            return result
+    async def list_sources(self) -> List[str]:
+        """
+        List S3 keys of all supported documents under the documents prefix.
 
-        except Exception as e:
-            logger.error(f"Failed to load all documents: {str(e)}")
-            raise DocumentProcessingError(
-                f"Failed to load all documents: {str(e)}"
-            )
+        Returns:
+            List of S3 keys.
+        """
+        documents = await self.list_documents()
+        return [document["key"] for document in documents]
 
     async def list_documents(
         self, prefix: Optional[str] = None
@@ -279,44 +317,7 @@ class S3DocumentLoader(BaseDocumentLoader):
             if not effective_prefix.endswith("/"):
                 effective_prefix += "/"
 
-            # Initialize pagination
-            documents = []
-            continuation_token = None
-
-            while True:
-                # Prepare parameters for list_objects_v2
-                params = {
-                    "Bucket": self.bucket_name,
-                    "Prefix": effective_prefix,
-                }
-                if continuation_token:
-                    params["ContinuationToken"] = continuation_token
-
-                # List objects using boto3
-                response = await asyncio.to_thread(
-                    self.s3_client.list_objects_v2, **params
-                )
-
-                # Process objects
-                if "Contents" in response:
-                    for obj in response["Contents"]:
-                        key = obj["Key"]
-                        if self._is_supported_document(key):
-                            documents.append(
-                                {
-                                    "key": key,
-                                    "size": obj["Size"],
-                                    "last_modified": obj["LastModified"],
-                                    "content_type": key.split(".")[-1],
-                                    "etag": obj["ETag"].strip('"'),
-                                }
-                            )
-
-                # Check for pagination
-                if response.get("IsTruncated", False):
-                    continuation_token = response.get("NextContinuationToken")
-                else:
-                    break
+            documents = await self._list_supported_objects(effective_prefix)
 
             if not documents:
                 logger.info(
@@ -336,16 +337,35 @@ class S3DocumentLoader(BaseDocumentLoader):
                 f"Failed to list documents: {str(e)}"
             )
 
+    async def _list_supported_objects(
+        self, prefix: str
+    ) -> List[Dict[str, Any]]:
+        """Collect supported objects under a prefix using the S3 paginator."""
+
+        documents = []
+        async with self._client() as s3_client:
+            paginator = s3_client.get_paginator("list_objects_v2")
+            async for page in paginator.paginate(
+                Bucket=self.bucket_name, Prefix=prefix
+            ):
+                for obj in page.get("Contents", ()):
+                    key = obj["Key"]
+                    if self._is_supported_document(key):
+                        documents.append(
+                            {
+                                "key": key,
+                                "size": obj["Size"],
+                                "last_modified": obj["LastModified"],
+                                "content_type": key.split(".")[-1],
+                                "etag": obj["ETag"].strip('"'),
+                            }
+                        )
+        return documents
+
     def _clean_text(self, text: str) -> str:
         """Clean and normalize text."""
 
-        import re
-
-        text = re.sub(r"\n\s*\n", "\n\n", text)
-        text = re.sub(r" +", " ", text)
-        text = re.sub(r"\t+", " ", text)
-        text = re.sub(r"(.)\1{20,}", "", text)
-        return text.strip()
+        return _RE_CLEAN.sub(_clean_replacement, text).strip()
 
     def _extract_title_from_path(self, s3_key: str) -> str:
         """Extract a readable title from S3 key."""
@@ -381,9 +401,17 @@ class S3DocumentLoader(BaseDocumentLoader):
     async def get_document_info(self, s3_key: str) -> Dict[str, Any]:
         """Get information about a specific document."""
 
+        async with self._client() as s3_client:
+            return await self._document_info(s3_client, s3_key)
+
+    async def _document_info(
+        self, s3_client: Any, s3_key: str
+    ) -> Dict[str, Any]:
+        """Run head_object for one key on an open S3 client."""
+
         try:
-            response = await asyncio.to_thread(
-                self.s3_client.head_object, Bucket=self.bucket_name, Key=s3_key
+            response = await s3_client.head_object(
+                Bucket=self.bucket_name, Key=s3_key
             )
             return {
                 "key": s3_key,
@@ -398,15 +426,49 @@ class S3DocumentLoader(BaseDocumentLoader):
                 f"Failed to get document info: {str(e)}"
             )
 
+    async def head_many(self, s3_keys: List[str]) -> List[Dict[str, Any]]:
+        """
+        Get information about many documents concurrently.
+
+        Args:
+            s3_keys: S3 keys of the documents.
+
+        Returns:
+            Document info dictionaries, in the same order as ``s3_keys``.
+        """
+        semaphore = asyncio.Semaphore(
+            getattr(settings.s3, "max_head_concurrency", 32)
+        )
+
+        # Dùng chung một client (connection pool) cho mọi head_object
+        async with self._client() as s3_client:
+
+            async def head_one(s3_key: str) -> Dict[str, Any]:
+                async with semaphore:
+                    return await self._document_info(s3_client, s3_key)
+
+            return list(await asyncio.gather(*(head_one(k) for k in s3_keys)))
+
     async def check_document_exists(self, s3_key: str) -> bool:
         """Check if document exists in S3."""
 
         try:
-            await asyncio.to_thread(
-                self.s3_client.head_object, Bucket=self.bucket_name, Key=s3_key
-            )
+            async with self._client() as s3_client:
+                await s3_client.head_object(
+                    Bucket=self.bucket_name, Key=s3_key
+                )
             return True
-        except self.s3_client.exceptions.NoSuchKey:
+        except ClientError as e:
+            # head_object trả về 404 (không có body NoSuchKey) khi thiếu key
+            if e.response.get("Error", {}).get("Code") in (
+                "404",
+                "NoSuchKey",
+                "NotFound",
+            ):
+                return False
+            logger.error(
+                f"Error checking document existence {s3_key}: {str(e)}"
+            )
             return False
         except Exception as e:
             logger.error(
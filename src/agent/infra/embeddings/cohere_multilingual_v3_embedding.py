@@ -1,3 +1,5 @@
+import asyncio
+import itertools
 from typing import List, Optional
 
 from langchain_aws import BedrockEmbeddings
@@ -6,9 +8,18 @@ from langchain_core.exceptions import LangChainException
 from ...domain.interfaces.embedding_interface import BaseEmbeddings
 from ...shared.logging.logger import Logger
 from ...shared.settings.settings import settings
+from ..utils.aws_clients import get_bedrock_runtime_client
+from ..utils.embedding_cache import EmbeddingCache
 
 logger = Logger.get_logger(__name__)
 
+# Giới hạn ký tự ~2000 token của Cohere v3
+_MAX_CHARS = int(2000 * 1.5)
+# Chỉ cắt tại dấu câu nằm trong 20% cuối đoạn đã cắt
+_BREAK_MIN_POS = int(_MAX_CHARS * 0.8) + 1
+# Dấu phân tách theo thứ tự ưu tiên
+_SENTENCE_DELIMITERS = (". ", ".\n", "! ", "? ", "\n\n", "\n")
+
 
 class CohereV3Embedding(BaseEmbeddings):
     """AWS Bedrock Cohere v3 multilingual embeddings implementation using LangChain"""
@@ -34,6 +45,14 @@ class CohereV3Embedding(BaseEmbeddings):
             embedding_type or settings.embeddings.cohere_embedding_type
         )
         self.max_batch_size = settings.embeddings.cohere_max_batch_size
+        # Giới hạn số batch gửi Bedrock đồng thời để tránh bị throttle
+        self._batch_semaphore = asyncio.Semaphore(
+            getattr(settings.embeddings, "max_concurrent_batches", 4)
+        )
+        # Cache embedding theo hash nội dung, tránh gọi lại Bedrock cho chuỗi trùng
+        self._cache = EmbeddingCache(
+            getattr(settings.embeddings, "cache_size", 10000)
+        )
 
         try:
             # Initialize LangChain BedrockEmbeddings
@@ -44,6 +63,11 @@ class CohereV3Embedding(BaseEmbeddings):
                 aws_access_key_id=settings.s3.aws_access_key_id,
                 aws_secret_access_key=settings.s3.aws_secret_access_key,
                 model_kwargs={"input_type": self.input_type},
+                client=get_bedrock_runtime_client(
+                    settings.s3.aws_region,
+                    settings.s3.aws_access_key_id,
+                    settings.s3.aws_secret_access_key,
+                ),
             )
             logger.info(
                 f"Initialized Bedrock client with model: {self.model_id}"
@@ -57,10 +81,9 @@ class CohereV3Embedding(BaseEmbeddings):
 
         try:
             validated_text = self._validate_token_limit(text)
-            embeddings = await self.embeddings.aembed_query(validated_text)
-            if not embeddings:
-                raise ValueError("No embeddings returned from model")
-            return embeddings
+            return await self._cache.get_or_compute(
+                self._cache_namespace(), validated_text, self._embed_query
+            )
         except LangChainException as e:
             logger.error(f"Failed to generate embedding for text: {e}")
             raise
@@ -78,17 +101,10 @@ class CohereV3Embedding(BaseEmbeddings):
             validated_texts = [
                 self._validate_token_limit(text) for text in texts
             ]
-            max_batch_size = self.max_batch_size
-            all_embeddings = []
-
-            for i in range(0, len(validated_texts), max_batch_size):
-                batch_texts = validated_texts[i : i + max_batch_size]
-                batch_embeddings = await self.embeddings.aembed_documents(
-                    batch_texts
-                )
-                all_embeddings.extend(batch_embeddings)
-
-            return all_embeddings
+            # Chỉ embed các chuỗi chưa có trong cache, mỗi chuỗi trùng một lần
+            return await self._cache.get_or_compute_many(
+                self._cache_namespace(), validated_texts, self._embed_batches
+            )
         except LangChainException as e:
             logger.error(f"Failed to generate embeddings for documents: {e}")
             return []
@@ -135,15 +151,44 @@ class CohereV3Embedding(BaseEmbeddings):
             "max_input_length": 512_000,
         }
 
+    async def _embed_query(self, text: str) -> List[float]:
+        embeddings = await self.embeddings.aembed_query(text)
+        if not embeddings:
+            raise ValueError("No embeddings returned from model")
+        return embeddings
+
+    async def _embed_batches(self, texts: List[str]) -> List[List[float]]:
+        max_batch_size = self.max_batch_size
+
+        async def embed_batch(batch_texts: List[str]) -> List[List[float]]:
+            async with self._batch_semaphore:
+                return await self.embeddings.aembed_documents(batch_texts)
+
+        # Các batch chạy song song, gather giữ nguyên thứ tự đầu vào
+        batch_results = await asyncio.gather(
+            *(
+                embed_batch(texts[i : i + max_batch_size])
+                for i in range(0, len(texts), max_batch_size)
+            )
+        )
+        return list(itertools.chain.from_iterable(batch_results))
+
+    def _cache_namespace(self) -> str:
+        """Model and settings that change the embedding of a text"""
+
+        return EmbeddingCache.make_namespace(
+            self.model_id, self.input_type, self.embedding_type
+        )
+
     def _validate_token_limit(self, text: str) -> str:
         """Ensure text doesn't exceed Cohere token limit"""
 
-        max_chars = 2000 * 1.5
-        if len(text) <= max_chars:
+        if len(text) <= _MAX_CHARS:
             return text
-        truncated = text[: int(max_chars)]
-        for delimiter in [". ", ".\n", "! ", "? ", "\n\n", "\n"]:
-            last_pos = truncated.rfind(delimiter)
-            if last_pos > len(truncated) * 0.8:
+        truncated = text[:_MAX_CHARS]
+        for delimiter in _SENTENCE_DELIMITERS:
+            # rfind giới hạn trong cửa sổ 20% cuối thay vì quét cả chuỗi
+            last_pos = truncated.rfind(delimiter, _BREAK_MIN_POS)
+            if last_pos != -1:
                 return truncated[: last_pos + len(delimiter)]
         return truncated
@@ -1,3 +1,6 @@
+import asyncio
+import functools
+import itertools
 from typing import List, Optional
 
 from langchain_core.exceptions import LangChainException
@@ -6,10 +9,21 @@ from langchain_google_genai import GoogleGenerativeAIEmbeddings
 from ...domain.interfaces.embedding_interface import BaseEmbeddings
 from ...shared.logging.logger import Logger
 from ...shared.settings.settings import settings
+from ..utils.embedding_cache import EmbeddingCache
 
 logger = Logger.get_logger(__name__)
 
 
+@functools.lru_cache(maxsize=8)
+def _build_client(model: str, api_key: str) -> GoogleGenerativeAIEmbeddings:
+    """Return the process-wide Gemini embeddings client for this model/key."""
+    return GoogleGenerativeAIEmbeddings(
+        model=model,
+        google_api_key=api_key,
+        task_type="retrieval_document",
+    )
+
+
 class GeminiEmbedding(BaseEmbeddings):
     """Google Gemini embeddings implementation using LangChain"""
 
@@ -30,13 +44,20 @@ class GeminiEmbedding(BaseEmbeddings):
         self.api_key = api_key or settings.app.gemini_api_key
         self.timeout_seconds = 5
         self.expected_dimensions = 768
+        # Chuỗi rỗng/khoảng trắng trả về vector 0, không gọi API
+        self._zero_vector = [0.0] * self.expected_dimensions
+        # Giới hạn số batch gửi Gemini đồng thời để tránh bị rate limit
+        self._batch_semaphore = asyncio.Semaphore(
+            getattr(settings.embeddings, "max_concurrent_batches", 4)
+        )
+        # Cache embedding theo hash nội dung, tránh gọi lại API cho chuỗi trùng
+        self._cache = EmbeddingCache(
+            getattr(settings.embeddings, "cache_size", 10000)
+        )
 
         try:
-            self.embeddings = GoogleGenerativeAIEmbeddings(
-                model=self.model,
-                google_api_key=self.api_key,
-                task_type="retrieval_document",
-            )
+            # Dùng chung client (kết nối, xác thực) giữa các instance
+            self.embeddings = _build_client(self.model, self.api_key)
             logger.info(
                 f"Initialized Gemini embeddings with model: {self.model}"
             )
@@ -51,10 +72,9 @@ class GeminiEmbedding(BaseEmbeddings):
             logger.debug(
                 f"Generating embedding for single text of length: {len(text)}"
             )
-            embedding = await self.embeddings.aembed_query(text)
-            if not embedding:
-                raise ValueError("No embeddings returned from model")
-            return embedding
+            return await self._cache.get_or_compute(
+                self.model, text, self._embed_query, self._zero_vector
+            )
         except LangChainException as e:
             logger.error(f"Failed to generate embedding for text: {e}")
             raise
@@ -70,22 +90,9 @@ class GeminiEmbedding(BaseEmbeddings):
                 return []
 
             logger.debug(f"Generating embeddings for {len(texts)} documents")
-            max_batch_size = getattr(
-                settings.embeddings, "cohere_max_batch_size", 96
+            return await self._cache.get_or_compute_many(
+                self.model, texts, self._embed_batches, self._zero_vector
             )
-            all_embeddings = []
-
-            for i in range(0, len(texts), max_batch_size):
-                batch_texts = texts[i : i + max_batch_size]
-                batch_embeddings = await self.embeddings.aembed_documents(
-                    batch_texts
-                )
-                all_embeddings.extend(batch_embeddings)
-                logger.debug(
-                    f"Processed batch {i//max_batch_size + 1}, texts: {len(batch_texts)}"
-                )
-
-            return all_embeddings
         except LangChainException as e:
             logger.error(f"Failed to generate embeddings for documents: {e}")
             raise
@@ -93,6 +100,32 @@ class GeminiEmbedding(BaseEmbeddings):
             logger.error(f"Unexpected error in embedding documents: {e}")
             raise
 
+    async def _embed_query(self, text: str) -> List[float]:
+        embedding = await self.embeddings.aembed_query(text)
+        if not embedding:
+            raise ValueError("No embeddings returned from model")
+        return embedding
+
+    async def _embed_batches(self, texts: List[str]) -> List[List[float]]:
+        max_batch_size = getattr(
+            settings.embeddings, "cohere_max_batch_size", 96
+        )
+
+        async def embed_batch(batch_texts: List[str]) -> List[List[float]]:
+            async with self._batch_semaphore:
+                return await self.embeddings.aembed_documents(batch_texts)
+
+        # Các batch chạy song song, gather giữ nguyên thứ tự đầu vào
+        batch_results = await asyncio.gather(
+            *(
+                embed_batch(texts[i : i + max_batch_size])
+                for i in range(0, len(texts), max_batch_size)
+            )
+        )
+        logger.debug(f"Processed {len(batch_results)} batches")
+
+        return list(itertools.chain.from_iterable(batch_results))
+
     def get_model_info(self) -> dict:
         """Get information about the current model configuration"""
 
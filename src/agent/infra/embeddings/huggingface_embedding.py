@@ -2,7 +2,7 @@ import os
 
 os.environ["TOKENIZERS_PARALLELISM"] = "false"
 
-from typing import List
+from typing import List, Optional
 
 import torch
 from langchain_core.exceptions import LangChainException
@@ -10,6 +10,8 @@ from langchain_huggingface import HuggingFaceEmbeddings
 
 from ...domain.interfaces.embedding_interface import BaseEmbeddings
 from ...shared.logging.logger import Logger
+from ...shared.settings.settings import settings
+from ..utils.embedding_cache import EmbeddingCache
 
 logger = Logger.get_logger(__name__)
 
@@ -17,28 +19,103 @@ logger = Logger.get_logger(__name__)
 class HfEmbedding(BaseEmbeddings):
     """Local embeddings implementation using HuggingFaceEmbeddings"""
 
-    def __init__(self, model_name: str = "all-MiniLM-L6-v2"):
+    def __init__(
+        self,
+        model_name: str = "all-MiniLM-L6-v2",
+        batch_size: Optional[int] = None,
+    ):
         try:
             logger.info(f"Loading local embedding model: {model_name}")
             self.model_name = model_name
+            self.batch_size = batch_size or getattr(
+                settings.embeddings, "hf_batch_size", 64
+            )
             self.timeout_seconds = 10
             self.expected_dimension = 384
+            # Chuỗi rỗng/khoảng trắng trả về vector 0, không chạy model
+            self._zero_vector = [0.0] * self.expected_dimension
+            # Cache embedding theo hash nội dung, tránh encode lại chuỗi trùng
+            self._cache = EmbeddingCache(
+                getattr(settings.embeddings, "cache_size", 10000)
+            )
+            self.backend = getattr(settings.embeddings, "hf_backend", "torch")
             self.embeddings = HuggingFaceEmbeddings(
                 model_name=model_name,
-                model_kwargs={
-                    "device": "cuda" if torch.cuda.is_available() else "cpu"
-                },
+                model_kwargs=self._model_kwargs(),
+                encode_kwargs={"batch_size": self.batch_size},
             )
+            if getattr(settings.embeddings, "hf_compile", False):
+                self._compile_model()
         except Exception as e:
             logger.error(f"Failed to load model {model_name}: {e}")
             raise
 
+    def _model_kwargs(self) -> dict:
+        """Build SentenceTransformer kwargs for the configured backend/device"""
+
+        device = "cuda" if torch.cuda.is_available() else "cpu"
+        if self.backend == "onnx":
+            # ONNX Runtime: CPU dùng file ONNX đã lượng tử hóa INT8 (VNNI)
+            # xuất sẵn trên hub, GPU dùng CUDAExecutionProvider
+            onnx_kwargs = (
+                {"provider": "CUDAExecutionProvider"}
+                if device == "cuda"
+                else {
+                    "file_name": getattr(
+                        settings.embeddings,
+                        "hf_onnx_file",
+                        "onnx/model_qint8_avx512_vnni.onnx",
+                    )
+                }
+            )
+            return {
+                "device": device,
+                "backend": "onnx",
+                "model_kwargs": onnx_kwargs,
+            }
+
+        model_kwargs = {"device": device}
+        if device == "cuda":
+            # Trọng số nửa độ chính xác chạy trên tensor core; Ampere+ dùng
+            # bfloat16 (dải động như float32), GPU cũ hơn dùng float16
+            model_kwargs["model_kwargs"] = {
+                "torch_dtype": (
+                    torch.bfloat16
+                    if torch.cuda.is_bf16_supported()
+                    else torch.float16
+                )
+            }
+        return model_kwargs
+
+    def _compile_model(self) -> None:
+        """Wrap the transformer forward pass with torch.compile on CUDA"""
+
+        if self.backend != "torch" or not torch.cuda.is_available():
+            logger.info("Skipping torch.compile: needs torch backend on CUDA")
+            return
+        try:
+            # reduce-overhead dùng CUDA graphs, bỏ chi phí launch kernel từ
+            # Python; dynamic=True tránh compile lại với mỗi độ dài chuỗi
+            transformer = self.embeddings._client[0]
+            transformer.auto_model = torch.compile(
+                transformer.auto_model,
+                mode="reduce-overhead",
+                dynamic=True,
+            )
+        except Exception as e:
+            # Compile là tối ưu tùy chọn, lỗi thì chạy eager như cũ
+            logger.warning(f"torch.compile failed, running eagerly: {e}")
+
     async def embed_text(self, text: str) -> List[float]:
         """Generate embedding for single text"""
 
         try:
-            embedding = await self.embeddings.aembed_query(text)
-            return embedding
+            return await self._cache.get_or_compute(
+                self.model_name,
+                text,
+                self.embeddings.aembed_query,
+                self._zero_vector,
+            )
         except LangChainException as e:
             logger.error(f"Failed to generate embedding: {e}")
             raise
@@ -50,8 +127,12 @@ class HfEmbedding(BaseEmbeddings):
         """Generate embeddings for multiple texts"""
 
         try:
-            embeddings = await self.embeddings.aembed_documents(texts)
-            return embeddings
+            return await self._cache.get_or_compute_many(
+                self.model_name,
+                texts,
+                self.embeddings.aembed_documents,
+                self._zero_vector,
+            )
         except LangChainException as e:
             logger.error(f"Failed to generate embeddings: {e}")
             raise
@@ -1,5 +1,10 @@
-from typing import Any, Dict, List
+import asyncio
+import heapq
+import re
+import weakref
+from typing import Any, Dict, List, Optional, Tuple
 
+from ...domain.entities.network import NetworkConfig
 from ...domain.interfaces.rag_interface import BaseRag
 from ...domain.interfaces.vector_store_interface import BaseVectorStore
 from ...shared.logging.logger import Logger
@@ -7,20 +12,58 @@ from ...shared.settings.settings import settings
 
 logger = Logger.get_logger(__name__)
 
+try:
+    from rank_bm25 import BM25Okapi
+except ImportError:
+    BM25Okapi = None
+    logger.warning(
+        "rank_bm25 library is not installed, hybrid retrieval falls back to dense search. "
+        "Install it with: pip install rank-bm25"
+    )
+
+_TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def _tokenize(text: str) -> List[str]:
+    """Lowercase word tokenizer used for the BM25 index."""
+    return _TOKEN_PATTERN.findall(text.lower())
+
 
 class QdrantRag(BaseRag):
     """Infrastructure-specific implementation of RagProvider using QdrantVectorStore."""
 
-    def __init__(self, vector_store: BaseVectorStore):
+    # Chỉ mục BM25 dùng chung giữa các instance (QdrantRag được tạo theo từng request),
+    # khóa yếu theo vector store: {vector_store: (revision, bm25, documents)}
+    _sparse_indexes: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+    def __init__(
+        self,
+        vector_store: BaseVectorStore,
+        config: Optional[NetworkConfig] = None,
+    ):
+        super().__init__(
+            config
+            or NetworkConfig(
+                timeout_ms=getattr(settings.qdrant, "timeout_seconds", 5)
+                * 1000
+            )
+        )
         self.vector_store = vector_store
         self.max_results = getattr(settings.qdrant, "max_results", 5)
 
-    async def retrieve(self, query: str) -> List[Dict[str, Any]]:
+    async def retrieve(
+        self,
+        query: str,
+        top_k: Optional[int] = None,
+        min_score: Optional[float] = None,
+    ) -> List[Dict[str, Any]]:
         """
-        Retrieve similar documents using Qdrant vector store.
+        Retrieve similar documents using Qdrant's HNSW index.
 
         Args:
             query: The query string to search for.
+            top_k: Number of documents to return (max_results if None).
+            min_score: Minimum similarity score, filtered server-side.
 
         Returns:
             List of dictionaries containing document content and metadata.
@@ -28,7 +71,14 @@ class QdrantRag(BaseRag):
 
         try:
             # Use vector store's similarity search
-            results = await self.vector_store.similarity_search(query)
+            results = await asyncio.wait_for(
+                self.vector_store.similarity_search(
+                    query,
+                    k=top_k or self.max_results,
+                    score_threshold=min_score or None,
+                ),
+                timeout=self.network_config.timeout_seconds,
+            )
 
             logger.info(f"Retrieved {len(results)} documents for query")
 
@@ -37,3 +87,98 @@ class QdrantRag(BaseRag):
         except Exception as e:
             logger.error(f"RAG retrieval failed: {str(e)}")
             return []
+
+    async def retrieve_many(
+        self, queries: List[str], top_k: Optional[int] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Retrieve similar documents for several queries with one batched search.
+
+        Args:
+            queries: The query strings to search for.
+            top_k: Number of documents per query (max_results if None).
+
+        Returns:
+            One list of result dictionaries per query, in input order.
+        """
+
+        try:
+            results = await asyncio.wait_for(
+                self.vector_store.similarity_search_many(
+                    queries, k=top_k or self.max_results
+                ),
+                timeout=self.network_config.timeout_seconds,
+            )
+
+            logger.info(f"Retrieved documents for {len(queries)} queries")
+
+            return results
+
+        except Exception as e:
+            logger.error(f"Batched RAG retrieval failed: {str(e)}")
+            return [[] for _ in queries]
+
+    async def retrieve_sparse(
+        self, query: str, top_k: int
+    ) -> List[Dict[str, Any]]:
+        """
+        Retrieve documents with BM25 over the stored chunks, without embeddings.
+
+        Args:
+            query: The query string to search for.
+            top_k: Maximum number of documents to return.
+
+        Returns:
+            List of dictionaries containing document content, metadata and
+            BM25 score divided by the best score, so it lies in [0, 1].
+        """
+
+        try:
+            index = await self._get_sparse_index()
+            if index is None:
+                return []
+
+            bm25, documents = index
+            scores = bm25.get_scores(_tokenize(query))
+            ranked = heapq.nlargest(
+                top_k, range(len(documents)), key=scores.__getitem__
+            )
+            if not ranked or scores[ranked[0]] <= 0:
+                return []
+            # Chuẩn hóa về [0, 1] để so sánh được với điểm cosine
+            best = float(scores[ranked[0]])
+            results = [
+                {**documents[i], "score": float(scores[i]) / best}
+                for i in ranked
+                if scores[i] > 0
+            ]
+
+            logger.info(f"Retrieved {len(results)} documents from BM25 index")
+            return results
+
+        except Exception as e:
+            logger.error(f"BM25 retrieval failed: {str(e)}")
+            return []
+
+    async def _get_sparse_index(self) -> Optional[Tuple[Any, List[Dict]]]:
+        """Return the cached BM25 index, rebuilding it when the vector store changed."""
+
+        if BM25Okapi is None:
+            return None
+
+        key = self.vector_store
+        revision = getattr(self.vector_store, "revision", 0)
+        cached = self._sparse_indexes.get(key)
+        if cached and cached[0] == revision:
+            return cached[1], cached[2]
+
+        documents = await self.vector_store.scroll_documents()
+        if not documents:
+            return None
+
+        bm25 = await asyncio.to_thread(
+            BM25Okapi, [_tokenize(doc["content"]) for doc in documents]
+        )
+        self._sparse_indexes[key] = (revision, bm25, documents)
+        logger.info(f"Built BM25 index over {len(documents)} documents")
+        return bm25, documents
@@ -1,18 +1,68 @@
-from typing import Any, Dict, List
+import asyncio
+import operator
+from typing import Any, Dict, List, Optional
 
 from langchain_tavily import TavilySearch
 
+from ...domain.entities.network import NetworkConfig
 from ...domain.interfaces.search_interface import BaseWebSearch
 from ...shared.logging.logger import Logger
 from ...shared.settings.settings import settings
 
 logger = Logger.get_logger(__name__)
 
+# Các trường giữ lại từ mỗi kết quả Tavily và giá trị mặc định tương ứng
+_RESULT_KEYS = ("content", "title", "url", "score")
+_RESULT_DEFAULTS = ("", "", "", 0.0)
+_get_result_fields = operator.itemgetter(*_RESULT_KEYS)
+
+# Danh sách domain mặc định khi settings không cấu hình include_domains
+_DEFAULT_INCLUDE_DOMAINS = (
+    "vnexpress.net",
+    "tuoitre.vn",
+    "thanhnien.vn",
+    "dantri.com.vn",
+    "vietnamnet.vn",
+    "laodong.vn",
+    "nld.com.vn",
+    "cafef.vn",
+    "vneconomy.vn",
+    "vietstock.vn",
+    "ndh.vn",
+    "tinnhanhchungkhoan.vn",
+    "stockbiz.vn",
+    "cophieu68.vn",
+    "vietcombank.com.vn",
+    "sbv.gov.vn",
+    "tinhte.vn",
+    "voz.vn",
+    "webtretho.com",
+    "chinhphu.vn",
+    "mpi.gov.vn",
+    "gso.gov.vn",
+)
+
+
+def _format_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Keep the fields callers use; missing keys fall back to defaults."""
+    try:
+        values = _get_result_fields(result)
+    except KeyError:
+        values = map(result.get, _RESULT_KEYS, _RESULT_DEFAULTS)
+    return dict(zip(_RESULT_KEYS, values))
+
 
 class TavilyWebSearch(BaseWebSearch):
     """Infrastructure-specific implementation of WebSearchRetriever using LangChain TavilySearch."""
 
-    def __init__(self):
+    def __init__(self, config: Optional[NetworkConfig] = None):
+        super().__init__(
+            config
+            or NetworkConfig(
+                timeout_ms=getattr(settings.tavily, "timeout_seconds", 5)
+                * 1000
+            )
+        )
         try:
             self.client = TavilySearch(
                 tavily_api_key=settings.app.tavily_api_key,
@@ -20,39 +70,16 @@ class TavilyWebSearch(BaseWebSearch):
                 search_depth=getattr(
                     settings.tavily, "search_depth", "advanced"
                 ),
-                include_domains=getattr(
-                    settings.tavily,
-                    "include_domains",
-                    [
-                        "vnexpress.net",
-                        "tuoitre.vn",
-                        "thanhnien.vn",
-                        "dantri.com.vn",
-                        "vietnamnet.vn",
-                        "laodong.vn",
-                        "nld.com.vn",
-                        "cafef.vn",
-                        "vneconomy.vn",
-                        "vietstock.vn",
-                        "ndh.vn",
-                        "tinnhanhchungkhoan.vn",
-                        "stockbiz.vn",
-                        "cophieu68.vn",
-                        "vietcombank.com.vn",
-                        "sbv.gov.vn",
-                        "tinhte.vn",
-                        "voz.vn",
-                        "webtretho.com",
-                        "chinhphu.vn",
-                        "mpi.gov.vn",
-                        "gso.gov.vn",
-                    ],
+                include_domains=list(
+                    getattr(
+                        settings.tavily,
+                        "include_domains",
+                        _DEFAULT_INCLUDE_DOMAINS,
+                    )
                 ),
                 include_raw_content=True,
             )
-            self.timeout_seconds = getattr(
-                settings.tavily, "timeout_seconds", 5
-            )
+            self.timeout_seconds = self.network_config.timeout_seconds
             logger.info("Initialized TavilyWebSearch successfully")
         except Exception as e:
             logger.error(f"Failed to initialize TavilyWebSearch: {str(e)}")
@@ -70,7 +97,10 @@ class TavilyWebSearch(BaseWebSearch):
         """
         try:
             # Use LangChain TavilySearch
-            raw_results = await self.client.ainvoke(query)
+            # Bound tail latency on slow Tavily responses
+            raw_results = await asyncio.wait_for(
+                self.client.ainvoke(query), timeout=self.timeout_seconds
+            )
             # results: dict with the following keys:
             # query: content fetched into Tavily
             # follow_up_questions
@@ -84,15 +114,7 @@ class TavilyWebSearch(BaseWebSearch):
             results = raw_results.get("results", "")
 
             # Format results to match expected output
-            formatted_results = [
-                {
-                    "content": result.get("content", ""),
-                    "title": result.get("title", ""),
-                    "url": result.get("url", ""),
-                    "score": result.get("score", 0.0),
-                }
-                for result in results
-            ]
+            formatted_results = [_format_result(result) for result in results]
 
             logger.info(
                 f"Retrieved {len(formatted_results)} search results for query: {query}"
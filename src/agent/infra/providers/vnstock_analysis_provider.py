@@ -1,11 +1,15 @@
 import asyncio
 import functools
-from typing import Any, Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Sequence
 
 import pandas as pd
+from cachetools import TTLCache
 
 from ...domain.interfaces.stock_analysis_interface import BaseStockAnalysis
 from ...shared.logging.logger import Logger
+from ...shared.settings.settings import settings
+from ..utils.single_flight import SingleFlight
 
 logger = Logger.get_logger(__name__)
 
@@ -17,6 +21,30 @@ except ImportError:
     )
     raise ImportError("vnstock library is required")
 
+# Chỉ số vốn hóa được làm tròn xuống thành số nguyên không âm
+_MARKET_CAP = "Vốn hóa (tỷ)"
+
+# Tên chỉ số đầu ra -> các tên dòng có thể có trong financial_ratio,
+# theo thứ tự ưu tiên (danh sách rỗng: luôn trả về None)
+_RATIO_ALIASES: Dict[str, List[str]] = {
+    "pe": ["priceToEarning", "PE"],
+    "pb": ["priceToBook", "PB"],
+    "roe": ["roe", "returnOnEquity", "ROE"],
+    "eps": ["earningPerShare", "EPS"],
+    "market_cap": [],
+    "revenue": ["totalRevenue"],
+    "profit": ["netIncome"],
+    "debt_ratio": ["debtOnEquity", "equityOnLiability"],
+    "current_ratio": ["currentRatio"],
+    "quick_ratio": ["quickRatio"],
+    "gross_margin": ["grossMargin"],
+    "net_margin": ["postTaxOnToi", "netMargin"],
+    "roa": ["roa", "returnOnAssets", "ROA"],
+}
+_ALL_RATIO_ALIASES = [
+    alias for aliases in _RATIO_ALIASES.values() for alias in aliases
+]
+
 
 class VnStockAnalysis(BaseStockAnalysis):
     """Infrastructure-specific implementation of StockAnalysisProvider using vnstock library.
@@ -28,55 +56,73 @@ class VnStockAnalysis(BaseStockAnalysis):
     def __init__(self):
         """Initialize VnStock Analysis Provider."""
         self._initialized = False
+        # Giới hạn số request vnstock chạy song song khi lấy nhiều mã
+        self._semaphore = asyncio.Semaphore(
+            getattr(settings.vnstock, "max_concurrency", 5)
+        )
+        # Threadpool riêng: không tranh chấp default executor với embeddings
+        self._executor = ThreadPoolExecutor(
+            max_workers=getattr(settings.vnstock, "executor_workers", 16),
+            thread_name_prefix="vnstock-analysis",
+        )
+        # Cache kết quả các endpoint chỉ đọc; lời gọi trùng đồng thời gộp làm một
+        self._cache: TTLCache = TTLCache(
+            maxsize=getattr(settings.vnstock, "analysis_cache_size", 1024),
+            ttl=getattr(settings.vnstock, "analysis_cache_ttl", 3600),
+        )
+        self._inflight = SingleFlight()
+
+    def close(self) -> None:
+        """Shut down the dedicated vnstock thread pool."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
 
     async def get_fundamental_ratios(
-        self, symbols: List[str]
+        self, symbols: Sequence[str]
     ) -> Dict[str, Any]:
         """Get fundamental ratios for given symbols using vnstock."""
 
         try:
             logger.info(f"Fetching fundamental ratios for symbols: {symbols}")
-            results = {}
-            for symbol in symbols:
-                try:
-                    ratios_data = await self._run_sync_function(
-                        vns.financial_ratio,
-                        symbol=symbol,
-                        report_range="quarterly",
-                        is_all=False,
-                    )
-                    if ratios_data is not None and not ratios_data.empty:
-                        formatted_ratios = self._format_financial_ratios(
-                            ratios_data, symbol
-                        )
-                        results[symbol] = formatted_ratios
-                    else:
-                        logger.warning(
-                            f"No fundamental data found for symbol: {symbol}"
-                        )
-                        results[symbol] = self._create_empty_fundamental_data(
-                            symbol
-                        )
-                except Exception as e:
-                    logger.error(
-                        f"Failed to fetch fundamental ratios for {symbol}: {str(e)}"
-                    )
-                    results[symbol] = self._create_error_fundamental_data(
-                        symbol, str(e)
-                    )
-            return results
+            ratios = await asyncio.gather(
+                *(self._fetch_fundamental_ratios(s) for s in symbols)
+            )
+            return dict(zip(symbols, ratios))
         except Exception as e:
             logger.error(f"Fundamental ratios retrieval failed: {str(e)}")
             raise
 
-    async def get_peers_comparison(self, symbols: List[str]) -> Dict[str, Any]:
+    async def _fetch_fundamental_ratios(self, symbol: str) -> Dict[str, Any]:
+        """Fetch and format fundamental ratios for one symbol."""
+
+        try:
+            async with self._semaphore:
+                ratios_data = await self._run_cached(
+                    vns.financial_ratio,
+                    symbol=symbol,
+                    report_range="quarterly",
+                    is_all=False,
+                )
+            if ratios_data is not None and not ratios_data.empty:
+                return self._format_financial_ratios(ratios_data, symbol)
+
+            logger.warning(f"No fundamental data found for symbol: {symbol}")
+            return self._create_empty_fundamental_data()
+        except Exception as e:
+            logger.error(
+                f"Failed to fetch fundamental ratios for {symbol}: {str(e)}"
+            )
+            return self._create_error_fundamental_data(str(e))
+
+    async def get_peers_comparison(
+        self, symbols: Sequence[str]
+    ) -> Dict[str, Any]:
         """Get peer comparison and ranking for a list of symbols using vnstock.
         Trả về cả data (raw formatted data) và insights (công ty nào cao nhất cho mỗi chỉ số).
         """
         try:
             logger.info(f"Fetching peer comparison for symbols: {symbols}")
             symbol_string = ", ".join(symbols)
-            comparison_data = await self._run_sync_function(
+            comparison_data = await self._run_cached(
                 vns.stock_ls_analysis, symbol_string, lang="vi"
             )
 
@@ -87,22 +133,7 @@ class VnStockAnalysis(BaseStockAnalysis):
                 )
 
                 # Tạo insights
-                insights = []
-                indicators = [idx for idx in comparison_data.index]
-
-                for indicator in indicators:
-                    try:
-                        series = comparison_data.loc[indicator].dropna()
-                        if not series.empty:
-                            max_ticker = series.idxmax()
-                            max_value = series[max_ticker]
-                            insights.append(
-                                f"Chỉ số {indicator} cao nhất là: {round(max_value, 2) if isinstance(max_value, (int, float)) else max_value} với mã {max_ticker}"
-                            )
-                    except Exception as e:
-                        logger.warning(
-                            f"Lỗi khi tạo insight cho chỉ số {indicator}: {str(e)}"
-                        )
+                insights = self._max_insights(comparison_data)
 
                 return {"data": formatted_data, "insights": insights}
             else:
@@ -123,7 +154,7 @@ class VnStockAnalysis(BaseStockAnalysis):
         """
         try:
             logger.info(f"Fetching industry analysis for symbol: {symbol}")
-            industry_data = await self._run_sync_function(
+            industry_data = await self._run_cached(
                 vns.industry_analysis, symbol=symbol, lang="vi"
             )
 
@@ -132,28 +163,7 @@ class VnStockAnalysis(BaseStockAnalysis):
                 formatted_data = self._format_stock_ls_analysis(industry_data)
 
                 # Tạo insights
-                insights = []
-                # Lấy danh sách các chỉ số
-                indicators = [idx for idx in industry_data.index]
-
-                for indicator in indicators:
-                    try:
-                        # Lấy series của chỉ số
-                        series = industry_data.loc[indicator]
-
-                        # Bỏ NaN để tránh lỗi
-                        series = series.dropna()
-
-                        if not series.empty:
-                            max_ticker = series.idxmax()
-                            max_value = series[max_ticker]
-                            insights.append(
-                                f"Chỉ số {indicator} cao nhất là: {round(max_value, 2) if isinstance(max_value, (int, float)) else max_value} với mã {max_ticker}"
-                            )
-                    except Exception as e:
-                        logger.warning(
-                            f"Lỗi khi tạo insight cho chỉ số {indicator}: {str(e)}"
-                        )
+                insights = self._max_insights(industry_data)
 
                 return {"data": formatted_data, "insights": insights}
             else:
@@ -181,56 +191,28 @@ class VnStockAnalysis(BaseStockAnalysis):
                 if col not in ["ticker", "quarter", "year"]
             ]
 
-            # Khởi tạo dict kết quả cho mã chứng khoán
-            formatted_data = {}
-
-            # Lặp qua từng cột (quý-năm)
-            for column in quarter_columns:
-                quarter_data = {}
-                # Lấy dữ liệu của cột hiện tại, sử dụng index làm key
-                column_data = ratios_data[column].to_dict()
-                quarter_data["pe"] = self._safe_get_numeric(
-                    column_data, ["priceToEarning", "PE"]
-                )
-                quarter_data["pb"] = self._safe_get_numeric(
-                    column_data, ["priceToBook", "PB"]
-                )
-                quarter_data["roe"] = self._safe_get_numeric(
-                    column_data, ["roe", "returnOnEquity", "ROE"]
-                )
-                quarter_data["eps"] = self._safe_get_numeric(
-                    column_data, ["earningPerShare", "EPS"]
-                )
-                quarter_data["market_cap"] = None
-                quarter_data["revenue"] = self._safe_get_numeric(
-                    column_data, ["totalRevenue"]
-                )
-                quarter_data["profit"] = self._safe_get_numeric(
-                    column_data, ["netIncome"]
-                )
-                quarter_data["debt_ratio"] = self._safe_get_numeric(
-                    column_data, ["debtOnEquity", "equityOnLiability"]
-                )
-                quarter_data["current_ratio"] = self._safe_get_numeric(
-                    column_data, ["currentRatio"]
-                )
-                quarter_data["quick_ratio"] = self._safe_get_numeric(
-                    column_data, ["quickRatio"]
-                )
-                quarter_data["gross_margin"] = self._safe_get_numeric(
-                    column_data, ["grossMargin"]
-                )
-                quarter_data["net_margin"] = self._safe_get_numeric(
-                    column_data, ["postTaxOnToi", "netMargin"]
-                )
-                quarter_data["roa"] = self._safe_get_numeric(
-                    column_data, ["roa", "returnOnAssets", "ROA"]
-                )
-
-                # Thêm dữ liệu của quý-năm vào dict chính
-                formatted_data[column] = quarter_data
+            # Chỉ giữ các dòng chỉ số cần dùng, ép kiểu số một lần cho cả bảng
+            rows = ratios_data.loc[
+                ratios_data.index.isin(_ALL_RATIO_ALIASES), quarter_columns
+            ]
+            rows = rows[~rows.index.duplicated(keep="last")]
+            numeric = rows.apply(pd.to_numeric, errors="coerce").astype(float)
+
+            # Mỗi chỉ số: giá trị hợp lệ đầu tiên theo thứ tự alias, từng quý
+            columns = {}
+            for out_key, aliases in _RATIO_ALIASES.items():
+                present = [
+                    alias for alias in aliases if alias in numeric.index
+                ]
+                if present:
+                    columns[out_key] = numeric.loc[present].bfill().iloc[0]
+
+            formatted = pd.DataFrame(
+                columns, index=quarter_columns, columns=list(_RATIO_ALIASES)
+            )
+            formatted = formatted.astype(object).where(formatted.notna(), None)
 
-            return formatted_data
+            return formatted.to_dict("index")
         except Exception as e:
             logger.error(
                 f"Failed to format fundamental ratios for {symbol}: {str(e)}"
@@ -240,53 +222,71 @@ class VnStockAnalysis(BaseStockAnalysis):
     def _format_stock_ls_analysis(self, df: pd.DataFrame) -> Dict[str, Any]:
         """Formats the stock_ls_analysis DataFrame to a dict with ticker as key and indicators as values."""
 
-        # Lấy danh sách các chỉ số (index) từ 'Vốn hóa (tỷ)' trở đi
-        indicators = [
-            idx for idx in df.index
-        ]  # if idx in column_mapping.values()]
-
-        # Chuẩn bị dict kết quả
-        result = {}
-
-        # Lặp qua từng cột (mã chứng khoán)
-        for ticker in df.columns:
-            ticker_data = {}
-            for indicator in indicators:
-                value = df.loc[indicator, ticker]
-                if pd.notna(value):
-                    if indicator == "Vốn hóa (tỷ)":
-                        ticker_data[indicator] = (
-                            int((value / 1)) if value > 0 else 0
-                        )
-                    elif isinstance(value, (int, float)):
-                        ticker_data[indicator] = round(value, 2)
-                    else:
-                        ticker_data[indicator] = value
-            result[ticker] = ticker_data
-
-        return result
-
-    def _safe_get_numeric(
-        self, data: Dict[str, Any], keys: List[str]
-    ) -> Optional[float]:
-        """Safely get numeric value from data using multiple possible keys."""
-
-        for key in keys:
-            if key in data:
-                value = data[key]
-                if pd.notna(value):
-                    try:
-                        return float(value)
-                    except (ValueError, TypeError):
-                        continue
-        return None
+        # Chuyển vị: mỗi chỉ số thành một cột có dtype riêng (số hoặc chuỗi)
+        values = df.T.infer_objects()
+
+        # Làm tròn toàn bộ cột số bằng thao tác vector hóa
+        numeric = values.select_dtypes(include="number").columns.drop(
+            _MARKET_CAP, errors="ignore"
+        )
+        values[numeric] = values[numeric].round(2)
+        if _MARKET_CAP in values.columns:
+            values[_MARKET_CAP] = pd.to_numeric(values[_MARKET_CAP]).clip(
+                lower=0
+            )
+
+        # to_dict trả về kiểu Python gốc; bỏ các giá trị NaN
+        return {
+            ticker: {
+                indicator: int(value) if indicator == _MARKET_CAP else value
+                for indicator, value in row.items()
+                if pd.notna(value)
+            }
+            for ticker, row in values.to_dict("index").items()
+        }
+
+    def _max_insights(self, df: pd.DataFrame) -> List[str]:
+        """Describe which ticker has the highest value for each numeric indicator."""
+
+        # Mỗi chỉ số số học thành một cột; bỏ chỉ số không có dữ liệu
+        numeric = (
+            df.T.infer_objects()
+            .select_dtypes(include="number")
+            .dropna(axis=1, how="all")
+        )
+        max_tickers = numeric.idxmax()
+        max_values = numeric.max()
+
+        return [
+            f"Chỉ số {indicator} cao nhất là: {round(value, 2)} với mã {ticker}"
+            for indicator, ticker, value in zip(
+                max_tickers.index, max_tickers, max_values
+            )
+        ]
+
+    async def _run_cached(self, func, *args, **kwargs):
+        """Run a read-only vnstock function, serving repeats from the TTL cache."""
+
+        key = repr((func.__name__, args, sorted(kwargs.items())))
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+
+        async def fetch():
+            data = await self._run_sync_function(func, *args, **kwargs)
+            # Không cache kết quả rỗng (có thể do lỗi tạm thời phía nguồn)
+            if data is not None and not data.empty:
+                self._cache[key] = data
+            return data
+
+        return await self._inflight.do(key, fetch)
 
     async def _run_sync_function(self, func, *args, **kwargs):
-        """Run synchronous vnstock functions in async context."""
+        """Run synchronous vnstock functions on the provider's thread pool."""
 
-        loop = asyncio.get_event_loop()
+        loop = asyncio.get_running_loop()
         bound_func = functools.partial(func, *args, **kwargs)
-        return await loop.run_in_executor(None, bound_func)
+        return await loop.run_in_executor(self._executor, bound_func)
 
     def _create_empty_fundamental_data(self) -> Dict[str, Any]:
         """Create empty fundamental data structure."""
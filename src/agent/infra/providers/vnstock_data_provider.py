@@ -1,7 +1,10 @@
 import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Any, Dict, List
+from typing import Any, Dict, Optional, Sequence
 
+import pandas as pd
 import vnstock as vns
 
 from ...domain.interfaces.stock_data_interface import BaseStockData
@@ -17,8 +20,23 @@ class VnStockData(BaseStockData):
     def __init__(self):
         """Initialize VnStock Data Provider."""
         self.interval = getattr(settings.vnstock, "interval", "1D")
-
-    async def get_realtime_data(self, symbols: List[str]) -> Dict[str, Any]:
+        # Giới hạn số request vnstock chạy song song khi lấy nhiều mã
+        self._semaphore = asyncio.Semaphore(
+            getattr(settings.vnstock, "max_concurrency", 5)
+        )
+        # Threadpool riêng: không tranh chấp default executor với embeddings
+        self._executor = ThreadPoolExecutor(
+            max_workers=getattr(settings.vnstock, "executor_workers", 16),
+            thread_name_prefix="vnstock-data",
+        )
+
+    def close(self) -> None:
+        """Shut down the dedicated vnstock thread pool."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    async def get_realtime_data(
+        self, symbols: Sequence[str]
+    ) -> Dict[str, Any]:
         """
         Get realtime stock data for given symbols using vnstock intraday data.
 
@@ -29,58 +47,76 @@ class VnStockData(BaseStockData):
             Dict containing realtime data for all symbols.
         """
 
-        results = {}
-        try:
-            for symbol in symbols:
-                try:
-                    data = await asyncio.to_thread(
-                        vns.stock_intraday_data,
-                        symbol=symbol,
-                        page_size=1,
-                        page=0,
-                        investor_segment=True,
-                    )
+        # Mọi mã trong cùng request dùng chung một mốc thời gian
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
-                    if data is not None and not data.empty:
-                        row = data.iloc[0].to_dict()
-                        results[symbol] = {
-                            "time": datetime.now().strftime(
-                                "%Y-%m-%d %H:%M:%S"
-                            ),
-                            "order_type": row.get("orderType"),
-                            "investor_type": row.get("investorType"),
-                            "volume": row.get("volume", 0),
-                            "average_price": row.get("averagePrice", 0),
-                            "order_count": row.get("orderCount", 0),
-                            "prev_price_change": row.get("prevPriceChange", 0),
-                        }
-                    else:
-                        results[symbol] = {
-                            "time": datetime.now().strftime(
-                                "%Y-%m-%d %H:%M:%S"
-                            ),
-                            "order_type": None,
-                            "investor_type": None,
-                            "volume": None,
-                            "average_price": None,
-                            "order_count": None,
-                            "prev_price_change": None,
-                        }
-
-                except Exception as e:
-                    logger.error(
-                        f"Failed to fetch realtime data for {symbol}: {str(e)}"
-                    )
-                    raise
+        async def fetch_one(symbol: str) -> Dict[str, Any]:
+            async with self._semaphore:
+                return await self.get_realtime_single(symbol, timestamp)
 
-            return results
+        try:
+            data = await asyncio.gather(*(fetch_one(s) for s in symbols))
+            return dict(zip(symbols, data))
 
         except Exception as e:
             logger.error(f"Realtime data retrieval failed: {str(e)}")
             raise
 
+    async def get_realtime_single(
+        self, symbol: str, timestamp: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Get realtime stock data for a single symbol using vnstock intraday data.
+
+        Args:
+            symbol: Stock symbol.
+            timestamp: Request time to report (defaults to now).
+
+        Returns:
+            Dict containing realtime data for the symbol.
+        """
+
+        try:
+            data = await self._run_sync_function(
+                vns.stock_intraday_data,
+                symbol=symbol,
+                page_size=1,
+                page=0,
+                investor_segment=True,
+            )
+
+            if timestamp is None:
+                timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+            if data is not None and not data.empty:
+                row = data.iloc[0].to_dict()
+                return {
+                    "time": timestamp,
+                    "order_type": row.get("orderType"),
+                    "investor_type": row.get("investorType"),
+                    "volume": row.get("volume", 0),
+                    "average_price": row.get("averagePrice", 0),
+                    "order_count": row.get("orderCount", 0),
+                    "prev_price_change": row.get("prevPriceChange", 0),
+                }
+            return {
+                "time": timestamp,
+                "order_type": None,
+                "investor_type": None,
+                "volume": None,
+                "average_price": None,
+                "order_count": None,
+                "prev_price_change": None,
+            }
+
+        except Exception as e:
+            logger.error(
+                f"Failed to fetch realtime data for {symbol}: {str(e)}"
+            )
+            raise
+
     async def get_historical_data(
-        self, symbols: List[str], start_date: str, end_date: str
+        self, symbols: Sequence[str], start_date: str, end_date: str
     ) -> Dict[str, Any]:
         """
         Get historical stock data for given symbols using vnstock.
@@ -94,39 +130,67 @@ class VnStockData(BaseStockData):
             Dict containing historical data for all symbols.
         """
 
-        results = {}
+        async def fetch_one(symbol: str) -> Any:
+            async with self._semaphore:
+                return await self.get_historical_single(
+                    symbol, start_date, end_date
+                )
+
         try:
-            for symbol in symbols:
-                try:
-                    data = await asyncio.to_thread(
-                        vns.stock_historical_data,
-                        symbol=symbol,
-                        start_date=start_date,
-                        end_date=end_date,
-                        resolution=self.interval,
-                    )
+            data = await asyncio.gather(*(fetch_one(s) for s in symbols))
+            return dict(zip(symbols, data))
+
+        except Exception as e:
+            logger.error(f"Historical data retrieval failed: {str(e)}")
+            raise
+
+    async def get_historical_single(
+        self, symbol: str, start_date: str, end_date: str
+    ) -> Any:
+        """
+        Get historical stock data for a single symbol using vnstock.
 
-                    if data is not None and not data.empty:
-
-                        formatted_data = [
-                            {
-                                k: v.strftime("%Y-%m-%d") if k == "time" else v
-                                for k, v in item.items()
-                                if k != "ticker"
-                            }
-                            for item in data.to_dict("records")
-                        ]
-                        results[symbol] = formatted_data
-                    else:
-                        results[symbol] = {}
-
-                except Exception as e:
-                    logger.error(
-                        f"Failed to fetch historical data for {symbol}: {str(e)}"
+        Args:
+            symbol: Stock symbol.
+            start_date: Start date in YYYY-MM-DD format.
+            end_date: End date in YYYY-MM-DD format.
+
+        Returns:
+            List of daily records, or an empty dict when no data is available.
+        """
+
+        try:
+            data = await self._run_sync_function(
+                vns.stock_historical_data,
+                symbol=symbol,
+                start_date=start_date,
+                end_date=end_date,
+                resolution=self.interval,
+            )
+
+            if data is not None and not data.empty:
+                # Định dạng cột thời gian bằng thao tác vector hóa của pandas
+                df = data.drop(columns=["ticker"], errors="ignore")
+                if "time" in df.columns:
+                    df["time"] = pd.to_datetime(df["time"]).dt.strftime(
+                        "%Y-%m-%d"
                     )
-                    raise
-            return results
+                # Ghép record từ các cột (tolist trả về kiểu Python gốc),
+                # nhanh hơn to_dict("records") vốn box từng ô
+                columns = list(df.columns)
+                values = [df[column].tolist() for column in columns]
+                return [dict(zip(columns, row)) for row in zip(*values)]
+            return {}
 
         except Exception as e:
-            logger.error(f"Historical data retrieval failed: {str(e)}")
+            logger.error(
+                f"Failed to fetch historical data for {symbol}: {str(e)}"
+            )
             raise
+
+    async def _run_sync_function(self, func, *args, **kwargs):
+        """Run synchronous vnstock functions on the provider's thread pool."""
+
+        loop = asyncio.get_running_loop()
+        bound_func = functools.partial(func, *args, **kwargs)
+        return await loop.run_in_executor(self._executor, bound_func)
@@ -1,23 +1,81 @@
 import asyncio
-from typing import Any, Dict, List
+import operator
+import uuid
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Union
 
 from langchain_aws import BedrockEmbeddings
-from langchain_core.documents import Document
-from langchain_qdrant import QdrantVectorStore
-from qdrant_client import QdrantClient
-from qdrant_client.http.models import Distance, VectorParams
+from qdrant_client import AsyncQdrantClient, QdrantClient
+from qdrant_client.http.models import (
+    BinaryQuantization,
+    BinaryQuantizationConfig,
+    Datatype,
+    Distance,
+    FieldCondition,
+    Filter,
+    FilterSelector,
+    HnswConfigDiff,
+    MatchAny,
+    OptimizersConfigDiff,
+    PayloadSelectorInclude,
+    PointStruct,
+    QuantizationSearchParams,
+    QueryRequest,
+    ScalarQuantization,
+    ScalarQuantizationConfig,
+    ScalarType,
+    SearchParams,
+    VectorParams,
+)
 
 from ...domain.entities.document import DocumentChunk
 from ...domain.interfaces.vector_store_interface import BaseVectorStore
 from ...shared.exceptions.domain_exceptions import VectorStoreError
 from ...shared.logging.logger import Logger
 from ...shared.settings.settings import settings
+from ..utils.aws_clients import get_bedrock_runtime_client
+from ..utils.embedding_cache import EmbeddingCache
+from ..utils.micro_batcher import MicroBatcher
+from ..utils.semantic_cache import SemanticCache
 
 logger = Logger.get_logger(__name__)
 
+# (k, score_threshold, payload fields) của một lần search
+_SearchParams = Tuple[int, Optional[float], Optional[Tuple[str, ...]]]
+
+# Các trường metadata của chunk được lưu vào payload Qdrant
+_METADATA_FIELDS = (
+    "source",
+    "title",
+    "document_type",
+    "chunk_index",
+    "tags",
+    "language",
+)
+_get_metadata_fields = operator.attrgetter(*_METADATA_FIELDS)
+
+
+def _quantization_config(
+    quantization: Optional[str],
+) -> Optional[Union[ScalarQuantization, BinaryQuantization]]:
+    """Build the Qdrant quantization config for the configured mode."""
+    if quantization == "int8":
+        return ScalarQuantization(
+            scalar=ScalarQuantizationConfig(
+                type=ScalarType.INT8, quantile=0.99, always_ram=True
+            )
+        )
+    if quantization == "binary":
+        return BinaryQuantization(
+            binary=BinaryQuantizationConfig(always_ram=True)
+        )
+    if quantization:
+        logger.warning(f"Unknown quantization mode: {quantization}")
+    return None
+
 
 class QdrantVectorStoreDB(BaseVectorStore):
-    """Qdrant implementation of vector store using LangChain."""
+    """Qdrant implementation of vector store using the async gRPC client."""
 
     def __init__(
         self,
@@ -29,51 +87,136 @@ class QdrantVectorStoreDB(BaseVectorStore):
             aws_access_key_id=settings.s3.aws_access_key_id,
             aws_secret_access_key=settings.s3.aws_secret_access_key,
             model_kwargs={"input_type": "search_document"},
+            client=get_bedrock_runtime_client(
+                settings.s3.aws_region,
+                settings.s3.aws_access_key_id,
+                settings.s3.aws_secret_access_key,
+            ),
         )
 
-        # Khởi tạo QdrantClient để quản lý collection
-        self._raw_client = QdrantClient(
+        client_kwargs = dict(
             host=settings.qdrant.host,
             port=settings.qdrant.port,
+            grpc_port=getattr(settings.qdrant, "grpc_port", 6334),
+            prefer_grpc=getattr(settings.qdrant, "prefer_grpc", True),
             # url=settings.qdrant.url,
             # api_key=settings.qdrant.api_key,
             timeout=getattr(settings.qdrant, "timeout_seconds", 5),
         )
+        # Client async (gRPC) cho mọi thao tác lúc chạy, không tốn thread
+        self._raw_client = AsyncQdrantClient(**client_kwargs)
 
-        # Kiểm tra và tạo collection nếu chưa tồn tại
+        # Kiểm tra và tạo collection nếu chưa tồn tại; __init__ không await
+        # được nên dùng client đồng bộ tạm thời rồi đóng lại
         collection_name = settings.qdrant.collection_name
+        quantization_config = _quantization_config(
+            getattr(settings.qdrant, "quantization", "int8")
+        )
+        admin_client = QdrantClient(**client_kwargs)
         try:
-            self._raw_client.get_collection(collection_name)
+            admin_client.get_collection(collection_name)
             logger.info(f"Collection {collection_name} already exists.")
         except Exception:
             logger.info(
                 f"Creating new collection {collection_name} with vector_size {settings.qdrant.vector_size}."
             )
-            self._raw_client.create_collection(
+            admin_client.create_collection(
                 collection_name=collection_name,
                 vectors_config=VectorParams(
                     size=settings.qdrant.vector_size,  # Thiết lập vector_size
                     distance=Distance.COSINE,
+                    on_disk=quantization_config is not None,
+                    # Vector gốc (dùng để rescore) lưu float16, giảm nửa dung lượng
+                    datatype=Datatype(
+                        getattr(settings.qdrant, "vector_datatype", "float16")
+                    ),
+                ),
+                hnsw_config=HnswConfigDiff(
+                    m=getattr(settings.qdrant, "hnsw_m", 16),
+                    ef_construct=getattr(
+                        settings.qdrant, "hnsw_ef_construct", 100
+                    ),
                 ),
+                # Vector lượng tử hóa nằm trong RAM, vector float gốc ở disk
+                quantization_config=quantization_config,
             )
+        finally:
+            admin_client.close()
 
-        # Khởi tạo QdrantVectorStore
-        self.client = QdrantVectorStore(
-            client=self._raw_client,
-            collection_name=collection_name,
-            embedding=self.embedding,
-            distance=Distance.COSINE,
-        )
         self.collection_name = settings.qdrant.collection_name
         self.timeout_seconds = getattr(settings.qdrant, "timeout_seconds", 5)
         self.search_k = getattr(settings.qdrant, "search_k", 5)
+        # Tham số tìm kiếm HNSW (ANN), không quét toàn bộ collection
+        # Duyệt trên vector lượng tử hóa rồi rescore top ứng viên bằng float
+        self.search_params = SearchParams(
+            hnsw_ef=getattr(settings.qdrant, "hnsw_ef", 128),
+            exact=False,
+            quantization=(
+                QuantizationSearchParams(
+                    rescore=True,
+                    oversampling=getattr(
+                        settings.qdrant, "quantization_oversampling", 2.0
+                    ),
+                )
+                if quantization_config is not None
+                else None
+            ),
+        )
         self.filter_conditions = getattr(
             settings.qdrant, "filter_conditions", None
         )
+        # Cache embedding theo hash nội dung: chunk lặp lại giữa các tài liệu
+        # (disclaimer, header...) chỉ gọi Bedrock một lần
+        self._embedding_cache = EmbeddingCache(
+            getattr(settings.embeddings, "cache_size", 10000)
+        )
+        self._embedding_namespace = EmbeddingCache.make_namespace(
+            settings.embeddings.cohere_model_id, "search_document"
+        )
+        # Embed theo chunk lớn, upsert theo batch nhỏ chạy song song
+        self.embeddings_chunk_size = getattr(
+            settings.qdrant, "embeddings_chunk_size", 1000
+        )
+        self.upsert_batch_size = getattr(
+            settings.qdrant, "upsert_batch_size", 64
+        )
+        self._upsert_semaphore = asyncio.Semaphore(
+            getattr(settings.qdrant, "upsert_concurrency", 4)
+        )
+        # Số bulk_ingest đang mở; chỉ bật lại HNSW khi cái cuối cùng kết thúc
+        self._bulk_depth = 0
+        # Giữ qua các lời gọi update_collection để bật/tắt HNSW không xen kẽ nhau
+        self._bulk_lock = asyncio.Lock()
+        # Tăng mỗi khi dữ liệu thay đổi để các chỉ mục phụ (BM25) biết cần build lại
+        self.revision = 0
+        # Cache kết quả similarity_search (khớp chính xác + gần đúng theo
+        # cosine), tách theo (k, score_threshold), xóa khi dữ liệu thay đổi
+        self._query_cache_size = getattr(
+            settings.qdrant, "query_cache_size", 512
+        )
+        self._query_caches: Dict[_SearchParams, SemanticCache] = {}
+        payload_fields = getattr(settings.qdrant, "payload_fields", None)
+        self.payload_fields = (
+            tuple(payload_fields) if payload_fields is not None else None
+        )
+        # Gom các similarity_search đồng thời: một lần embed + một request
+        # query_batch_points cho cả batch
+        search_batch_size = getattr(settings.qdrant, "search_batch_size", 32)
+        self._search_batcher = (
+            MicroBatcher(
+                self._search_batch,
+                max_batch_size=search_batch_size,
+                max_wait_ms=getattr(
+                    settings.qdrant, "search_batch_wait_ms", 5
+                ),
+            )
+            if search_batch_size > 1
+            else None
+        )
 
     async def add_documents(self, documents: List[DocumentChunk]) -> bool:
         """
-        Add document chunks to Qdrant using LangChain.
+        Embed document chunks and upsert them into Qdrant.
 
         Args:
             documents: List of DocumentChunk objects to add.
@@ -86,24 +229,39 @@ class QdrantVectorStoreDB(BaseVectorStore):
                 logger.warning("No documents to add")
                 return True
 
-            # Convert DocumentChunk to LangChain Document
-            langchain_docs = [
-                Document(
-                    page_content=doc.content,
-                    metadata={
-                        "source": doc.metadata.source,
-                        "title": doc.metadata.title,
-                        "document_type": doc.metadata.document_type,
-                        "chunk_index": doc.metadata.chunk_index,
-                        "tags": doc.metadata.tags,
-                        "language": doc.metadata.language,
+            texts = [doc.content for doc in documents]
+            vectors = []
+            for i in range(0, len(texts), self.embeddings_chunk_size):
+                vectors.extend(
+                    await self._embed(
+                        texts[i : i + self.embeddings_chunk_size]
+                    )
+                )
+            # Payload giữ định dạng page_content/metadata của LangChain
+            points = [
+                PointStruct(
+                    id=str(uuid.uuid4()),
+                    vector=vector,
+                    payload={
+                        "page_content": text,
+                        "metadata": dict(
+                            zip(
+                                _METADATA_FIELDS,
+                                _get_metadata_fields(doc.metadata),
+                            )
+                        ),
                     },
                 )
-                for doc in documents
+                for doc, text, vector in zip(documents, texts, vectors)
             ]
-
-            # Add documents using LangChain
-            await asyncio.to_thread(self.client.add_documents, langchain_docs)
+            await asyncio.gather(
+                *(
+                    self._upsert(points[i : i + self.upsert_batch_size])
+                    for i in range(0, len(points), self.upsert_batch_size)
+                )
+            )
+            self.revision += 1
+            self._query_caches.clear()
             logger.info(
                 f"Successfully added {len(documents)} documents to Qdrant"
             )
@@ -113,6 +271,54 @@ class QdrantVectorStoreDB(BaseVectorStore):
             logger.error(f"Failed to add documents to Qdrant: {str(e)}")
             raise VectorStoreError(f"Failed to add documents: {str(e)}")
 
+    async def _embed(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts with Bedrock, only sending texts not in the cache."""
+
+        return await self._embedding_cache.get_or_compute_many(
+            self._embedding_namespace, texts, self.embedding.aembed_documents
+        )
+
+    async def _upsert(self, points: List[PointStruct]) -> None:
+        async with self._upsert_semaphore:
+            await self._raw_client.upsert(
+                collection_name=self.collection_name, points=points
+            )
+
+    @asynccontextmanager
+    async def bulk_ingest(self) -> AsyncIterator[None]:
+        """
+        Defer HNSW indexing while a large ingest runs.
+
+        Sets m=0 so uploaded points are only stored, then restores m and the
+        indexing threshold so the optimizer builds the graph once at the end.
+        """
+        async with self._bulk_lock:
+            if self._bulk_depth == 0:
+                await self._raw_client.update_collection(
+                    collection_name=self.collection_name,
+                    hnsw_config=HnswConfigDiff(m=0),
+                )
+                logger.info("HNSW indexing deferred for bulk ingest")
+            self._bulk_depth += 1
+        try:
+            yield
+        finally:
+            async with self._bulk_lock:
+                self._bulk_depth -= 1
+                if self._bulk_depth == 0:
+                    await self._raw_client.update_collection(
+                        collection_name=self.collection_name,
+                        hnsw_config=HnswConfigDiff(
+                            m=getattr(settings.qdrant, "hnsw_m", 16)
+                        ),
+                        optimizers_config=OptimizersConfigDiff(
+                            indexing_threshold=getattr(
+                                settings.qdrant, "indexing_threshold", 10000
+                            )
+                        ),
+                    )
+                    logger.info("HNSW indexing re-enabled after bulk ingest")
+
     async def delete_documents(self, document_ids: List[str]) -> bool:
         """
         Delete documents by IDs.
@@ -124,16 +330,22 @@ class QdrantVectorStoreDB(BaseVectorStore):
             True if successful, False otherwise.
         """
         try:
-            # LangChain QdrantVectorStore uses document IDs in metadata
-            await asyncio.to_thread(
-                self.client.delete,
-                filter={
-                    "must": [
-                        {"key": "source", "match": {"value": doc_id}}
-                        for doc_id in document_ids
-                    ]
-                },
+            # Document ID là metadata.source của các chunk
+            await self._raw_client.delete(
+                collection_name=self.collection_name,
+                points_selector=FilterSelector(
+                    filter=Filter(
+                        must=[
+                            FieldCondition(
+                                key="metadata.source",
+                                match=MatchAny(any=list(document_ids)),
+                            )
+                        ]
+                    )
+                ),
             )
+            self.revision += 1
+            self._query_caches.clear()
             logger.info(f"Deleted {len(document_ids)} documents from Qdrant")
             return True
 
@@ -141,48 +353,253 @@ class QdrantVectorStoreDB(BaseVectorStore):
             logger.error(f"Failed to delete documents: {str(e)}")
             raise VectorStoreError(f"Failed to delete documents: {str(e)}")
 
-    async def similarity_search(self, query: str) -> List[Dict[str, Any]]:
+    async def similarity_search(
+        self,
+        query: str,
+        k: Optional[int] = None,
+        score_threshold: Optional[float] = None,
+        fields: Optional[List[str]] = None,
+    ) -> List[Dict[str, Any]]:
         """
-        Perform similarity search using LangChain.
+        Perform HNSW similarity search, batching concurrent calls.
 
         Args:
             query: The query string to search for.
+            k: Number of nearest neighbours to return (search_k if None).
+            score_threshold: Minimum similarity score, applied by Qdrant.
+            fields: Payload keys to fetch, e.g. "metadata.title"
+                (qdrant.payload_fields if None).
 
         Returns:
             List of dictionaries containing document content and metadata.
         """
         try:
-            # Perform search using LangChain
-            results = await asyncio.to_thread(
-                self.client.similarity_search_with_score,
-                query=query,
-                k=self.search_k,
-                filter=self.filter_conditions,
+            params: _SearchParams = (
+                k or self.search_k,
+                score_threshold,
+                tuple(fields) if fields is not None else self.payload_fields,
             )
+            cache = self._query_cache(params)
+            cache_key = query.strip().casefold()
+            if cache is not None:
+                cached = cache.get_exact(cache_key)
+                if cached is not None:
+                    return cached
 
-            # Convert results to expected format
-            formatted_results = [
-                {
-                    "content": doc.page_content,
-                    "metadata": doc.metadata,
-                    "score": score,
-                }
-                for doc, score in results
-            ]
+            revision = self.revision
+            if self._search_batcher is not None:
+                vector, formatted_results = await self._search_batcher.submit(
+                    (query, params)
+                )
+            else:
+                [(vector, formatted_results)] = await self._search_batch(
+                    [(query, params)]
+                )
 
             logger.info(f"Found {len(formatted_results)} results for query")
+            # Bỏ qua nếu dữ liệu đã thay đổi trong lúc tìm kiếm
+            if (
+                cache is not None
+                and formatted_results
+                and revision == self.revision
+            ):
+                cache.put(cache_key, vector, formatted_results)
             return formatted_results
 
         except Exception as e:
             logger.error(f"Similarity search failed: {str(e)}")
             raise VectorStoreError(f"Similarity search failed: {str(e)}")
 
+    async def _search_batch(
+        self, items: List[Tuple[str, _SearchParams]]
+    ) -> List[Tuple[List[float], List[Dict[str, Any]]]]:
+        """
+        Embed a batch of queries in one call and search them in one request.
+
+        Queries whose vector matches the semantic cache skip Qdrant.
+
+        Args:
+            items: (query, (k, score_threshold, fields)) per search.
+
+        Returns:
+            (query vector, formatted results) per item, in input order.
+        """
+        vectors = await self._embed([query for query, _ in items])
+
+        results: List[Optional[List[Dict[str, Any]]]] = []
+        for vector, (_, params) in zip(vectors, items):
+            cache = self._query_cache(params)
+            results.append(None if cache is None else cache.lookup(vector))
+
+        misses = [i for i, result in enumerate(results) if result is None]
+        if misses:
+            responses = await self._raw_client.query_batch_points(
+                collection_name=self.collection_name,
+                requests=[
+                    self._query_request(vectors[i], *items[i][1])
+                    for i in misses
+                ],
+            )
+            for i, response in zip(misses, responses):
+                results[i] = self._format_points(response.points)
+
+        return list(zip(vectors, results))
+
+    @staticmethod
+    def _format_points(points: List[Any]) -> List[Dict[str, Any]]:
+        """Convert Qdrant scored points to result dictionaries."""
+
+        return [
+            {
+                "content": (point.payload or {}).get("page_content", ""),
+                "metadata": (point.payload or {}).get("metadata", {}),
+                "score": point.score,
+            }
+            for point in points
+        ]
+
+    def _query_request(
+        self,
+        vector: List[float],
+        k: int,
+        score_threshold: Optional[float],
+        fields: Optional[Tuple[str, ...]],
+    ) -> QueryRequest:
+        """Build one Qdrant query, fetching only the requested payload keys."""
+
+        return QueryRequest(
+            query=vector,
+            limit=k,
+            filter=self.filter_conditions,
+            params=self.search_params,
+            score_threshold=score_threshold,
+            with_payload=(
+                PayloadSelectorInclude(include=list(fields))
+                if fields is not None
+                else True
+            ),
+        )
+
+    def _query_cache(self, params: _SearchParams) -> Optional[SemanticCache]:
+        """Return the result cache for these search parameters."""
+
+        if self._query_cache_size <= 0:
+            return None
+        cache = self._query_caches.get(params)
+        if cache is None:
+            cache = self._query_caches[params] = SemanticCache(
+                threshold=getattr(
+                    settings.qdrant, "semantic_cache_threshold", 0.95
+                ),
+                max_entries=self._query_cache_size,
+                ttl_seconds=getattr(settings.qdrant, "query_cache_ttl", 300),
+            )
+        return cache
+
+    def get_cache_stats(self) -> Dict[str, int]:
+        """
+        Return similarity_search cache counters summed over all parameters.
+
+        Returns:
+            Dictionary with size, exact_hits, semantic_hits, misses and evictions.
+        """
+        stats = {
+            "size": 0,
+            "exact_hits": 0,
+            "semantic_hits": 0,
+            "misses": 0,
+            "evictions": 0,
+        }
+        for cache in self._query_caches.values():
+            for name, value in cache.get_stats().items():
+                stats[name] += value
+        return stats
+
+    async def similarity_search_many(
+        self, queries: List[str], k: Optional[int] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Embed all queries in one batch and search them in one Qdrant request.
+
+        Args:
+            queries: The query strings to search for.
+            k: Number of nearest neighbours per query (search_k if None).
+
+        Returns:
+            One list of result dictionaries per query, in input order.
+        """
+        if not queries:
+            return []
+
+        try:
+            vectors = await self._embed(queries)
+            responses = await self._raw_client.query_batch_points(
+                collection_name=self.collection_name,
+                requests=[
+                    self._query_request(
+                        vector, k or self.search_k, None, self.payload_fields
+                    )
+                    for vector in vectors
+                ],
+            )
+
+            results = [
+                self._format_points(response.points) for response in responses
+            ]
+
+            logger.info(
+                f"Batched similarity search for {len(queries)} queries"
+            )
+            return results
+
+        except Exception as e:
+            logger.error(f"Batched similarity search failed: {str(e)}")
+            raise VectorStoreError(
+                f"Batched similarity search failed: {str(e)}"
+            )
+
+    async def scroll_documents(self) -> List[Dict[str, Any]]:
+        """
+        Scroll through the whole collection and return stored payloads.
+
+        Returns:
+            List of dictionaries containing document content and metadata.
+        """
+        try:
+            documents = []
+            offset = None
+            while True:
+                points, offset = await self._raw_client.scroll(
+                    collection_name=self.collection_name,
+                    limit=256,
+                    offset=offset,
+                    with_payload=True,
+                    with_vectors=False,
+                )
+                for point in points:
+                    payload = point.payload or {}
+                    documents.append(
+                        {
+                            "content": payload.get("page_content", ""),
+                            "metadata": payload.get("metadata", {}),
+                        }
+                    )
+                if offset is None:
+                    break
+
+            logger.info(f"Scrolled {len(documents)} documents from Qdrant")
+            return documents
+
+        except Exception as e:
+            logger.error(f"Failed to scroll documents: {str(e)}")
+            raise VectorStoreError(f"Failed to scroll documents: {str(e)}")
+
     async def close(self) -> None:
         """
         Close Qdrant client connection.
         """
         try:
-            await asyncio.to_thread(self._raw_client.close)
+            await self._raw_client.close()
             logger.info("Qdrant client connection closed successfully.")
         except Exception as e:
             logger.error(f"Failed to close Qdrant client: {str(e)}")
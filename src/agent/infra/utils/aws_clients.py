@@ -0,0 +1,42 @@
+from functools import lru_cache
+from typing import Any
+
+import boto3
+from aiobotocore.config import AioConfig
+from botocore.config import Config
+
+# Pool kết nối lớn + retry adaptive để tái sử dụng kết nối TLS giữa các request
+_POOL_CONNECTIONS = 64
+_RETRIES = {"mode": "adaptive", "max_attempts": 5}
+
+BOTO_CONFIG = Config(
+    max_pool_connections=_POOL_CONNECTIONS,
+    retries=_RETRIES,
+    tcp_keepalive=True,
+)
+
+AIO_BOTO_CONFIG = AioConfig(
+    max_pool_connections=_POOL_CONNECTIONS,
+    retries=_RETRIES,
+)
+
+
+@lru_cache(maxsize=None)
+def get_bedrock_runtime_client(
+    region_name: str,
+    aws_access_key_id: str,
+    aws_secret_access_key: str,
+) -> Any:
+    """
+    Return the process-wide bedrock-runtime client for these credentials.
+
+    boto3 clients are thread-safe, so every BedrockEmbeddings instance can
+    share one client and its connection pool.
+    """
+    return boto3.client(
+        "bedrock-runtime",
+        region_name=region_name,
+        aws_access_key_id=aws_access_key_id,
+        aws_secret_access_key=aws_secret_access_key,
+        config=BOTO_CONFIG,
+    )
@@ -0,0 +1,142 @@
+import hashlib
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import numpy as np
+from cachetools import LRUCache
+
+
+class EmbeddingCache:
+    """
+    In-process LRU cache for embeddings keyed by content hash.
+
+    Vectors are stored as contiguous float32 arrays (about 8x smaller than a
+    list of Python floats) and handed back to callers as fresh lists. A miss
+    returns the same float32-rounded values a later hit would, so results do
+    not depend on cache state.
+    """
+
+    def __init__(self, maxsize: int = 10000):
+        # maxsize <= 0 tắt cache, mọi lời gọi đi thẳng tới model
+        self._cache: Optional[LRUCache] = (
+            LRUCache(maxsize=maxsize) if maxsize > 0 else None
+        )
+
+    @staticmethod
+    def make_namespace(*parts: str) -> str:
+        """Join the model name and vector-changing settings."""
+        return "\0".join(parts)
+
+    @staticmethod
+    def make_key(namespace: str, text: str) -> bytes:
+        """
+        Build a cache key from the embedding namespace and the text.
+
+        Args:
+            namespace: Model name plus any setting that changes the vector.
+            text: Text to embed.
+
+        Returns:
+            16-byte blake2b digest.
+        """
+        return hashlib.blake2b(
+            f"{namespace}\0{text}".encode(), digest_size=16
+        ).digest()
+
+    def _get(self, key: bytes) -> Optional[List[float]]:
+        vector = self._cache.get(key)
+        return None if vector is None else vector.tolist()
+
+    def _put(self, key: bytes, embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        if vector.size:
+            self._cache[key] = vector
+        return vector
+
+    async def get_or_compute(
+        self,
+        namespace: str,
+        text: str,
+        compute: Callable[[str], Awaitable[List[float]]],
+        blank_vector: Optional[List[float]] = None,
+    ) -> List[float]:
+        """
+        Return the cached embedding of ``text`` or compute and store it.
+
+        When ``blank_vector`` is given, empty/whitespace-only text returns a
+        copy of it without calling ``compute``.
+        """
+        if blank_vector is not None and not text.strip():
+            return list(blank_vector)
+        if self._cache is None:
+            return await compute(text)
+
+        key = self.make_key(namespace, text)
+        embedding = self._get(key)
+        if embedding is None:
+            embedding = self._put(key, await compute(text)).tolist()
+        return embedding
+
+    async def get_or_compute_many(
+        self,
+        namespace: str,
+        texts: List[str],
+        compute: Callable[[List[str]], Awaitable[List[List[float]]]],
+        blank_vector: Optional[List[float]] = None,
+    ) -> List[List[float]]:
+        """
+        Return embeddings for ``texts``, computing only the cache misses.
+
+        Each distinct missing text is passed to ``compute`` once; results are
+        returned in input order. When ``blank_vector`` is given, empty or
+        whitespace-only texts get a copy of it and are never sent to
+        ``compute``.
+        """
+        if blank_vector is not None:
+            blank = [not text.strip() for text in texts]
+            if any(blank):
+                # Bỏ chuỗi rỗng ra, embed phần còn lại rồi chèn lại đúng vị trí
+                non_blank = [t for t, b in zip(texts, blank) if not b]
+                embedded = iter(
+                    await self.get_or_compute_many(
+                        namespace, non_blank, compute
+                    )
+                    if non_blank
+                    else ()
+                )
+                return [
+                    list(blank_vector) if b else next(embedded) for b in blank
+                ]
+
+        if self._cache is None:
+            # Không có cache vẫn bỏ các chuỗi trùng trong cùng một lời gọi
+            unique_texts = list(dict.fromkeys(texts))
+            if len(unique_texts) == len(texts):
+                return await compute(texts)
+            vectors = dict(zip(unique_texts, await compute(unique_texts)))
+            # Mỗi vị trí nhận một bản sao riêng
+            return [list(vectors[text]) for text in texts]
+
+        keys = [self.make_key(namespace, text) for text in texts]
+        results = [self._get(key) for key in keys]
+
+        # Vị trí của từng chuỗi chưa có trong cache, gộp theo key
+        miss_positions: Dict[bytes, List[int]] = {}
+        for i, (key, result) in enumerate(zip(keys, results)):
+            if result is None:
+                miss_positions.setdefault(key, []).append(i)
+        if not miss_positions:
+            return results
+
+        miss_texts = [
+            texts[positions[0]] for positions in miss_positions.values()
+        ]
+        computed = await compute(miss_texts)
+
+        for (key, positions), embedding in zip(
+            miss_positions.items(), computed
+        ):
+            vector = self._put(key, embedding)
+            for i in positions:
+                results[i] = vector.tolist()
+
+        return results
@@ -0,0 +1,44 @@
+from hashlib import sha256
+from typing import Any, Dict, List, Optional
+
+import orjson
+from cachetools import TTLCache
+from langchain_core.messages import BaseMessage
+
+
+class LLMResponseCache:
+    """In-process TTL cache for chat responses keyed by canonical messages."""
+
+    def __init__(self, maxsize: int = 1000, ttl_seconds: float = 3600):
+        self._cache: TTLCache = TTLCache(maxsize=maxsize, ttl=ttl_seconds)
+
+    @staticmethod
+    def make_key(params: Dict[str, Any], messages: List[BaseMessage]) -> bytes:
+        """
+        Build a cache key from model parameters and the message list.
+
+        Args:
+            params: Model name and sampling parameters.
+            messages: Full message list sent to the model (prefix included).
+
+        Returns:
+            SHA-256 digest of the canonical serialization.
+        """
+        payload = orjson.dumps(
+            {
+                "params": params,
+                "messages": [(m.type, m.content) for m in messages],
+            },
+            option=orjson.OPT_SORT_KEYS,
+        )
+        return sha256(payload).digest()
+
+    def get(self, key: bytes) -> Optional[Dict[str, Any]]:
+        """Return a copy of the cached response, if present and fresh."""
+        hit = self._cache.get(key)
+        return dict(hit) if hit is not None else None
+
+    def put(self, key: bytes, response: Dict[str, Any]) -> None:
+        """Store a non-empty response."""
+        if response and response.get("response"):
+            self._cache[key] = response
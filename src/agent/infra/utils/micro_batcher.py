@@ -0,0 +1,78 @@
+import asyncio
+from typing import Any, Awaitable, Callable, List, Optional, Set, Tuple
+
+
+class MicroBatcher:
+    """Collect concurrent submissions into batches for one bulk call."""
+
+    def __init__(
+        self,
+        process: Callable[[List[Any]], Awaitable[List[Any]]],
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5,
+    ):
+        """
+        Args:
+            process: Coroutine function mapping a batch of items to results
+                in the same order.
+            max_batch_size: Flush as soon as this many items are waiting.
+            max_wait_ms: Maximum time the first item of a batch waits.
+        """
+        self._process = process
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue: Optional[asyncio.Queue] = None
+        self._full: Optional[asyncio.Event] = None
+        self._worker: Optional[asyncio.Task] = None
+        # Giữ tham chiếu tới các batch đang xử lý để task không bị GC
+        self._dispatches: Set[asyncio.Task] = set()
+
+    async def submit(self, item: Any) -> Any:
+        """Queue an item and wait for its result from the next batch."""
+
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._full = asyncio.Event()
+            self._worker = asyncio.create_task(self._run())
+
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((item, future))
+        if self._queue.qsize() >= self.max_batch_size:
+            self._full.set()
+        return await future
+
+    async def _run(self) -> None:
+        while True:
+            batch = [await self._queue.get()]
+            if self._queue.qsize() + 1 < self.max_batch_size:
+                try:
+                    await asyncio.wait_for(self._full.wait(), self.max_wait)
+                except asyncio.TimeoutError:
+                    pass
+            self._full.clear()
+
+            while len(batch) < self.max_batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            if self._queue.qsize() >= self.max_batch_size:
+                self._full.set()
+
+            # Batch sau bắt đầu gom ngay, không chờ batch này xử lý xong
+            task = asyncio.create_task(self._dispatch(batch))
+            self._dispatches.add(task)
+            task.add_done_callback(self._dispatches.discard)
+
+    async def _dispatch(self, batch: List[Tuple[Any, asyncio.Future]]) -> None:
+        # Bỏ các caller đã hủy trước khi gọi xuống backend
+        pending = [(item, fut) for item, fut in batch if not fut.done()]
+        if not pending:
+            return
+        try:
+            results = await self._process([item for item, _ in pending])
+        except Exception as e:
+            for _, fut in pending:
+                if not fut.done():
+                    fut.set_exception(e)
+            return
+        for (_, fut), result in zip(pending, results):
+            if not fut.done():
+                fut.set_result(result)
@@ -1,48 +1,64 @@
 import re
 from typing import List
 
-from langchain_core.messages import BaseMessage
+from langchain_core.messages import BaseMessage, SystemMessage
 from langchain_core.prompts import ChatPromptTemplate
 
 from ...shared.logging.logger import Logger
 
 logger = Logger.get_logger(__name__)
 
+# Một regex duy nhất cho mọi thuật ngữ thị trường VN, không phân biệt hoa thường
+_VN_TERMS_RE = re.compile(
+    "|".join(
+        map(
+            re.escape,
+            [
+                "Vietnam stock",
+                "Vietnamese stock market",
+                "HOSE",
+                "HNX",
+                "UPCoM",
+                "chứng khoán Việt Nam",
+                "thị trường chứng khoán",
+            ],
+        )
+    ),
+    re.IGNORECASE,
+)
+_TICKER_RE = re.compile(r"\b[A-Z]{2,4}\b")
+
 
 class QueryEnhancer:
     """Utility to enhance queries and messages with Vietnamese stock market context."""
 
-    def enhance_query(self, query: str) -> str:
-        """Enhance a single query for Vietnamese stock market context."""
-
-        vietnamese_market_terms = [
-            "Vietnam stock",
-            "Vietnamese stock market",
-            "HOSE",
-            "HNX",
-            "UPCoM",
-            "chứng khoán Việt Nam",
-            "thị trường chứng khoán",
+    _QUERY_PROMPT = ChatPromptTemplate.from_messages(
+        [
+            (
+                "system",
+                "You are an expert in the Vietnamese stock market, including HOSE, HNX, and UPCoM. "
+                "Refine the following query to focus on Vietnamese stock market information.",
+            ),
+            ("human", "Original query: {query}"),
         ]
-        query_lower = query.lower()
-        has_vn_context = any(
-            term.lower() in query_lower for term in vietnamese_market_terms
-        )
-
-        system_prompt = (
+    )
+    # System message cố định, chỉ cần chèn vào đầu danh sách mỗi lần gọi
+    _MESSAGES_SYSTEM = SystemMessage(
+        content=(
             "You are an expert in the Vietnamese stock market, including HOSE, HNX, and UPCoM. "
-            "Refine the following query to focus on Vietnamese stock market information."
-        )
-        prompt_template = ChatPromptTemplate.from_messages(
-            [("system", system_prompt), ("human", "Original query: {query}")]
+            "Provide accurate and relevant information about Vietnamese stocks, market news, and financial data."
         )
+    )
+
+    def enhance_query(self, query: str) -> str:
+        """Enhance a single query for Vietnamese stock market context."""
 
         try:
-            formatted_query = prompt_template.format_messages(query=query)[
+            formatted_query = self._QUERY_PROMPT.format_messages(query=query)[
                 1
             ].content
-            if not has_vn_context:
-                if re.search(r"\b[A-Z]{2,4}\b", query):
+            if not _VN_TERMS_RE.search(query):
+                if _TICKER_RE.search(query):
                     formatted_query += " Vietnam stock HOSE HNX"
                 else:
                     formatted_query += " Vietnamese stock market"
@@ -57,20 +73,4 @@ class QueryEnhancer:
     ) -> List[BaseMessage]:
         """Enhance messages with Vietnamese stock market context."""
 
-        system_prompt = (
-            "You are an expert in the Vietnamese stock market, including HOSE, HNX, and UPCoM. "
-            "Provide accurate and relevant information about Vietnamese stocks, market news, and financial data."
-        )
-        prompt_template = ChatPromptTemplate.from_messages(
-            [
-                ("system", system_prompt),
-                *[(m.type, m.content) for m in messages],
-            ]
-        )
-        try:
-            return prompt_template.format_messages()
-
-        except Exception as e:
-            logger.error(f"Message enhancement failed: {str(e)}")
-
-            return messages
+        return [self._MESSAGES_SYSTEM, *messages]
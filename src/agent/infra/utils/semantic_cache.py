@@ -0,0 +1,114 @@
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+class SemanticCache:
+    """Bounded LRU cache keyed by query embeddings with fuzzy cosine matching."""
+
+    def __init__(
+        self,
+        threshold: float = 0.95,
+        max_entries: int = 256,
+        ttl_seconds: float = 600,
+    ):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        # {query: (normalized vector, value, timestamp)}
+        self._entries: "OrderedDict[str, Tuple[np.ndarray, Any, float]]" = (
+            OrderedDict()
+        )
+        # Ma trận khóa (N x D) được dựng lại khi cache thay đổi
+        self._matrix: Optional[np.ndarray] = None
+        self._queries: List[str] = []
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_exact(self, query: str) -> Optional[Any]:
+        """Return the cached value for an identical query, if still fresh."""
+
+        entry = self._entries.get(query)
+        if entry is None or self._expired(entry[2]):
+            return None
+        self._entries.move_to_end(query)
+        self.exact_hits += 1
+        return entry[1]
+
+    def lookup(self, vector: List[float]) -> Optional[Any]:
+        """
+        Return the cached value whose key is most similar to the vector.
+
+        Args:
+            vector: Query embedding.
+
+        Returns:
+            Cached value if cosine similarity >= threshold, otherwise None.
+        """
+        if not self._entries:
+            self.misses += 1
+            return None
+
+        matrix = self._key_matrix()
+        scores = matrix @ self._normalize(vector)
+        best = int(scores.argmax())
+        if scores[best] < self.threshold:
+            self.misses += 1
+            return None
+
+        query = self._queries[best]
+        _, value, ts = self._entries[query]
+        if self._expired(ts):
+            self.misses += 1
+            return None
+        self._entries.move_to_end(query)
+        self.semantic_hits += 1
+        return value
+
+    def put(self, query: str, vector: List[float], value: Any) -> None:
+        """Insert a value, evicting the least recently used entry when full."""
+
+        self._entries[query] = (self._normalize(vector), value, time.time())
+        self._entries.move_to_end(query)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+        self._matrix = None
+
+    def clear(self) -> None:
+        """Drop every entry (e.g. after the underlying data changed)."""
+
+        self._entries.clear()
+        self._matrix = None
+
+    def get_stats(self) -> Dict[str, int]:
+        """Return hit/miss/eviction counters and the current size."""
+
+        return {
+            "size": len(self._entries),
+            "exact_hits": self.exact_hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def _key_matrix(self) -> np.ndarray:
+        if self._matrix is None:
+            self._queries = list(self._entries)
+            self._matrix = np.stack(
+                [self._entries[q][0] for q in self._queries]
+            )
+        return self._matrix
+
+    def _expired(self, ts: float) -> bool:
+        return time.time() - ts > self.ttl_seconds
+
+    @staticmethod
+    def _normalize(vector: List[float]) -> np.ndarray:
+        arr = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(arr)
+        return arr / norm if norm else arr
@@ -0,0 +1,28 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict
+
+
+class SingleFlight:
+    """Coalesce concurrent calls with the same key into one in-flight task."""
+
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    async def do(self, key: str, func: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run ``func`` once per key; concurrent callers await the same result.
+
+        Args:
+            key: Deduplication key (e.g. the normalized query).
+            func: Zero-argument coroutine function doing the actual work.
+
+        Returns:
+            The result of ``func`` (or raises its exception) for every caller.
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(func())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # shield: một caller bị hủy không hủy request của các caller khác
+        return await asyncio.shield(task)
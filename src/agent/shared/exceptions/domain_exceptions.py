@@ -24,3 +24,18 @@ class DocumentProcessingError(StockAssistantException):
     """Raised when document processing fails"""
 
     pass
+
+
+class ChatProviderError(StockAssistantException):
+    """Raised when a chat provider call fails"""
+
+    def __init__(self, provider: str, original: Exception):
+        self.provider = provider
+        self.original = original
+        super().__init__(f"{provider} chat failed: {original}")
+
+
+class RetriableChatError(ChatProviderError):
+    """Raised when a chat provider call fails transiently (rate limit, timeout)"""
+
+    pass
@@ -1,37 +1,70 @@
 # src/stock_assistant/shared/logging/logger.py
+import atexit
 import logging
 import os
+import queue
 import sys
-from datetime import datetime
+from logging.handlers import (
+    QueueHandler,
+    QueueListener,
+    TimedRotatingFileHandler,
+)
 from pathlib import Path
-from typing import Optional
+from typing import Dict, List, Optional
 
 
 class Logger:
-    _instance: Optional[logging.Logger] = None
+    _instances: Dict[str, logging.Logger] = {}
+    _queue: Optional[queue.SimpleQueue] = None
+    _listener: Optional[QueueListener] = None
 
     @classmethod
     def get_logger(cls, name: str = "stock_assistant") -> logging.Logger:
         """
-        Trả về một instance logger duy nhất (singleton).
+        Trả về logger duy nhất cho mỗi name (singleton theo name).
         """
-        if cls._instance is None:
-            cls._instance = cls._setup_logger(name)
-        return cls._instance
+        logger = cls._instances.get(name)
+        if logger is None:
+            logger = cls._instances[name] = cls._setup_logger(name)
+        return logger
 
     @classmethod
     def _setup_logger(cls, name: str) -> logging.Logger:
         """
-        Cấu hình logger để ghi cả console và file.
-        File log sẽ đặt tên theo ngày hiện tại trong thư mục logs/
+        Gắn QueueHandler vào logger; việc ghi console/file do một
+        QueueListener chạy nền đảm nhận, không chặn event loop.
         """
         logger = logging.getLogger(name)
         logger.setLevel(logging.INFO)
 
         # Tránh thêm nhiều handler nếu logger đã có handler
-        if logger.hasHandlers():
+        if logger.handlers:
             return logger
 
+        logger.addHandler(QueueHandler(cls._get_queue()))
+        # Không đẩy lên root logger: tránh in mỗi dòng hai lần khi root có handler
+        logger.propagate = False
+        return logger
+
+    @classmethod
+    def _get_queue(cls) -> queue.SimpleQueue:
+        """Tạo queue và khởi động QueueListener dùng chung (một lần)."""
+        if cls._queue is None:
+            cls._queue = queue.SimpleQueue()
+            cls._listener = QueueListener(
+                cls._queue, *cls._build_handlers(), respect_handler_level=True
+            )
+            cls._listener.start()
+            # Xả hết log còn trong queue khi process kết thúc
+            atexit.register(cls._listener.stop)
+        return cls._queue
+
+    @staticmethod
+    def _build_handlers() -> List[logging.Handler]:
+        """
+        Cấu hình handler ghi cả console và file.
+        File log xoay vòng lúc nửa đêm trong thư mục logs/
+        """
         # Formatter hiển thị thời gian, level, file, dòng, hàm, message
         formatter = logging.Formatter(
             "%(asctime)s - %(levelname)s - %(filename)s:%(lineno)d - %(funcName)s() - %(message)s"
@@ -40,7 +73,7 @@ class Logger:
         # Console handler
         console_handler = logging.StreamHandler(sys.stdout)
         console_handler.setFormatter(formatter)
-        logger.addHandler(console_handler)
+        handlers: List[logging.Handler] = [console_handler]
 
         # File handler
         try:
@@ -50,16 +83,15 @@ class Logger:
             )
             os.makedirs(log_dir, exist_ok=True)
 
-            # File log theo ngày hiện tại: 2025-08-19.log
-            today_str = datetime.now().strftime("%Y-%m-%d")
-            log_file_path = log_dir / f"{today_str}.log"
-
-            file_handler = logging.FileHandler(log_file_path, encoding="utf-8")
+            # app.log của ngày hiện tại, file cũ đổi tên: app.log.2025-08-19
+            file_handler = TimedRotatingFileHandler(
+                log_dir / "app.log", when="midnight", encoding="utf-8"
+            )
             file_handler.setFormatter(formatter)
-            logger.addHandler(file_handler)
+            handlers.append(file_handler)
 
         except Exception as e:
             # Nếu không tạo được file log, vẫn ghi ra console
-            logger.warning(f"Không thể tạo hoặc ghi vào tệp log: {e}")
+            sys.stderr.write(f"Không thể tạo hoặc ghi vào tệp log: {e}\n")
 
-        return logger
+        return handlers
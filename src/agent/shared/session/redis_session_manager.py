@@ -1,27 +1,47 @@
 import asyncio
-import json
 import os
+import secrets
 import time
-import uuid
+from contextlib import asynccontextmanager
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional
 
+import orjson
 import redis.asyncio as redis
-from langchain_community.chat_message_histories import RedisChatMessageHistory
+from cachetools import TTLCache
 from langchain_core.messages import (
     AIMessage,
     BaseMessage,
     HumanMessage,
     SystemMessage,
 )
+from redis.asyncio.retry import Retry
+from redis.backoff import ExponentialBackoff
 
 from ...shared.logging.logger import Logger
 from ...shared.settings.settings import settings
+from .session_manager import StripedLock
 
 logger = Logger.get_logger(__name__)
 
+# Pool kết nối dùng chung cho mọi LangChainRedisSessionManager trong process
+_POOL: Optional[redis.ConnectionPool] = None
 
-@dataclass
+# Chỉ xóa lock nếu token vẫn khớp (lock có thể đã hết hạn và bị worker khác lấy)
+_RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+def _dumps(data: Any) -> bytes:
+    """Serialize to JSON bytes with orjson (non-str dict keys allowed)."""
+    return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+
+
+@dataclass(slots=True)
 class SessionData:
     session_id: str
     created_at: float
@@ -39,12 +59,26 @@ class LangChainRedisSessionManager:
             settings.redis, "default_ttl", 3600
         )
         self.redis = None
-        self._lock = asyncio.Lock()
+        self._release_lock = None
+        self.max_history = getattr(settings.session, "max_history", 200)
+        self.max_age = getattr(settings.session, "max_age", 86400)
+        self.lock_timeout = getattr(settings.redis, "lock_timeout", 10)
+        self.lock_wait_timeout = getattr(
+            settings.redis, "lock_wait_timeout", 5
+        )
+        # Coroutine cùng process xếp hàng ở lock cục bộ trước khi gọi Redis
+        self._local_locks = StripedLock()
+        # Cache rất ngắn trong process: các lần get_session lặp lại trong
+        # cùng một request không cần round-trip Redis
+        self._session_cache: TTLCache = TTLCache(
+            maxsize=getattr(settings.redis, "session_cache_size", 1024),
+            ttl=getattr(settings.redis, "session_cache_ttl", 2),
+        )
         logger.info(
             f"LangChainRedisSessionManager initialized - TTL: {self.default_ttl}s"
         )
 
-    def start(self):
+    async def start(self):
         """Initialize Redis connection to ElastiCache with password-based auth."""
         try:
             logger.info("Initializing Redis connection to ElastiCache...")
@@ -79,25 +113,34 @@ class LangChainRedisSessionManager:
                 os.getenv("REDIS_HEALTH_CHECK_INTERVAL", 30)
             )
 
-            self.redis = redis.Redis(
-                host=redis_host,  # ElastiCache endpoint: ai-agent-redis-cluster.xxxxx.0001.use1.cache.amazonaws.com
-                port=redis_port,
-                db=redis_db,
-                password=redis_password,  # Auth token từ Parameter Store
-                decode_responses=True,
-                # ssl=True,  # TLS required
-                # ssl_cert_reqs=None,  # Bỏ qua SSL verification (production: dùng CA cert)
-                max_connections=pool_size,
-                socket_timeout=socket_timeout,
-                socket_connect_timeout=connection_timeout,
-                health_check_interval=health_check_interval,
-                retry_on_timeout=True,
-                # socket_keepalive=True,
-                # retry_on_error=[ConnectionError],
+            global _POOL
+            if _POOL is None:
+                _POOL = redis.ConnectionPool(
+                    host=redis_host,  # ElastiCache endpoint: ai-agent-redis-cluster.xxxxx.0001.use1.cache.amazonaws.com
+                    port=redis_port,
+                    db=redis_db,
+                    password=redis_password,  # Auth token từ Parameter Store
+                    # Trả bytes để orjson.loads dùng trực tiếp, không decode UTF-8
+                    decode_responses=False,
+                    # ssl=True,  # TLS required
+                    # ssl_cert_reqs=None,  # Bỏ qua SSL verification (production: dùng CA cert)
+                    max_connections=pool_size,
+                    socket_timeout=socket_timeout,
+                    socket_connect_timeout=connection_timeout,
+                    socket_keepalive=True,
+                    # PING kết nối đã rảnh quá interval trước khi dùng lại,
+                    # loại bỏ kết nối chết sau failover ElastiCache
+                    health_check_interval=health_check_interval,
+                    retry=Retry(ExponentialBackoff(), 3),
+                    retry_on_timeout=True,
+                )
+            self.redis = redis.Redis(connection_pool=_POOL)
+            self._release_lock = self.redis.register_script(
+                _RELEASE_LOCK_SCRIPT
             )
 
             # Test connection
-            self.redis.ping()
+            await self.redis.ping()
             logger.info(
                 "Redis connection to ElastiCache established successfully"
             )
@@ -112,6 +155,8 @@ class LangChainRedisSessionManager:
             logger.info("Stopping Redis session manager...")
             if self.redis:
                 await self.redis.close()
+                # Pool truyền vào từ ngoài không tự đóng theo client
+                await self.redis.connection_pool.disconnect()
                 logger.info("Redis connection closed")
             logger.info("Redis session manager stopped successfully")
         except Exception as e:
@@ -122,161 +167,171 @@ class LangChainRedisSessionManager:
         self, metadata: Optional[Dict[str, Any]] = {}
     ) -> str:
         """Create a new session with a unique ID."""
-        async with self._lock:
-            session_id = str(uuid.uuid4())
-            session_data = SessionData(
-                session_id=session_id,
-                created_at=time.time(),
-                last_accessed=time.time(),
-                analysis_cache={},
-                metadata=metadata,
-                conversation_history=[],
-            )
-            await self.redis.setex(
-                self._get_session_key(session_id),
-                self.default_ttl,
-                json.dumps(self._serialize_session_data(session_data)),
-            )
-            return session_id
+        # 128 bit ngẫu nhiên, một syscall, không qua đối tượng UUID
+        session_id = secrets.token_hex(16)
+        session_data = SessionData(
+            session_id=session_id,
+            created_at=time.time(),
+            last_accessed=time.time(),
+            analysis_cache={},
+            metadata=metadata or {},
+            conversation_history=[],
+        )
+        await self.redis.setex(
+            self._get_session_key(session_id),
+            self.default_ttl,
+            self._serialize_session_data(session_data),
+        )
+        self._session_cache[session_id] = session_data
+        return session_id
 
     async def create_session_with_id(
         self, session_id: str, metadata: Optional[Dict[str, Any]] = {}
     ):
         """Create a session with a specific ID, checking if it already exists."""
-        async with self._lock:
-            if not session_id or not session_id.strip():
-                logger.error(
-                    "Attempted to create session with empty session_id"
-                )
-                raise ValueError("Session ID cannot be empty")
-
-            session_key = self._get_session_key(session_id)
-            exists = await self.redis.exists(session_key)
-            if exists:
-                logger.error(f"Session with ID {session_id} already exists")
-                raise ValueError(
-                    f"Session with ID {session_id} already exists"
-                )
-
-            session_data = SessionData(
-                session_id=session_id,
-                created_at=time.time(),
-                last_accessed=time.time(),
-                analysis_cache={},
-                metadata=metadata,
-                conversation_history=[],
-            )
-            await self.redis.setex(
-                session_key,
-                self.default_ttl,
-                json.dumps(self._serialize_session_data(session_data)),
-            )
-            logger.info(f"Created session with ID: {session_id}")
+        if not session_id or not session_id.strip():
+            logger.error("Attempted to create session with empty session_id")
+            raise ValueError("Session ID cannot be empty")
+
+        session_data = SessionData(
+            session_id=session_id,
+            created_at=time.time(),
+            last_accessed=time.time(),
+            analysis_cache={},
+            metadata=metadata or {},
+            conversation_history=[],
+        )
+        # SET NX: tạo nếu chưa tồn tại trong một lệnh nguyên tử (thay EXISTS + SETEX)
+        created = await self.redis.set(
+            self._get_session_key(session_id),
+            self._serialize_session_data(session_data),
+            ex=self.default_ttl,
+            nx=True,
+        )
+        if not created:
+            logger.error(f"Session with ID {session_id} already exists")
+            raise ValueError(f"Session with ID {session_id} already exists")
+        self._session_cache[session_id] = session_data
+        logger.info(f"Created session with ID: {session_id}")
 
     async def get_session(self, session_id: str) -> Optional[SessionData]:
         """Get session data by ID."""
+        session_data = self._session_cache.get(session_id)
+        if session_data is not None:
+            session_data.last_accessed = time.time()
+            return session_data
+
         try:
             session_key = self._get_session_key(session_id)
-            data = await self.redis.get(session_key)
+            # GETEX: đọc và gia hạn TTL trong một lệnh, không ghi lại cả blob
+            data = await self.redis.getex(session_key, ex=self.default_ttl)
             if data:
-                session_data = self._deserialize_session_data(json.loads(data))
-                session_data.last_accessed = time.time()
-                await self.redis.setex(
-                    session_key,
-                    self.default_ttl,
-                    json.dumps(self._serialize_session_data(session_data)),
-                )
+                session_data = self._deserialize_session_data(data)
+                now = time.time()
+                # Hạn cứng theo created_at: session bị truy cập liên tục
+                # (vd. id bị lộ) cũng không sống quá max_age
+                if now - session_data.created_at > self.max_age:
+                    await self.delete_session(session_id)
+                    return None
+                # Chỉ cập nhật trong bộ nhớ; được lưu khi session ghi lại
+                session_data.last_accessed = now
+                self._session_cache[session_id] = session_data
                 return session_data
             return None
         except Exception as e:
             logger.error(f"Failed to get session {session_id}: {str(e)}")
             return None
 
+    @asynccontextmanager
+    async def lock(self, session_id: str) -> AsyncIterator[None]:
+        """
+        Distributed per-session lock (SET NX EX) shared by all workers.
+
+        Raises:
+            TimeoutError: If the lock is not acquired within
+                lock_wait_timeout seconds.
+        """
+        lock_key = self._get_lock_key(session_id)
+        token = secrets.token_bytes(16)
+        async with self._local_locks(session_id):
+            delay = 0.005
+            deadline = time.monotonic() + self.lock_wait_timeout
+            while not await self.redis.set(
+                lock_key, token, nx=True, ex=self.lock_timeout
+            ):
+                if time.monotonic() >= deadline:
+                    raise TimeoutError(
+                        f"Could not acquire lock for session {session_id}"
+                    )
+                # Backoff 5ms -> 10ms -> 20ms ..., tối đa 100ms
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 0.1)
+            try:
+                yield
+            finally:
+                await self._release_lock(keys=[lock_key], args=[token])
+
     async def update_conversation(self, session_id: str, message: BaseMessage):
-        """Update conversation history using RedisChatMessageHistory."""
+        """Append a message to the session history list and session data."""
+        if not isinstance(message, (HumanMessage, AIMessage, SystemMessage)):
+            return
+
         try:
-            history = RedisChatMessageHistory(
-                session_id=session_id,
-                url=f"redis://{settings.redis.username}:{settings.redis.password}@{settings.redis.host}:{settings.redis.port}/{settings.redis.db}",
-                ttl=self.default_ttl,
-            )
-            if isinstance(message, HumanMessage):
-                history.add_user_message(message.content)
-            elif isinstance(message, AIMessage):
-                history.add_ai_message(message.content)
-            elif isinstance(message, SystemMessage):
-                history.add_message(message)
-            logger.info(f"Updated conversation for session: {session_id}")
-
-            # Update session data with conversation history
-            session_data = await self.get_session(session_id)
-            if session_data:
-                session_data.conversation_history = [
-                    {"type": msg.__class__.__name__, "content": msg.content}
-                    for msg in history.messages
-                ]
-                await self.redis.setex(
-                    self._get_session_key(session_id),
-                    self.default_ttl,
-                    json.dumps(self._serialize_session_data(session_data)),
-                )
+            history_key = self._get_history_key(session_id)
+            entry = {
+                "type": message.__class__.__name__,
+                "content": message.content,
+            }
+            # Cả append lẫn snapshot history đều nằm dưới lock, nếu không
+            # worker giữ snapshot cũ hơn có thể ghi đè session blob sau
+            async with self.lock(session_id):
+                # RPUSH + EXPIRE + LRANGE trong một round-trip, dùng pool
+                # chung; LTRIM giữ lại max_history message mới nhất
+                async with self.redis.pipeline(transaction=False) as pipe:
+                    pipe.rpush(history_key, orjson.dumps(entry))
+                    pipe.ltrim(history_key, -self.max_history, -1)
+                    pipe.expire(history_key, self.default_ttl)
+                    pipe.lrange(history_key, 0, -1)
+                    _, _, _, history = await pipe.execute()
+                logger.info(f"Updated conversation for session: {session_id}")
+
+                # Đọc lại session từ Redis để không ghi đè thay đổi khác
+                self._session_cache.pop(session_id, None)
+                session_data = await self.get_session(session_id)
+                if session_data:
+                    session_data.conversation_history = [
+                        orjson.loads(item) for item in history
+                    ]
+                    await self.redis.setex(
+                        self._get_session_key(session_id),
+                        self.default_ttl,
+                        self._serialize_session_data(session_data),
+                    )
         except Exception as e:
+            self._session_cache.pop(session_id, None)
             logger.error(
                 f"Failed to update conversation for session {session_id}: {str(e)}"
             )
 
-    # # Hàm update_conversation (tích hợp với RedisChatMessageHistory)
-    # async def update_conversation(self, session_id: str, message: BaseMessage):
-    #     """Update conversation history using RedisChatMessageHistory."""
-    #     try:
-    #         # Lấy settings từ environment variables
-    #         redis_host = os.getenv('REDIS_HOST', settings.redis.host)
-    #         redis_port = int(os.getenv('REDIS_PORT', getattr(settings.redis, 'port', 6379)))
-    #         redis_password = os.getenv('REDIS_PASSWORD')  # Từ Parameter Store
-
-    #         redis_url = f"rediss://:{redis_password}@{redis_host}:{redis_port}/0"
-    #         history = RedisChatMessageHistory(
-    #             session_id=session_id,
-    #             url=redis_url,
-    #             ttl=self.default_ttl,
-    #         )
-    #         if isinstance(message, HumanMessage):
-    #             history.add_user_message(message.content)
-    #         elif isinstance(message, AIMessage):
-    #             history.add_ai_message(message.content)
-    #         elif isinstance(message, SystemMessage):
-    #             history.add_message(message)
-    #         logger.info(f"Updated conversation for session: {session_id}")
-
-    #         # Update session data
-    #         session_data = await self.get_session(session_id)
-    #         if session_data:
-    #             session_data.conversation_history = [
-    #                 {"type": msg.__class__.__name__, "content": msg.content}
-    #                 for msg in history.messages
-    #             ]
-    #             await self.redis.setex(
-    #                 self._get_session_key(session_id),
-    #                 self.default_ttl,
-    #                 json.dumps(self._serialize_session_data(session_data)),
-    #             )
-    #     except Exception as e:
-    #         logger.error(f"Failed to update conversation for session {session_id}: {str(e)}")
-    #         raise
-
     async def get_cached_analysis(
         self, session_id: str, query_hash: str, cache_ttl: int
     ) -> Optional[Dict[str, Any]]:
-        """Get cached analysis result."""
+        """
+        Get cached analysis result.
+
+        Hết hạn do TTL của key trong Redis (đặt lúc cache_analysis),
+        không tính lại bằng thời gian trong Python.
+        """
         if not session_id or not session_id.strip():
             logger.warning("get_cached_analysis called with empty session_id")
             return None
 
         try:
-            cache_key = f"cache:{session_id}:{query_hash}"
-            cached = await self.redis.get(cache_key)
+            cached = await self.redis.get(
+                self._get_cache_key(session_id, query_hash)
+            )
             if cached:
-                return json.loads(cached)
+                return orjson.loads(cached)
             return None
         except Exception as e:
             logger.error(
@@ -285,23 +340,30 @@ class LangChainRedisSessionManager:
             return None
 
     async def cache_analysis(
-        self, session_id: str, query_hash: str, result: Dict[str, Any]
+        self,
+        session_id: str,
+        query_hash: str,
+        result: Dict[str, Any],
+        cache_ttl: Optional[int] = None,
     ):
-        """Cache analysis result."""
+        """Cache analysis result for cache_ttl seconds (or session TTL)."""
         if not session_id or not session_id.strip():
             logger.warning("cache_analysis called with empty session_id")
             return
 
         try:
-            cache_key = f"cache:{session_id}:{query_hash}"
-            await self.redis.setex(
-                cache_key,
-                self.default_ttl,
-                json.dumps(result, ensure_ascii=False),
-            )
-            logger.info(
-                f"Cached analysis for session: {session_id}, query: {query_hash}"
+            # SET NX EX: giá trị và TTL trong một lệnh; nhiều process cùng
+            # phân tích một query thì bản ghi đầu tiên thắng, không cần lock
+            created = await self.redis.set(
+                self._get_cache_key(session_id, query_hash),
+                _dumps(result),
+                ex=cache_ttl or self.default_ttl,
+                nx=True,
             )
+            if created:
+                logger.info(
+                    f"Cached analysis for session: {session_id}, query: {query_hash}"
+                )
         except Exception as e:
             logger.error(
                 f"Failed to cache analysis for {session_id}: {str(e)}"
@@ -314,23 +376,20 @@ class LangChainRedisSessionManager:
             return
 
         session_id = session_id.strip()
+        self._session_cache.pop(session_id, None)
 
-        async with self._lock:
-            try:
-                session_key = self._get_session_key(session_id)
-                history_key = self._get_history_key(session_id)
-
-                result = await self.redis.delete(session_key, history_key)
-                if result > 0:
-                    logger.info(f"Session and history deleted: {session_id}")
-                else:
-                    logger.warning(
-                        f"Session not found for deletion: {session_id}"
-                    )
-            except Exception as e:
-                logger.error(
-                    f"Failed to delete session {session_id}: {str(e)}"
-                )
+        try:
+            session_key = self._get_session_key(session_id)
+            history_key = self._get_history_key(session_id)
+
+            # Một lệnh DEL cho cả hai key, Redis tự đảm bảo nguyên tử
+            result = await self.redis.delete(session_key, history_key)
+            if result > 0:
+                logger.info(f"Session and history deleted: {session_id}")
+            else:
+                logger.warning(f"Session not found for deletion: {session_id}")
+        except Exception as e:
+            logger.error(f"Failed to delete session {session_id}: {str(e)}")
 
     def _get_session_key(self, session_id: str) -> str:
         """Generate session key for Redis."""
@@ -340,60 +399,35 @@ class LangChainRedisSessionManager:
         """Generate history key for Redis."""
         return f"history:{session_id}"
 
-    def _serialize_session_data(self, session: SessionData) -> Dict[str, Any]:
-        """Serialize SessionData to dict for Redis storage."""
-        try:
-            return {
-                "session_id": session.session_id,
-                "created_at": session.created_at,
-                "last_accessed": session.last_accessed,
-                "analysis_cache": session.analysis_cache or {},
-                "metadata": session.metadata or {},
-                "conversation_history": session.conversation_history or [],
-                "version": "1.2",
-            }
-        except Exception as e:
-            logger.error(
-                f"Error serializing session {session.session_id}: {str(e)}"
-            )
-            return {
-                "session_id": session.session_id,
-                "created_at": time.time(),
-                "last_accessed": time.time(),
-                "analysis_cache": {},
-                "metadata": {},
-                "conversation_history": [],
-                "version": "1.2",
-            }
+    def _get_lock_key(self, session_id: str) -> str:
+        """Generate session lock key for Redis."""
+        return f"lock:{session_id}"
 
-    def _deserialize_session_data(self, data: Dict[str, Any]) -> SessionData:
-        """Deserialize dict to SessionData with validation."""
-        try:
-            return SessionData(
-                session_id=data.get("session_id", ""),
-                created_at=data.get("created_at", time.time()),
-                last_accessed=data.get("last_accessed", time.time()),
-                analysis_cache=data.get("analysis_cache", {}),
-                metadata=data.get("metadata", {}),
-                conversation_history=data.get("conversation_history", []),
-            )
-        except Exception as e:
-            logger.error(f"Error deserializing session data: {str(e)}")
-            return SessionData(
-                session_id=data.get("session_id", "unknown"),
-                created_at=time.time(),
-                last_accessed=time.time(),
-                analysis_cache={},
-                metadata={},
-                conversation_history=[],
-            )
+    def _get_cache_key(self, session_id: str, query_hash: str) -> str:
+        """Generate analysis cache key for Redis."""
+        return f"cache:{session_id}:{query_hash}"
+
+    def _serialize_session_data(self, session: SessionData) -> bytes:
+        """Serialize SessionData to JSON bytes for Redis storage."""
+        # orjson đọc trực tiếp các field của dataclass, không qua dict trung gian
+        return _dumps(session)
+
+    def _deserialize_session_data(self, data: bytes) -> SessionData:
+        """Deserialize JSON bytes from Redis to SessionData."""
+        fields = orjson.loads(data)
+        # Bỏ khóa version của định dạng cũ
+        fields.pop("version", None)
+        return SessionData(**fields)
 
     async def get_stats(self) -> Dict[str, Any]:
         """Get session manager statistics."""
         try:
-            keys = await self.redis.keys("session:*")
+            # SCAN theo từng đợt thay vì KEYS (O(N) và chặn Redis)
+            active_sessions = 0
+            async for _ in self.redis.scan_iter(match="session:*", count=1000):
+                active_sessions += 1
             return {
-                "active_sessions": len(keys),
+                "active_sessions": active_sessions,
                 "ttl": self.default_ttl,
                 "cleanup_interval": None,
             }
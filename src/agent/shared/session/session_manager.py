@@ -1,29 +1,83 @@
 import asyncio
+import heapq
+import logging
+import random
+import secrets
 import time
-import uuid
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
 from dataclasses import dataclass
-from typing import Any, Dict, Optional
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Tuple
 
+from ...shared.logging.logger import Logger
+from ...shared.settings.settings import settings
 
-@dataclass
+logger = Logger.get_logger(__name__)
+
+
+@dataclass(slots=True)
 class SessionData:
     session_id: str
     created_at: float
+    # time.monotonic(), chỉ dùng để so sánh TTL
     last_accessed: float
-    conversation_history: list
-    analysis_cache: Dict[str, Any]
+    # min(last_accessed + ttl, max_expires_at), tính sẵn để so sánh hết hạn
+    # bằng một phép so sánh
+    expires_at: float
+    # Hạn cứng = lúc tạo + max_age (monotonic); truy cập không gia hạn quá mốc này
+    max_expires_at: float
+    # deque(maxlen=...): message cũ nhất tự bị bỏ khi vượt giới hạn
+    conversation_history: Deque[Dict[str, Any]]
+    # LRU: mục mới/được đọc nằm cuối, mục lạnh nhất bị bỏ ở đầu
+    analysis_cache: "OrderedDict[str, Dict[str, Any]]"
     metadata: Dict[str, Any]
 
 
+class StripedLock:
+    """Fixed pool of asyncio locks; each key always maps to the same lock."""
+
+    def __init__(self, stripes: int = 64):
+        self._locks = [asyncio.Lock() for _ in range(stripes)]
+
+    def __call__(self, key: str) -> asyncio.Lock:
+        return self._locks[hash(key) % len(self._locks)]
+
+
 class InMemorySessionManager:
     """In-memory session manager with TTL support"""
 
-    def __init__(self, default_ttl: int = 3600, cleanup_interval: int = 300):
+    def __init__(
+        self,
+        default_ttl: int = 3600,
+        cleanup_interval: int = 300,
+        cleanup_probability: float = 0.01,
+        lock_stripes: int = 64,
+        max_age: Optional[int] = None,
+    ):
         self.sessions: Dict[str, SessionData] = {}
         self.default_ttl = default_ttl
+        self.max_age = max_age or getattr(settings.session, "max_age", 86400)
+        self.max_cached_analyses = getattr(
+            settings.session, "max_cached_analyses", 128
+        )
+        # Task nền quét thưa (chỉ các mục đã tới hạn trong heap) để dọn cả
+        # session không bao giờ được đọc lại
         self.cleanup_interval = cleanup_interval
         self.cleanup_task = None
+        # Xác suất mỗi lần get_session dọn kèm vài session hết hạn giữa
+        # các lần quét
+        self.cleanup_probability = cleanup_probability
+        # Chỉ ghi lại last_accessed khi đã cũ hơn 10% TTL; sai lệch TTL
+        # vài phút không quan trọng, đổi lại bỏ được phần lớn lượt ghi
+        self._touch_interval = default_ttl * 0.1
+        # _lock chỉ bảo vệ thêm/xóa key trong self.sessions; thao tác trên
+        # từng session dùng lock theo stripe để các session khác nhau chạy song song
         self._lock = asyncio.Lock()
+        self._stripe = StripedLock(lock_stripes)
+        # Min-heap (hạn hết TTL, session_id), mỗi session một mục.
+        # Truy cập không đẩy mục mới: khi tới hạn mà session vẫn còn được
+        # dùng thì cleanup đẩy lại với hạn mới
+        self._expiry_heap: List[Tuple[float, str]] = []
 
     async def start(self):
         """Start background cleanup task"""
@@ -38,25 +92,34 @@ class InMemorySessionManager:
                 await self.cleanup_task
             except asyncio.CancelledError:
                 pass
+            self.cleanup_task = None
 
     async def create_session(
         self, metadata: Optional[Dict[str, Any]] = None
     ) -> str:
         """Create new session with TTL"""
-        session_id = str(uuid.uuid4())
-        current_time = time.time()
+        # 128 bit ngẫu nhiên, một syscall, không qua đối tượng UUID
+        session_id = secrets.token_hex(16)
+        current_time = time.monotonic()
 
         session_data = SessionData(
             session_id=session_id,
-            created_at=current_time,
+            created_at=time.time(),
             last_accessed=current_time,
-            conversation_history=[],
-            analysis_cache={},
+            expires_at=current_time + min(self.default_ttl, self.max_age),
+            max_expires_at=current_time + self.max_age,
+            conversation_history=deque(
+                maxlen=getattr(settings.session, "max_history", 200)
+            ),
+            analysis_cache=OrderedDict(),
             metadata=metadata or {},
         )
 
         async with self._lock:
             self.sessions[session_id] = session_data
+            heapq.heappush(
+                self._expiry_heap, (session_data.expires_at, session_id)
+            )
 
         return session_id
 
@@ -65,20 +128,58 @@ class InMemorySessionManager:
         if not session_id:
             return None
 
-        async with self._lock:
-            session = self.sessions.get(session_id)
-            if session:
-                session.last_accessed = time.time()
-                return session
+        # Đọc dict và gán float là nguyên tử với GIL, không cần lock
+        session = self._touch(session_id)
+
+        # Dọn rải theo lưu lượng request: ~1/100 lời gọi xử lý đầu heap.
+        # Nếu cả lô đều hết hạn thì còn tồn đọng, lặp lại với lô gấp đôi
+        if random.random() < self.cleanup_probability:
+            batch = 2
+            while (
+                len(await self._evict_expired(limit=batch)) == batch
+                and batch < 256
+            ):
+                batch *= 2
+        return session
+
+    def _touch(self, session_id: str) -> Optional[SessionData]:
+        """
+        Tra cứu session còn hạn và cập nhật last_accessed.
+        Session đã quá TTL được coi như không tồn tại và xóa luôn tại chỗ,
+        không chờ lần dọn tiếp theo (mục trong heap thành tombstone).
+        """
+        session = self.sessions.get(session_id)
+        if session is None:
+            return None
+        now = time.monotonic()
+        if now > session.expires_at:
+            self.sessions.pop(session_id, None)
             return None
+        if now - session.last_accessed > self._touch_interval:
+            session.last_accessed = now
+            session.expires_at = min(
+                now + self.default_ttl, session.max_expires_at
+            )
+        return session
+
+    @asynccontextmanager
+    async def _with_session(
+        self, session_id: str
+    ) -> AsyncIterator[Optional[SessionData]]:
+        """
+        Giữ stripe lock của session trong suốt khối with: tra cứu,
+        cập nhật last_accessed và thao tác trên session trong một lần lock.
+        Yield None nếu session không tồn tại.
+        """
+        async with self._stripe(session_id):
+            yield self._touch(session_id) if session_id else None
 
     async def update_conversation(
         self, session_id: str, message: Dict[str, Any]
     ):
         """Add message to conversation history"""
-        session = await self.get_session(session_id)
-        if session:
-            async with self._lock:
+        async with self._with_session(session_id) as session:
+            if session:
                 session.conversation_history.append(
                     {**message, "timestamp": time.time()}
                 )
@@ -87,57 +188,81 @@ class InMemorySessionManager:
         self, session_id: str, query_hash: str, result: Dict[str, Any]
     ):
         """Cache analysis result for session"""
-        session = await self.get_session(session_id)
-        if session:
-            async with self._lock:
-                session.analysis_cache[query_hash] = {
+        async with self._with_session(session_id) as session:
+            if session:
+                cache = session.analysis_cache
+                cache[query_hash] = {
                     "result": result,
-                    "cached_at": time.time(),
+                    "cached_at": time.monotonic(),
                 }
+                cache.move_to_end(query_hash)
+                if len(cache) > self.max_cached_analyses:
+                    cache.popitem(last=False)
 
     async def get_cached_analysis(
         self, session_id: str, query_hash: str, cache_ttl: int = 300
     ) -> Optional[Dict[str, Any]]:
         """Get cached analysis if not expired"""
-        session = await self.get_session(session_id)
-        if not session:
-            return None
+        async with self._with_session(session_id) as session:
+            if not session:
+                return None
 
-        cached = session.analysis_cache.get(query_hash)
-        if not cached:
-            return None
+            cached = session.analysis_cache.get(query_hash)
+            if not cached:
+                return None
 
-        if time.time() - cached["cached_at"] > cache_ttl:
-            # Cache expired
-            async with self._lock:
+            if time.monotonic() - cached["cached_at"] > cache_ttl:
+                # Cache expired
                 session.analysis_cache.pop(query_hash, None)
-            return None
+                return None
 
-        return cached["result"]
+            session.analysis_cache.move_to_end(query_hash)
+            return cached["result"]
 
     async def delete_session(self, session_id: str):
         """Delete session"""
-        async with self._lock:
+        async with self._stripe(session_id), self._lock:
             self.sessions.pop(session_id, None)
 
-    async def _cleanup_expired_sessions(self):
-        """Remove expired sessions"""
-        current_time = time.time()
+    async def _evict_expired(self, limit: Optional[int] = None) -> List[str]:
+        """
+        Pop due entries off the expiry heap (at most ``limit``) and delete
+        the sessions that really expired. Returns the deleted session ids.
+        """
+        current_time = time.monotonic()
         expired_sessions = []
+        heap = self._expiry_heap
+        popped = 0
 
         async with self._lock:
-            for session_id, session_data in self.sessions.items():
-                if (
-                    current_time - session_data.last_accessed
-                    > self.default_ttl
-                ):
+            # Chỉ duyệt các mục đã tới hạn: O(k log N) thay vì quét toàn bộ
+            while heap and heap[0][0] <= current_time:
+                if limit is not None and popped >= limit:
+                    break
+                popped += 1
+                _, session_id = heapq.heappop(heap)
+                session = self.sessions.get(session_id)
+                if session is None:
+                    # Session đã bị xóa, bỏ mục cũ
+                    continue
+                # Cùng phép so sánh với điều kiện vòng lặp, nếu không mục có
+                # expires_at == current_time bị đẩy lại đầu heap mãi mãi
+                if session.expires_at <= current_time:
+                    self.sessions.pop(session_id, None)
                     expired_sessions.append(session_id)
+                else:
+                    # Được truy cập sau lần đẩy trước, hẹn lại theo hạn mới
+                    heapq.heappush(heap, (session.expires_at, session_id))
 
-            for session_id in expired_sessions:
-                self.sessions.pop(session_id, None)
+        return expired_sessions
 
-        if expired_sessions:
-            print(f"Cleaned up {len(expired_sessions)} expired sessions")
+    async def _cleanup_expired_sessions(self):
+        """Remove all expired sessions (manual/admin hook)"""
+        expired_sessions = await self._evict_expired()
+        if expired_sessions and logger.isEnabledFor(logging.INFO):
+            logger.info(
+                "Cleaned up %d expired sessions", len(expired_sessions)
+            )
 
     async def _cleanup_loop(self):
         """Background cleanup loop"""
@@ -150,19 +275,21 @@ class InMemorySessionManager:
 
     def get_stats(self) -> Dict[str, Any]:
         """Get session statistics"""
-        current_time = time.time()
-        active_sessions = 0
-        total_conversations = 0
-        total_cached_analyses = 0
+        current_time = time.monotonic()
+        sessions = list(self.sessions.values())
 
-        for session in self.sessions.values():
-            if current_time - session.last_accessed < self.default_ttl:
-                active_sessions += 1
-            total_conversations += len(session.conversation_history)
-            total_cached_analyses += len(session.analysis_cache)
+        active_sessions = sum(
+            1 for session in sessions if session.expires_at > current_time
+        )
+        total_conversations = sum(
+            len(session.conversation_history) for session in sessions
+        )
+        total_cached_analyses = sum(
+            len(session.analysis_cache) for session in sessions
+        )
 
         return {
-            "total_sessions": len(self.sessions),
+            "total_sessions": len(sessions),
             "active_sessions": active_sessions,
             "total_conversations": total_conversations,
             "total_cached_analyses": total_cached_analyses,
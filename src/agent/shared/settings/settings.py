@@ -1,5 +1,6 @@
 import os
-from typing import Optional
+from functools import cached_property, lru_cache
+from typing import Dict, Optional, Type
 
 from dotenv import load_dotenv
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -39,6 +40,7 @@ class LLMSettings(BaseSettings):
     openai_presence_penalty: float = 0.0
     openai_timeout: int = 60
     openai_max_retries: int = 3
+    openai_cache_namespace: Optional[str] = "milano-agent"
 
     # Gemini
     gemini_model: str = "gemini-2.0-flash"
@@ -57,18 +59,50 @@ class LLMSettings(BaseSettings):
     # Safety
     enable_content_filter: bool = True
 
+    # Response cache
+    enable_response_cache: bool = True
+    cache_size: int = 1000
+    cache_ttl: int = 3600
+
     model_config = SettingsConfigDict(env_prefix="LLM_", case_sensitive=False)
 
 
 class QdrantSettings(BaseSettings):
     host: str = "qdrant-service.ai-agent.local"
     port: int = 6333
+    grpc_port: int = 6334
+    prefer_grpc: bool = True
     url: str = ""
     api_key: str = ""
     collection_name: str = "milano-agent-qdrant"
     vector_size: int = 1024
     distance: str = "Cosine"
     max_results: int = 5
+    hnsw_m: int = 16
+    hnsw_ef_construct: int = 100
+    hnsw_ef: int = 128
+    indexing_threshold: int = 10000  # KB, bật lại index sau khi bulk ingest
+    embeddings_chunk_size: int = 1000
+    upsert_batch_size: int = 64
+    upsert_concurrency: int = 4
+    quantization: Optional[str] = "int8"  # "int8", "binary" hoặc None
+    quantization_oversampling: float = 2.0
+    vector_datatype: str = "float16"  # "float32" hoặc "float16"
+    # Trường payload trả về khi search; None để lấy toàn bộ payload
+    payload_fields: Optional[list[str]] = [
+        "page_content",
+        "metadata.source",
+        "metadata.title",
+        "metadata.document_type",
+        "metadata.chunk_index",
+    ]
+    semantic_cache_threshold: float = 0.95
+    semantic_cache_size: int = 256
+    semantic_cache_ttl: int = 600
+    query_cache_size: int = 512  # 0 để tắt cache similarity_search
+    query_cache_ttl: int = 300
+    search_batch_size: int = 32  # <= 1 để tắt gom batch similarity_search
+    search_batch_wait_ms: float = 5
 
     model_config = SettingsConfigDict(
         env_prefix="QDRANT_", case_sensitive=False
@@ -81,6 +115,8 @@ class S3Settings(BaseSettings):
     aws_access_key_id: str
     aws_secret_access_key: str
     aws_region: str
+    max_concurrency: int = 8
+    max_head_concurrency: int = 32
 
     model_config = SettingsConfigDict(env_prefix="S3_", case_sensitive=False)
 
@@ -106,6 +142,10 @@ class VnStock(BaseSettings):
     interval: str = (
         "1D"  # Khoảng thời gian lấy dữ liệu (vd: '1d', '1wk', '1mo')
     )
+    max_concurrency: int = 5  # Số mã được gọi vnstock đồng thời
+    executor_workers: int = 16  # Số thread riêng cho các lời gọi vnstock
+    analysis_cache_size: int = 1024
+    analysis_cache_ttl: int = 3600  # Dữ liệu phân tích chỉ đổi theo quý
 
     model_config = SettingsConfigDict(
         env_prefix="VNSTOCK_", case_sensitive=False
@@ -120,6 +160,12 @@ class EmbeddingsSettings(BaseSettings):
     cohere_input_type: str = "search_document"
     cohere_embedding_type: str = "float"
     cohere_max_batch_size: int = 96
+    max_concurrent_batches: int = 4
+    cache_size: int = 10000  # 0 để tắt cache embedding
+    hf_batch_size: int = 64
+    hf_backend: str = "torch"  # "torch" hoặc "onnx"
+    hf_onnx_file: str = "onnx/model_qint8_avx512_vnni.onnx"
+    hf_compile: bool = False  # torch.compile model trên GPU (warm-up lâu)
 
     model_config = SettingsConfigDict(
         env_prefix="EMBEDDINGS_", case_sensitive=False
@@ -129,6 +175,7 @@ class EmbeddingsSettings(BaseSettings):
 class RedisSettings(BaseSettings):
     """Redis configuration settings"""
 
+    url: Optional[str] = None  # Nếu đặt, dùng thay cho host/port/db
     host: str = "redis-service.ai-agent.local"
     port: int = 6379
     username: str = "default"  # Redis 6+ requires username
@@ -143,12 +190,16 @@ class RedisSettings(BaseSettings):
     # Session specific settings
     default_ttl: int = 3600  # 1 hour
     cache_ttl: int = 300  # 5 minutes for analysis cache
+    session_cache_size: int = 1024
+    session_cache_ttl: float = 2  # Cache get_session trong process (giây)
+    lock_timeout: int = 10  # TTL của lock phân tán theo session (giây)
+    lock_wait_timeout: float = 5  # Thời gian chờ tối đa để lấy lock (giây)
 
     model_config = SettingsConfigDict(
         env_prefix="REDIS_", case_sensitive=False
     )
 
-    @property
+    @cached_property
     def connection_url(self) -> str:
         """Generate Redis connection URL"""
         if self.url:
@@ -158,16 +209,48 @@ class RedisSettings(BaseSettings):
         return f"redis://{auth_part}{self.host}:{self.port}/{self.db}"
 
 
+class SessionSettings(BaseSettings):
+    """Session storage settings"""
+
+    max_history: int = 200  # Số message tối đa giữ lại cho mỗi session
+    max_cached_analyses: int = 128  # Số kết quả phân tích cache mỗi session
+    # Tuổi tối đa của session tính từ lúc tạo (giây), dù vẫn được truy cập
+    max_age: int = 86400
+
+    model_config = SettingsConfigDict(
+        env_prefix="SESSION_", case_sensitive=False
+    )
+
+
+_SECTIONS: Dict[str, Type[BaseSettings]] = {
+    "app": AppSettings,
+    "llm": LLMSettings,
+    "qdrant": QdrantSettings,
+    "s3": S3Settings,
+    "embeddings": EmbeddingsSettings,
+    "redis": RedisSettings,
+    "session": SessionSettings,
+    "tavily": TavilySettings,
+    "vnstock": VnStock,
+}
+
+
+@lru_cache(maxsize=None)
+def get_section(name: str) -> BaseSettings:
+    """Build a settings section once per process (env read + validation)."""
+    return _SECTIONS[name]()
+
+
 class Settings:
-    def __init__(self):
-        self.app = AppSettings()
-        self.llm = LLMSettings()
-        self.qdrant = QdrantSettings()
-        self.s3 = S3Settings()
-        self.embeddings = EmbeddingsSettings()
-        self.redis = RedisSettings()
-        self.tavily = TavilySettings()
-        self.vnstock = VnStock()
+    """Settings sections, each built on first access (settings.qdrant...)."""
+
+    def __getattr__(self, name: str) -> BaseSettings:
+        if name not in _SECTIONS:
+            raise AttributeError(name)
+        section = get_section(name)
+        # Gán vào instance, lần truy cập sau không qua __getattr__
+        setattr(self, name, section)
+        return section
 
 
 # Singleton settings instance
@@ -1,4 +1,5 @@
 import asyncio
+import importlib
 import time
 from typing import Any, Dict, Optional
 
@@ -8,13 +9,6 @@ from ...domain.interfaces.search_interface import BaseWebSearch
 from ...domain.interfaces.stock_analysis_interface import BaseStockAnalysis
 from ...domain.interfaces.stock_data_interface import BaseStockData
 from ...domain.interfaces.vector_store_interface import BaseVectorStore
-from ...infra.chats.gemini_chat import GeminiChat
-from ...infra.chats.openai_chat import OpenAIChat
-from ...infra.embeddings.cohere_multilingual_v3_embedding import (
-    CohereV3Embedding,
-)
-from ...infra.embeddings.gemini_embedding import GeminiEmbedding
-from ...infra.embeddings.huggingface_embedding import HfEmbedding
 from ...infra.providers.tavily_search_provider import TavilyWebSearch
 from ...infra.providers.vnstock_analysis_provider import VnStockAnalysis
 from ...infra.providers.vnstock_data_provider import VnStockData
@@ -24,6 +18,25 @@ from ...shared.settings.settings import settings
 
 logger = Logger.get_logger(__name__)
 
+# Provider theo tên -> "module:Class"; chỉ import khi provider được dùng
+# (HfEmbedding kéo theo torch, không nên load nếu không cần)
+_EMBEDDING_REGISTRY = {
+    "cohere": "...infra.embeddings.cohere_multilingual_v3_embedding:CohereV3Embedding",
+    "gemini": "...infra.embeddings.gemini_embedding:GeminiEmbedding",
+    "hf": "...infra.embeddings.huggingface_embedding:HfEmbedding",
+}
+_CHAT_REGISTRY = {
+    "openai": "...infra.chats.openai_chat:OpenAIChat",
+    "gemini": "...infra.chats.gemini_chat:GeminiChat",
+}
+
+
+def _create_provider(path: str) -> Any:
+    """Import ``module:Class`` (relative to this package) and instantiate it."""
+    module_name, _, class_name = path.partition(":")
+    module = importlib.import_module(module_name, __package__)
+    return getattr(module, class_name)()
+
 
 class ServiceManager:
     """Singleton manager for heavy resources with eager initialization"""
@@ -64,6 +77,11 @@ class ServiceManager:
         self._search_provider: Optional[BaseWebSearch] = None
         self._stock_data_provider: Optional[BaseStockData] = None
         self._stock_analysis_provider: Optional[BaseStockAnalysis] = None
+        # Tên provider mặc định, đọc từ settings một lần lúc khởi tạo
+        self._default_embedding_name: Optional[str] = None
+        self._default_chat_name: Optional[str] = None
+        # Tránh tạo trùng provider khi nhiều request cùng yêu cầu lần đầu
+        self._provider_lock = asyncio.Lock()
         self._stats = {
             "embeddings_initialized": False,
             "chat_providers_initialized": False,
@@ -79,50 +97,67 @@ class ServiceManager:
         logger.info("Starting eager initialization of all services")
 
         try:
-            # Initialize embeddings
             default_embedding_provider = getattr(
                 settings.embeddings, "default_provider", "cohere"
             )
-            self._embeddings = {
-                default_embedding_provider: {
-                    "cohere": CohereV3Embedding,
-                    "gemini": GeminiEmbedding,
-                    "hf": HfEmbedding,
-                }[default_embedding_provider]()
-            }
+            default_chat_provider = getattr(
+                settings.llm, "default_provider", "openai"
+            )
+
+            # Các constructor độc lập và phần lớn là I/O đồng bộ (load model,
+            # tạo collection Qdrant...): chạy song song trên thread, tổng thời
+            # gian khởi động bằng constructor chậm nhất thay vì tổng tất cả
+            (
+                embedding,
+                vector_store,
+                chat_provider,
+                search_provider,
+                stock_data_provider,
+                stock_analysis_provider,
+            ) = await asyncio.gather(
+                asyncio.to_thread(
+                    _create_provider,
+                    _EMBEDDING_REGISTRY[default_embedding_provider],
+                ),
+                asyncio.to_thread(QdrantVectorStoreDB),
+                asyncio.to_thread(
+                    _create_provider, _CHAT_REGISTRY[default_chat_provider]
+                ),
+                asyncio.to_thread(TavilyWebSearch),
+                asyncio.to_thread(VnStockData),
+                asyncio.to_thread(VnStockAnalysis),
+            )
+
+            self._default_embedding_name = default_embedding_provider
+            self._default_chat_name = default_chat_provider
+
+            # Initialize embeddings
+            self._embeddings = {default_embedding_provider: embedding}
             self._stats["embeddings_initialized"] = True
             logger.info(
                 f"Default embedding provider {default_embedding_provider} initialized"
             )
 
             # Initialize vector store
-            self._vector_store = QdrantVectorStoreDB()
+            self._vector_store = vector_store
             self._stats["vector_store_initialized"] = True
             logger.info("QdrantVectorStoreDB initialized")
 
             # Initialize chat providers
-            default_chat_provider = getattr(
-                settings.llm, "default_provider", "openai"
-            )
-            self._chat_providers = {
-                default_chat_provider: {
-                    "openai": OpenAIChat,
-                    "gemini": GeminiChat,
-                }[default_chat_provider]()
-            }
+            self._chat_providers = {default_chat_provider: chat_provider}
             self._stats["chat_providers_initialized"] = True
             logger.info(
                 f"Default chat provider {default_chat_provider} initialized"
             )
 
             # Initialize search provider
-            self._search_provider = TavilyWebSearch()
+            self._search_provider = search_provider
             self._stats["search_provider_initialized"] = True
             logger.info("TavilyWebSearch initialized")
 
             # Initialize stock providers
-            self._stock_data_provider = VnStockData()
-            self._stock_analysis_provider = VnStockAnalysis()
+            self._stock_data_provider = stock_data_provider
+            self._stock_analysis_provider = stock_analysis_provider
             self._stats["stock_providers_initialized"] = True
             logger.info(
                 "Stock providers (VnStockData, VnStockAnalysis) initialized"
@@ -139,6 +174,36 @@ class ServiceManager:
             )
             raise RuntimeError(f"Service initialization failed: {str(e)}")
 
+    async def _ensure_embedding(self, provider_name: str) -> None:
+        """Create a non-default embedding provider on first request"""
+        if provider_name in self._embeddings:
+            return
+        if provider_name not in _EMBEDDING_REGISTRY:
+            logger.error(f"Embedding provider {provider_name} not available")
+            raise ValueError(
+                f"Embedding provider {provider_name} not available"
+            )
+        async with self._provider_lock:
+            if provider_name not in self._embeddings:
+                self._embeddings[provider_name] = await asyncio.to_thread(
+                    _create_provider, _EMBEDDING_REGISTRY[provider_name]
+                )
+                logger.info(f"Embedding provider {provider_name} initialized")
+
+    async def _ensure_chat_provider(self, provider_name: str) -> None:
+        """Create a non-default chat provider on first request"""
+        if provider_name in self._chat_providers:
+            return
+        if provider_name not in _CHAT_REGISTRY:
+            logger.error(f"Chat provider {provider_name} not available")
+            raise ValueError(f"Chat provider {provider_name} not available")
+        async with self._provider_lock:
+            if provider_name not in self._chat_providers:
+                self._chat_providers[provider_name] = await asyncio.to_thread(
+                    _create_provider, _CHAT_REGISTRY[provider_name]
+                )
+                logger.info(f"Chat provider {provider_name} initialized")
+
     async def get_embeddings(
         self, provider_name: Optional[str] = None
     ) -> Dict[str, BaseEmbeddings]:
@@ -146,28 +211,18 @@ class ServiceManager:
         if not self._stats["embeddings_initialized"]:
             logger.error("Embedding providers not initialized")
             raise RuntimeError("Embedding providers not initialized")
-        if provider_name and provider_name not in self._embeddings:
-            logger.error(f"Embedding provider {provider_name} not available")
-            raise ValueError(
-                f"Embedding provider {provider_name} not available"
-            )
+        if provider_name:
+            await self._ensure_embedding(provider_name)
         logger.debug("Returning embedding providers")
         return self._embeddings
 
     async def get_default_embedding(self) -> BaseEmbeddings:
         """Get default embedding provider"""
-        provider_name = getattr(
-            settings.embeddings, "default_provider", "cohere"
-        )
-        if provider_name not in self._embeddings:
-            logger.error(
-                f"Default embedding provider {provider_name} not initialized"
-            )
-            raise RuntimeError(
-                f"Default embedding provider {provider_name} not initialized"
-            )
-        logger.debug(f"Returning default embedding provider: {provider_name}")
-        return self._embeddings[provider_name]
+        try:
+            return self._embeddings[self._default_embedding_name]
+        except KeyError:
+            logger.error("Default embedding provider not initialized")
+            raise RuntimeError("Default embedding provider not initialized")
 
     async def get_vector_store(self) -> BaseVectorStore:
         """Get cached vector store"""
@@ -184,24 +239,18 @@ class ServiceManager:
         if not self._stats["chat_providers_initialized"]:
             logger.error("Chat providers not initialized")
             raise RuntimeError("Chat providers not initialized")
-        if provider_name and provider_name not in self._chat_providers:
-            logger.error(f"Chat provider {provider_name} not available")
-            raise ValueError(f"Chat provider {provider_name} not available")
+        if provider_name:
+            await self._ensure_chat_provider(provider_name)
         logger.debug("Returning chat providers")
         return self._chat_providers
 
     async def get_default_chat_provider(self) -> BaseChat:
         """Get default chat provider"""
-        provider_name = getattr(settings.llm, "default_provider", "openai")
-        if provider_name not in self._chat_providers:
-            logger.error(
-                f"Default chat provider {provider_name} not initialized"
-            )
-            raise RuntimeError(
-                f"Default chat provider {provider_name} not initialized"
-            )
-        logger.debug(f"Returning default chat provider: {provider_name}")
-        return self._chat_providers[provider_name]
+        try:
+            return self._chat_providers[self._default_chat_name]
+        except KeyError:
+            logger.error("Default chat provider not initialized")
+            raise RuntimeError("Default chat provider not initialized")
 
     async def get_search_provider(self) -> BaseWebSearch:
         """Get cached search provider"""
@@ -258,6 +307,14 @@ class ServiceManager:
             if self._vector_store:
                 await self._vector_store.close()
                 logger.info("QdrantVectorStoreDB connection closed")
+            for stock_provider in (
+                self._stock_data_provider,
+                self._stock_analysis_provider,
+            ):
+                if stock_provider is not None:
+                    stock_provider.close()
+            for chat_provider in self._chat_providers.values():
+                await chat_provider.aclose()
             self._embeddings = {}
             self._chat_providers = {}
             self._vector_store = None
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Mã nguồn nằm trong src/ (import dạng agent.*), chưa đóng gói thành package
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
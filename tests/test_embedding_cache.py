@@ -0,0 +1,91 @@
+import asyncio
+
+from agent.infra.utils.embedding_cache import EmbeddingCache
+
+
+class _Model:
+    """Fake embedding model recording every text it embeds."""
+
+    def __init__(self):
+        self.calls = []
+
+    async def embed_one(self, text):
+        self.calls.append([text])
+        return [0.1, float(len(text))]
+
+    async def embed_many(self, texts):
+        self.calls.append(list(texts))
+        return [[0.1, float(len(text))] for text in texts]
+
+
+def test_hit_and_miss_return_the_same_values():
+    model = _Model()
+    cache = EmbeddingCache(maxsize=10)
+
+    async def main():
+        miss = await cache.get_or_compute("ns", "abc", model.embed_one)
+        hit = await cache.get_or_compute("ns", "abc", model.embed_one)
+        return miss, hit
+
+    miss, hit = asyncio.run(main())
+    assert miss == hit
+    assert miss is not hit
+    assert model.calls == [["abc"]]
+
+
+def test_batch_computes_only_distinct_misses():
+    model = _Model()
+    cache = EmbeddingCache(maxsize=10)
+
+    async def main():
+        await cache.get_or_compute("ns", "a", model.embed_one)
+        return await cache.get_or_compute_many(
+            "ns", ["a", "bb", "bb", "ccc"], model.embed_many
+        )
+
+    results = asyncio.run(main())
+    assert model.calls == [["a"], ["bb", "ccc"]]
+    assert [r[1] for r in results] == [1.0, 2.0, 2.0, 3.0]
+
+
+def test_duplicate_texts_get_separate_lists():
+    async def main(cache):
+        return await cache.get_or_compute_many(
+            "ns", ["x", "x"], _Model().embed_many
+        )
+
+    for maxsize in (10, 0):
+        first, second = asyncio.run(main(EmbeddingCache(maxsize=maxsize)))
+        assert first == second
+        first.append(1.0)
+        assert len(second) == 2
+
+
+def test_namespaces_do_not_share_entries():
+    model = _Model()
+    cache = EmbeddingCache(maxsize=10)
+
+    async def main():
+        await cache.get_or_compute("model-a", "t", model.embed_one)
+        await cache.get_or_compute("model-b", "t", model.embed_one)
+
+    asyncio.run(main())
+    assert len(model.calls) == 2
+    assert EmbeddingCache.make_namespace("m", "search_document") == (
+        "m\0search_document"
+    )
+
+
+def test_blank_texts_skip_the_model():
+    model = _Model()
+    cache = EmbeddingCache(maxsize=10)
+
+    async def main():
+        return await cache.get_or_compute_many(
+            "ns", ["", "a", "  "], model.embed_many, blank_vector=[0.0, 0.0]
+        )
+
+    results = asyncio.run(main())
+    assert model.calls == [["a"]]
+    assert results[0] == results[2] == [0.0, 0.0]
+    assert results[0] is not results[2]
@@ -0,0 +1,45 @@
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from agent.infra.utils.llm_cache import LLMResponseCache
+
+_PARAMS = {"model": "gpt-4o-mini", "temperature": 0.0}
+
+
+def test_key_depends_on_params_and_messages():
+    messages = [SystemMessage(content="sys"), HumanMessage(content="hi")]
+    key = LLMResponseCache.make_key(_PARAMS, messages)
+
+    assert key == LLMResponseCache.make_key(dict(_PARAMS), list(messages))
+    assert key != LLMResponseCache.make_key(
+        {**_PARAMS, "model": "gpt-4o"}, messages
+    )
+    assert key != LLMResponseCache.make_key(
+        _PARAMS, [HumanMessage(content="hi")]
+    )
+
+
+def test_get_returns_a_copy_of_the_stored_response():
+    cache = LLMResponseCache()
+    key = LLMResponseCache.make_key(_PARAMS, [HumanMessage(content="q")])
+    cache.put(key, {"response": "answer"})
+
+    hit = cache.get(key)
+    hit["response"] = "changed"
+    assert cache.get(key) == {"response": "answer"}
+
+
+def test_empty_responses_are_not_cached():
+    cache = LLMResponseCache()
+    key = LLMResponseCache.make_key(_PARAMS, [HumanMessage(content="q")])
+    cache.put(key, {})
+    cache.put(key, {"response": ""})
+
+    assert cache.get(key) is None
+
+
+def test_entries_expire_after_ttl():
+    cache = LLMResponseCache(ttl_seconds=0)
+    key = LLMResponseCache.make_key(_PARAMS, [HumanMessage(content="q")])
+    cache.put(key, {"response": "answer"})
+
+    assert cache.get(key) is None
@@ -0,0 +1,84 @@
+import asyncio
+
+import pytest
+
+from agent.infra.utils.micro_batcher import MicroBatcher
+
+
+def test_concurrent_submissions_share_one_batch():
+    batches = []
+
+    async def process(items):
+        batches.append(list(items))
+        return [item * 10 for item in items]
+
+    async def main():
+        batcher = MicroBatcher(process, max_batch_size=8, max_wait_ms=20)
+        return await asyncio.gather(*(batcher.submit(i) for i in range(5)))
+
+    assert asyncio.run(main()) == [0, 10, 20, 30, 40]
+    assert batches == [[0, 1, 2, 3, 4]]
+
+
+def test_full_batch_flushes_without_waiting():
+    batches = []
+
+    async def process(items):
+        batches.append(len(items))
+        return items
+
+    async def main():
+        # max_wait rất lớn: chỉ có thể flush vì batch đã đầy
+        batcher = MicroBatcher(process, max_batch_size=3, max_wait_ms=10_000)
+        return await asyncio.wait_for(
+            asyncio.gather(*(batcher.submit(i) for i in range(6))), timeout=1
+        )
+
+    assert asyncio.run(main()) == list(range(6))
+    assert batches == [3, 3]
+
+
+def test_lone_item_flushes_after_max_wait():
+    async def process(items):
+        return items
+
+    async def main():
+        batcher = MicroBatcher(process, max_batch_size=32, max_wait_ms=5)
+        return await asyncio.wait_for(batcher.submit("x"), timeout=1)
+
+    assert asyncio.run(main()) == "x"
+
+
+def test_batch_error_reaches_every_caller():
+    async def process(items):
+        raise RuntimeError("backend down")
+
+    async def main():
+        batcher = MicroBatcher(process, max_batch_size=4, max_wait_ms=5)
+        return await asyncio.gather(
+            *(batcher.submit(i) for i in range(3)), return_exceptions=True
+        )
+
+    results = asyncio.run(main())
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+def test_cancelled_submission_is_not_processed():
+    seen = []
+
+    async def process(items):
+        seen.extend(items)
+        return items
+
+    async def main():
+        batcher = MicroBatcher(process, max_batch_size=8, max_wait_ms=20)
+        cancelled = asyncio.ensure_future(batcher.submit("cancelled"))
+        kept = asyncio.ensure_future(batcher.submit("kept"))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await cancelled
+        return await kept
+
+    assert asyncio.run(main()) == "kept"
+    assert seen == ["kept"]
@@ -0,0 +1,43 @@
+import re
+
+import pytest
+
+pytest.importorskip("aioboto3")
+
+from agent.infra.document_loaders.s3_document_loader import (  # noqa: E402
+    _RE_CLEAN,
+    _clean_replacement,
+)
+
+
+def _clean(text):
+    return _RE_CLEAN.sub(_clean_replacement, text).strip()
+
+
+def _clean_multi_pass(text):
+    """The original four-pass cleaner the single pass must match."""
+    text = re.sub(r"\n\s*\n", "\n\n", text)
+    text = re.sub(r" +", " ", text)
+    text = re.sub(r"\t+", " ", text)
+    text = re.sub(r"(.)\1{20,}", "", text)
+    return text.strip()
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "a" + " \t" * 15 + "b",
+        "a" + " \t" * 5 + "b",
+        "a  \t\t  b",
+        "a\t\t\tb",
+        "a \n \t \n b",
+        "x" + "=" * 25 + "y",
+        "a" + " " * 30 + "b",
+    ],
+)
+def test_single_pass_matches_multi_pass_cleaner(text):
+    assert _clean(text) == _clean_multi_pass(text)
+
+
+def test_long_mixed_whitespace_run_is_dropped():
+    assert _clean("a" + " \t" * 15 + "b") == "ab"
@@ -0,0 +1,61 @@
+from agent.infra.utils.semantic_cache import SemanticCache
+
+
+def test_exact_hit_returns_stored_value():
+    cache = SemanticCache()
+    cache.put("vcb p/e", [1.0, 0.0], "value")
+
+    assert cache.get_exact("vcb p/e") == "value"
+    assert cache.get_exact("other") is None
+    assert cache.get_stats()["exact_hits"] == 1
+
+
+def test_lookup_matches_similar_vectors_only():
+    cache = SemanticCache(threshold=0.95)
+    cache.put("q", [1.0, 0.0], "value")
+
+    # Cùng hướng, khác độ dài: cosine = 1
+    assert cache.lookup([2.0, 0.0]) == "value"
+    # Vuông góc: cosine = 0
+    assert cache.lookup([0.0, 1.0]) is None
+
+    stats = cache.get_stats()
+    assert (stats["semantic_hits"], stats["misses"]) == (1, 1)
+
+
+def test_lookup_on_empty_cache_is_a_miss():
+    cache = SemanticCache()
+
+    assert cache.lookup([1.0, 0.0]) is None
+    assert cache.get_stats()["misses"] == 1
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = SemanticCache(max_entries=2)
+    cache.put("a", [1.0, 0.0, 0.0], "A")
+    cache.put("b", [0.0, 1.0, 0.0], "B")
+    cache.get_exact("a")
+    cache.put("c", [0.0, 0.0, 1.0], "C")
+
+    assert cache.get_exact("b") is None
+    assert cache.get_exact("a") == "A"
+    assert cache.lookup([0.0, 0.0, 1.0]) == "C"
+    assert cache.get_stats()["evictions"] == 1
+
+
+def test_expired_entries_are_not_served():
+    cache = SemanticCache(ttl_seconds=-1)
+    cache.put("q", [1.0, 0.0], "value")
+
+    assert cache.get_exact("q") is None
+    assert cache.lookup([1.0, 0.0]) is None
+
+
+def test_clear_drops_every_entry():
+    cache = SemanticCache()
+    cache.put("q", [1.0, 0.0], "value")
+    cache.clear()
+
+    assert cache.get_exact("q") is None
+    assert cache.lookup([1.0, 0.0]) is None
+    assert cache.get_stats()["size"] == 0
@@ -0,0 +1,169 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+from agent.shared.session import session_manager
+from agent.shared.session.session_manager import (
+    InMemorySessionManager,
+    StripedLock,
+)
+
+
+def _expire(manager, session_id):
+    """Move a session's TTL into the past without sleeping."""
+    session = manager.sessions[session_id]
+    session.expires_at = time.monotonic() - 1
+
+
+def test_striped_lock_maps_each_key_to_one_lock():
+    locks = StripedLock(stripes=4)
+
+    assert locks("session-a") is locks("session-a")
+    assert len({id(locks(str(i))) for i in range(100)}) <= 4
+
+
+def test_striped_lock_serialises_the_same_key():
+    locks = StripedLock(stripes=4)
+    active = 0
+    overlapped = False
+
+    async def critical():
+        nonlocal active, overlapped
+        async with locks("same"):
+            active += 1
+            overlapped |= active > 1
+            await asyncio.sleep(0)
+            active -= 1
+
+    async def main():
+        await asyncio.gather(*(critical() for _ in range(10)))
+
+    asyncio.run(main())
+    assert not overlapped
+
+
+def test_expired_session_is_dropped_on_read():
+    async def main():
+        manager = InMemorySessionManager(cleanup_probability=0)
+        session_id = await manager.create_session()
+        assert await manager.get_session(session_id) is not None
+
+        _expire(manager, session_id)
+        return manager, await manager.get_session(session_id), session_id
+
+    manager, session, session_id = asyncio.run(main())
+    assert session is None
+    assert session_id not in manager.sessions
+
+
+def test_sweep_evicts_sessions_that_are_never_read_again():
+    async def main():
+        manager = InMemorySessionManager(cleanup_probability=0)
+        expired = [await manager.create_session() for _ in range(3)]
+        live = await manager.create_session()
+        for session_id in expired:
+            manager.sessions[session_id].expires_at = 0
+        # Đầu heap phải tới hạn để được quét
+        manager._expiry_heap = sorted(
+            (manager.sessions[s].expires_at, s) for s in manager.sessions
+        )
+        await manager._cleanup_expired_sessions()
+        return manager, expired, live
+
+    manager, expired, live = asyncio.run(main())
+    assert set(manager.sessions) == {live}
+
+
+def test_accessed_session_is_rescheduled_not_evicted():
+    async def main():
+        manager = InMemorySessionManager(cleanup_probability=0)
+        session_id = await manager.create_session()
+        # Mục trong heap đã tới hạn nhưng session vẫn còn hạn mới
+        manager._expiry_heap = [(0.0, session_id)]
+        evicted = await manager._evict_expired()
+        return manager, session_id, evicted
+
+    manager, session_id, evicted = asyncio.run(main())
+    assert evicted == []
+    assert session_id in manager.sessions
+    assert manager._expiry_heap[0][1] == session_id
+
+
+def test_session_due_exactly_now_is_evicted(monkeypatch):
+    async def main():
+        manager = InMemorySessionManager(cleanup_probability=0)
+        session_id = await manager.create_session()
+        now = manager.sessions[session_id].expires_at
+        manager._expiry_heap = [(now, session_id)]
+        monkeypatch.setattr(
+            session_manager, "time", SimpleNamespace(monotonic=lambda: now)
+        )
+        # limit chặn vòng lặp nếu mục bị đẩy lại đầu heap
+        evicted = await manager._evict_expired(limit=10)
+        return manager, session_id, evicted
+
+    manager, session_id, evicted = asyncio.run(main())
+    assert evicted == [session_id]
+    assert manager._expiry_heap == []
+
+
+def test_new_sessions_never_reuse_expired_session_objects():
+    async def main():
+        manager = InMemorySessionManager(cleanup_probability=0)
+        old_id = await manager.create_session()
+        old = await manager.get_session(old_id)
+        await manager.update_conversation(old_id, {"content": "private"})
+
+        _expire(manager, old_id)
+        await manager.get_session(old_id)
+        new_id = await manager.create_session()
+        return old, await manager.get_session(new_id)
+
+    old, new = asyncio.run(main())
+    assert new is not old
+    assert new.conversation_history == type(new.conversation_history)()
+    assert [m["content"] for m in old.conversation_history] == ["private"]
+
+
+def test_access_cannot_extend_past_max_age():
+    async def main():
+        manager = InMemorySessionManager(
+            default_ttl=3600, cleanup_probability=0, max_age=60
+        )
+        session_id = await manager.create_session()
+        session = manager.sessions[session_id]
+        session.last_accessed -= 10_000
+        await manager.get_session(session_id)
+        return session
+
+    session = asyncio.run(main())
+    assert session.expires_at <= session.max_expires_at
+
+
+def test_analysis_cache_is_bounded_lru():
+    async def main():
+        manager = InMemorySessionManager(cleanup_probability=0)
+        manager.max_cached_analyses = 2
+        session_id = await manager.create_session()
+        await manager.cache_analysis(session_id, "a", {"v": 1})
+        await manager.cache_analysis(session_id, "b", {"v": 2})
+        await manager.get_cached_analysis(session_id, "a")
+        await manager.cache_analysis(session_id, "c", {"v": 3})
+        return [
+            await manager.get_cached_analysis(session_id, key)
+            for key in ("a", "b", "c")
+        ]
+
+    assert asyncio.run(main()) == [{"v": 1}, None, {"v": 3}]
+
+
+def test_stats_count_only_unexpired_sessions():
+    async def main():
+        manager = InMemorySessionManager(cleanup_probability=0)
+        expired = await manager.create_session()
+        await manager.create_session()
+        _expire(manager, expired)
+        return manager.get_stats()
+
+    stats = asyncio.run(main())
+    assert (stats["total_sessions"], stats["active_sessions"]) == (2, 1)
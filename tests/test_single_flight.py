@@ -0,0 +1,89 @@
+import asyncio
+
+import pytest
+
+from agent.infra.utils.single_flight import SingleFlight
+
+
+def test_concurrent_calls_with_same_key_run_once():
+    calls = 0
+
+    async def work():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return "result"
+
+    async def main():
+        flight = SingleFlight()
+        return await asyncio.gather(*(flight.do("k", work) for _ in range(5)))
+
+    assert asyncio.run(main()) == ["result"] * 5
+    assert calls == 1
+
+
+def test_different_keys_run_separately():
+    async def main():
+        flight = SingleFlight()
+
+        async def echo(value):
+            await asyncio.sleep(0)
+            return value
+
+        return await asyncio.gather(
+            flight.do("a", lambda: echo(1)), flight.do("b", lambda: echo(2))
+        )
+
+    assert asyncio.run(main()) == [1, 2]
+
+
+def test_key_is_released_after_completion():
+    calls = 0
+
+    async def work():
+        nonlocal calls
+        calls += 1
+        return calls
+
+    async def main():
+        flight = SingleFlight()
+        first = await flight.do("k", work)
+        second = await flight.do("k", work)
+        return first, second, flight._inflight
+
+    first, second, inflight = asyncio.run(main())
+    assert (first, second) == (1, 2)
+    assert inflight == {}
+
+
+def test_exception_reaches_every_caller():
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("boom")
+
+    async def main():
+        flight = SingleFlight()
+        return await asyncio.gather(
+            flight.do("k", fail), flight.do("k", fail), return_exceptions=True
+        )
+
+    results = asyncio.run(main())
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+def test_cancelled_caller_does_not_cancel_others():
+    async def work():
+        await asyncio.sleep(0.02)
+        return "done"
+
+    async def main():
+        flight = SingleFlight()
+        first = asyncio.ensure_future(flight.do("k", work))
+        second = asyncio.ensure_future(flight.do("k", work))
+        await asyncio.sleep(0)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(main()) == "done"
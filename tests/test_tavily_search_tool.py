@@ -0,0 +1,29 @@
+import asyncio
+
+from agent.domain.tools.tavily_search_tool import TavilySearchTool
+
+
+class _WebSearch:
+    """Fake web search provider returning one fixed hit."""
+
+    async def search(self, query):
+        return [{"title": "FPT", "content": "news", "url": "u", "score": 0.5}]
+
+
+def test_retriever_is_memoised_per_tool():
+    tool = TavilySearchTool(_WebSearch())
+
+    assert tool.to_langchain_retriever() is tool.to_langchain_retriever()
+    assert (
+        TavilySearchTool(_WebSearch()).to_langchain_retriever()
+        is not tool.to_langchain_retriever()
+    )
+
+
+def test_retriever_builds_documents_from_tool_result():
+    retriever = TavilySearchTool(_WebSearch()).to_langchain_retriever()
+
+    docs = asyncio.run(retriever.ainvoke("FPT"))
+
+    assert [d.page_content for d in docs] == ["news"]
+    assert docs[0].metadata == {"title": "FPT", "url": "u", "score": 0.5}
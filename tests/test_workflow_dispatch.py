@@ -0,0 +1,163 @@
+import asyncio
+from typing import Any, Dict, List, Type
+
+import orjson
+import pytest
+from langchain_core.messages import AIMessage, BaseMessage
+from pydantic import BaseModel
+
+from agent.domain.agents.react_agent import StockReActAgent
+from agent.domain.entities.context import AgentState
+from agent.domain.interfaces.chat_interface import BaseChat
+from agent.domain.tools.base import CustomBaseTool
+from agent.domain.tools.rag_tool import RAGToolInput
+from agent.domain.tools.stock_data_tool import StockPriceToolInput
+from agent.infra.agents.langgraph_workflow import ReActWorkflow
+
+
+class _Chat(BaseChat):
+    """Chat provider that is never expected to be called in these tests."""
+
+    async def chat(self, messages: List[BaseMessage], **kwargs):
+        return {"response": ""}
+
+
+class _Probe:
+    """Tracks how many tool calls run at the same time."""
+
+    def __init__(self):
+        self.active = 0
+        self.max_active = 0
+
+    async def run(self):
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        await asyncio.sleep(0.01)
+        self.active -= 1
+
+
+class _PriceTool(CustomBaseTool):
+    name: str = "stock_price"
+    description: str = "Fake stock price tool"
+    args_schema: Type[BaseModel] = StockPriceToolInput
+    probe: Any = None
+
+    async def _execute_impl(self, symbols, **kwargs) -> Dict[str, Any]:
+        await self.probe.run()
+        if symbols == "FAIL":
+            raise RuntimeError("provider down")
+        if symbols == "EMPTY":
+            # Giống StockPriceTool khi provider lỗi: success nhưng rỗng
+            return {"results": {}}
+        return {"results": {"symbol": symbols}}
+
+
+class _RagTool(CustomBaseTool):
+    name: str = "rag_knowledge"
+    description: str = "Fake knowledge base tool"
+    args_schema: Type[BaseModel] = RAGToolInput
+    probe: Any = None
+
+    async def _execute_impl(self, query, **kwargs) -> Dict[str, Any]:
+        await self.probe.run()
+        return {"knowledge_context": query, "sources": [], "scores": []}
+
+
+@pytest.fixture
+def workflow_and_probe():
+    ReActWorkflow._tool_cache.clear()
+    ReActWorkflow._quote_cache.clear()
+    probe = _Probe()
+    tools = {
+        "stock_price": _PriceTool(probe=probe),
+        "rag_knowledge": _RagTool(probe=probe),
+    }
+    agent = StockReActAgent(chat_provider=_Chat(), tools=tools)
+    return ReActWorkflow(agent=agent, tools=tools), probe
+
+
+def _state_with_actions(actions: List[Dict[str, Any]]) -> AgentState:
+    block = orjson.dumps(actions).decode()
+    return AgentState(messages=[AIMessage(content=f"```json\n{block}\n```")])
+
+
+def test_tools_of_one_step_run_concurrently(workflow_and_probe):
+    workflow, probe = workflow_and_probe
+    state = _state_with_actions(
+        [
+            {"action": "stock_price", "input": {"symbols": "FPT"}},
+            {"action": "rag_knowledge", "input": {"query": "FPT outlook"}},
+        ]
+    )
+
+    update = asyncio.run(workflow._action_node(state))
+
+    assert probe.max_active == 2
+    assert update["tools_used"] == ["stock_price", "rag_knowledge"]
+    assert [r["success"] for r in update["intermediate_results"]] == [
+        True,
+        True,
+    ]
+    assert update["current_step"] == 1
+
+
+def test_failed_tool_does_not_drop_the_others(workflow_and_probe):
+    workflow, _ = workflow_and_probe
+    state = _state_with_actions(
+        [
+            {"action": "stock_price", "input": {"symbols": "FAIL"}},
+            {"action": "stock_price", "input": {"symbols": "VCB"}},
+            {"action": "stock_price", "input": {"wrong_field": 1}},
+        ]
+    )
+
+    update = asyncio.run(workflow._action_node(state))
+
+    results = update["intermediate_results"]
+    assert [r["success"] for r in results] == [False, True, False]
+    assert "VCB" in results[1]["observation"]
+
+
+def test_every_result_of_a_large_step_is_kept(workflow_and_probe):
+    workflow, _ = workflow_and_probe
+    symbols = ["FPT", "VCB", "HPG", "MWG", "VNM", "TCB"]
+    state = _state_with_actions(
+        [
+            {"action": "stock_price", "input": {"symbols": symbol}}
+            for symbol in symbols
+        ]
+    )
+
+    update = asyncio.run(workflow._action_node(state))
+
+    results = update["intermediate_results"]
+    assert len(results) == len(symbols)
+    for symbol, result in zip(symbols, results):
+        assert symbol in result["observation"]
+
+
+def test_empty_single_shot_result_still_goes_through_reflection(
+    workflow_and_probe,
+):
+    workflow, _ = workflow_and_probe
+    state = _state_with_actions(
+        [{"action": "stock_price", "input": {"symbols": "EMPTY"}}]
+    )
+    state = state.model_copy(update=asyncio.run(workflow._action_node(state)))
+
+    assert state.intermediate_results[0]["success"]
+    assert not state.intermediate_results[0]["has_payload"]
+    update = asyncio.run(workflow._reflection_node(state))
+    assert not update["reflection_notes"][-1].startswith("Skipped")
+
+
+def test_single_shot_result_with_data_skips_reflection(workflow_and_probe):
+    workflow, _ = workflow_and_probe
+    state = _state_with_actions(
+        [{"action": "stock_price", "input": {"symbols": "FPT"}}]
+    )
+    state = state.model_copy(update=asyncio.run(workflow._action_node(state)))
+
+    update = asyncio.run(workflow._reflection_node(state))
+    assert update["reflection_decision"] == "end"
+    assert update["reflection_notes"][-1].startswith("Skipped")